@@ -0,0 +1,161 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/bulk_render.py
+
+This script measures how rendering the files of many domains scales with the number of processes.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from pythoneda.tools.artifact.new_domain import (
+    BulkRenderer,
+    NewFileFromTemplate,
+    TemplateCompiler,
+)
+
+
+def specs_for(domains: int, root: str) -> list:
+    """
+    Describes the files of given number of domains.
+    :param domains: The number of domains.
+    :type domains: int
+    :param root: The folder to write them to.
+    :type root: str
+    :return: The specs.
+    :rtype: list
+    """
+    result = []
+    for index in range(domains):
+        folder = os.path.join(root, f"domain-{index}")
+        result += BulkRenderer.specs_for(
+            "bench-org",
+            f"domain-{index}",
+            f"Benchmark domain {index}",
+            f"pythoneda.bench_org.domain_{index}",
+            os.path.join(folder, "domain"),
+            os.path.join(folder, "definition"),
+        )
+    return result
+
+
+def sequential(specs: list) -> float:
+    """
+    Renders given files one after the other, in this process.
+    :param specs: The specs.
+    :type specs: list
+    :return: The wall time, in seconds.
+    :rtype: float
+    """
+    start = time.perf_counter()
+    for path, factory, args in specs:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        NewFileFromTemplate.write_if_changed(path, factory(*args).render())
+    return time.perf_counter() - start
+
+
+def pooled(specs: list, processes: int, warmUp: str) -> dict:
+    """
+    Renders given files with a pool of processes.
+    :param specs: The specs.
+    :type specs: list
+    :param processes: The number of processes.
+    :type processes: int
+    :param warmUp: The folder to render a few domains to before measuring, to start every worker.
+    :type warmUp: str
+    :return: The wall time, in seconds, the time to the first file, and the failures.
+    :rtype: dict
+    """
+    with BulkRenderer(processes) as renderer:
+        list(renderer.render(specs_for(processes * 2, warmUp)))
+        start = time.perf_counter()
+        first = None
+        failures = 0
+        for outcome in renderer.render(specs):
+            if first is None:
+                first = time.perf_counter() - start
+            if outcome["error"] is not None:
+                failures += 1
+        return {
+            "wall-time": time.perf_counter() - start,
+            "first-file": first,
+            "failures": failures,
+        }
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("-n", "--domains", type=int, default=200)
+    parser.add_argument(
+        "-p",
+        "--processes",
+        default=",".join(
+            [str(2**power) for power in range((os.cpu_count() or 1).bit_length())]
+        ),
+        help="Comma-separated number of processes per scenario",
+    )
+    parser.add_argument(
+        "--compile-templates",
+        action="store_true",
+        help="Use the compiled templates",
+    )
+    args = parser.parse_args()
+    TemplateCompiler.configure(enabled=args.compile_templates)
+    root = tempfile.mkdtemp(prefix="new-domain-bulk-")
+    try:
+        sequential(specs_for(1, os.path.join(root, "warm-up")))
+        baseline = sequential(specs_for(args.domains, os.path.join(root, "sequential")))
+        result = {
+            "domains": args.domains,
+            "cpus": os.cpu_count(),
+            "sequential-wall-time": baseline,
+            "scenarios": {},
+        }
+        for processes in [int(count) for count in args.processes.split(",")]:
+            scenario = pooled(
+                specs_for(args.domains, os.path.join(root, f"pool-{processes}")),
+                processes,
+                os.path.join(root, f"warm-up-{processes}"),
+            )
+            scenario["speedup"] = baseline / scenario["wall-time"]
+            scenario["efficiency"] = scenario["speedup"] / processes
+            result["scenarios"][f"pool-{processes}"] = scenario
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
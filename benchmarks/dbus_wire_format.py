@@ -0,0 +1,282 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/dbus_wire_format.py
+
+This script compares the "json" and "binary" d-bus formats of new-domain events.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import uuid
+
+try:
+    from pythoneda.tools.artifact.new_domain.events.infrastructure.dbus import (
+        NewDomainEventCodec,
+    )
+except ImportError:
+    # the codec has no dependencies, so it can be benchmarked on its own
+    spec = importlib.util.spec_from_file_location(
+        "new_domain_event_codec",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..",
+            "pythoneda",
+            "tools",
+            "artifact",
+            "new_domain",
+            "events",
+            "infrastructure",
+            "dbus",
+            "new_domain_event_codec.py",
+        ),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    NewDomainEventCodec = module.NewDomainEventCodec
+
+try:
+    from dbus_next._private.marshaller import Marshaller
+except ImportError:
+    Marshaller = None
+
+
+def context_updates(org: str, name: str) -> list:
+    """
+    Retrieves the context entries each step of the pipeline adds, in order.
+    :param org: The organization.
+    :type org: str
+    :param name: The domain name.
+    :type name: str
+    :return: The entries, per hop.
+    :rtype: list
+    """
+    workspace = f"/tmp/pythoneda-new-domain/new-domain-{uuid.uuid4().hex[:8]}"
+    updates = [
+        {"clone-mode": "clone", "sha256-mode": "remote", "verify-sha256": False},
+        {"repo-created": True, "url": f"https://github.com/{org}/{name}"},
+        {"repo-folder": f"{workspace}/{name}", "workspaces": [workspace]},
+    ]
+    for step in ["readme", "gitattributes", "gitignore", "init-files"]:
+        updates.append({})
+        updates.append({})
+    updates += [
+        {},
+        {"version": "0.0.1"},
+        {},
+        {"artifact-url": f"https://github.com/{org}/{name}/0.0.1"},
+        {},
+        {"def-org": f"{org}-def", "def-url": f"https://github.com/{org}-def/{name}"},
+        {"def-repo-created": True},
+        {"def-repo-folder": f"{workspace}/{name}-def"},
+    ]
+    for step in ["readme", "nix-flake", "pyprojecttoml-template", "flake-lock"]:
+        updates.append({})
+        updates.append({})
+    updates += [{}, {}, {}, {}, {}, {}, {}, {"new-domain-created": True}]
+    return updates
+
+
+def pipeline(org: str, name: str) -> list:
+    """
+    Simulates the events of a pipeline, with the context growing at each hop.
+    :param org: The organization.
+    :type org: str
+    :param name: The domain name.
+    :type name: str
+    :return: For each hop, its string fields, context and previous event ids.
+    :rtype: list
+    """
+    result = []
+    context = {"pipeline": {}}
+    previous_event_ids = []
+    for hop, update in enumerate(context_updates(org, name)):
+        context.update(update)
+        steps = context["pipeline"].setdefault(
+            "domain" if hop < 20 else "definition", {"done": [], "triggered": []}
+        )
+        steps["done"].append(f"step-{hop}")
+        event_id = str(uuid.uuid4())
+        invariants = json.dumps(
+            {
+                "pythoneda.shared.git.GitRepo.lock": str(uuid.uuid4()),
+                "pythoneda.shared.banner.BannerNixFlake.version": "0.0.1",
+            }
+        )
+        fields = [
+            org,
+            name,
+            f"Domain for {name}",
+            f"pythoneda.{org}.{name.replace('-', '_')}",
+            "ghp_" + "x" * 36,
+            "0123456789ABCDEF",
+            invariants,
+            event_id,
+        ]
+        result.append((fields, json.loads(json.dumps(context)), list(previous_event_ids)))
+        previous_event_ids = [event_id] + previous_event_ids
+    return result
+
+
+def json_args(fields: list, context: dict, previousEventIds: list) -> list:
+    """
+    Builds the "ssssssssss" signal arguments.
+    :param fields: The string fields.
+    :type fields: list
+    :param context: The context.
+    :type context: dict
+    :param previousEventIds: The ids of the previous events.
+    :type previousEventIds: list
+    :return: The arguments.
+    :rtype: list
+    """
+    return fields[:6] + [
+        json.dumps(context),
+        json.dumps(previousEventIds),
+        fields[6],
+        fields[7],
+    ]
+
+
+def wire_size(signature: str, body: list) -> int:
+    """
+    Retrieves the size of given signal body, once marshalled.
+    :param signature: The d-bus signature.
+    :type signature: str
+    :param body: The arguments.
+    :type body: list
+    :return: The size in bytes.
+    :rtype: int
+    """
+    if Marshaller is not None:
+        return len(Marshaller(signature, body).marshall())
+    result = 0
+    for value in body:
+        # 4-byte aligned length, the data, and the trailing nul of strings
+        result = (result + 3) // 4 * 4 + 4
+        result += len(value) if isinstance(value, bytes) else len(value.encode()) + 1
+    return result
+
+
+def measure_json(hops: list, iterations: int) -> dict:
+    """
+    Measures the "json" format.
+    :param hops: The simulated events.
+    :type hops: list
+    :param iterations: How many times each pipeline is encoded and decoded.
+    :type iterations: int
+    :return: The results.
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encoded = [json_args(*hop) for hop in hops]
+    encode = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for args in encoded:
+            json.loads(args[6])
+            json.loads(args[7])
+    decode = time.perf_counter() - start
+    return {
+        "encode-us-per-pipeline": encode / iterations * 1e6,
+        "decode-us-per-pipeline": decode / iterations * 1e6,
+        "bytes-per-pipeline": sum(
+            [wire_size("ssssssssss", args) for args in encoded]
+        ),
+    }
+
+
+def measure_binary(hops: list, iterations: int, compressionThreshold: int) -> dict:
+    """
+    Measures the "binary" format.
+    :param hops: The simulated events.
+    :type hops: list
+    :param iterations: How many times each pipeline is encoded and decoded.
+    :type iterations: int
+    :param compressionThreshold: The compression threshold of the codec.
+    :type compressionThreshold: int
+    :return: The results.
+    :rtype: dict
+    """
+    NewDomainEventCodec.configure(compressionThreshold)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        payloads = [NewDomainEventCodec.encode(*hop) for hop in hops]
+    encode = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for payload in payloads:
+            NewDomainEventCodec.decode(payload)
+    decode = time.perf_counter() - start
+    for hop, payload in zip(hops, payloads):
+        assert NewDomainEventCodec.decode(payload) == tuple(hop), "round-trip failed"
+    return {
+        "encode-us-per-pipeline": encode / iterations * 1e6,
+        "decode-us-per-pipeline": decode / iterations * 1e6,
+        "bytes-per-pipeline": sum([wire_size("ay", [payload]) for payload in payloads]),
+    }
+
+
+def measure(hops: list, iterations: int) -> dict:
+    """
+    Measures both formats.
+    :param hops: The simulated events.
+    :type hops: list
+    :param iterations: How many times each pipeline is encoded and decoded.
+    :type iterations: int
+    :return: The results.
+    :rtype: dict
+    """
+    return {
+        "hops": len(hops),
+        "iterations": iterations,
+        "exact-wire-size": Marshaller is not None,
+        "json": measure_json(hops, iterations),
+        "binary": measure_binary(hops, iterations, 256),
+        "binary-uncompressed": measure_binary(hops, iterations, -1),
+    }
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("-i", "--iterations", type=int, default=2000)
+    parser.add_argument("-o", "--org", default="pythoneda-sandbox")
+    parser.add_argument("-n", "--name", default="flow-sample")
+    args = parser.parse_args()
+    json.dump(
+        measure(pipeline(args.org, args.name), args.iterations), sys.stdout, indent=2
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,211 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/event_loop_lag.py
+
+This script measures how long the event loop stalls while concurrent pipelines generate their files.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from pythoneda.tools.artifact.new_domain import (
+    DefinitionNixFlake,
+    DefinitionReadme,
+    DomainReadme,
+    Gitattributes,
+    Gitignore,
+    NewDomain,
+    PyprojecttomlTemplate,
+    TemplateCompiler,
+    TemplateExecutor,
+)
+from pythoneda.tools.artifact.new_domain.init import Init
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Retrieves a percentile of given values.
+    :param values: The values, sorted.
+    :type values: list
+    :param fraction: The percentile, between 0 and 1.
+    :type fraction: float
+    :return: The percentile.
+    :rtype: float
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+async def scaffold(index: int, root: str):
+    """
+    Generates the files of both repositories of a domain, the way the pipeline does.
+    :param index: The index of the domain.
+    :type index: int
+    :param root: The folder to generate the repositories in.
+    :type root: str
+    """
+    org = "bench-org"
+    name = f"domain-{index}"
+    description = f"Benchmark domain {index}"
+    package = f"pythoneda.bench_org.domain_{index}"
+    context = NewDomain.context_for(org, name)
+    domain_folder = os.path.join(root, name)
+    definition_folder = os.path.join(root, f"{name}-def")
+    os.makedirs(domain_folder)
+    os.makedirs(definition_folder)
+    await Gitignore().generate(domain_folder)
+    await Gitattributes(context["def-url"], context["artifact-url"]).generate(
+        domain_folder
+    )
+    await DomainReadme(
+        org,
+        name,
+        description,
+        package,
+        context["def-org"],
+        context["url"],
+        context["def-url"],
+    ).generate(domain_folder)
+    subfolders = package.split(".")
+    for position in range(len(subfolders)):
+        relative_folder = "/".join(subfolders[: position + 1])
+        folder = os.path.join(domain_folder, relative_folder)
+        os.makedirs(folder, exist_ok=True)
+        await Init(
+            org,
+            name,
+            ".".join(subfolders[: position + 1]),
+            relative_folder,
+            datetime.datetime.now().year,
+        ).generate(folder)
+    await DefinitionReadme(
+        org,
+        name,
+        description,
+        package,
+        context["def-org"],
+        context["url"],
+        context["def-url"],
+    ).generate(definition_folder)
+    flake = DefinitionNixFlake(
+        org, name, description, package, context["url"], context["version"]
+    )
+    await TemplateExecutor.run_coroutine(flake.generate_flake(definition_folder))
+    await PyprojecttomlTemplate(flake).generate(definition_folder)
+
+
+async def measure(pipelines: int, interval: float) -> dict:
+    """
+    Runs given number of pipelines concurrently, while measuring the event-loop lag.
+    :param pipelines: The number of pipelines.
+    :type pipelines: int
+    :param interval: The time, in seconds, the probe sleeps between samples.
+    :type interval: float
+    :return: The wall time, and the mean, 95th percentile and maximum lag, in milliseconds.
+    :rtype: dict
+    """
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lags.append((loop.time() - start - interval) * 1000)
+
+    root = tempfile.mkdtemp(prefix="new-domain-lag-")
+    try:
+        task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*[scaffold(index, root) for index in range(pipelines)])
+        wall_time = time.perf_counter() - start
+        done.set()
+        await task
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    lags.sort()
+    return {
+        "wall-time": wall_time,
+        "lag-mean-ms": sum(lags) / len(lags) if lags else 0.0,
+        "lag-p95-ms": percentile(lags, 0.95),
+        "lag-max-ms": lags[-1] if lags else 0.0,
+    }
+
+
+async def benchmark(args) -> dict:
+    """
+    Runs the pipelines on the event loop, and in the pool.
+    :param args: The command-line arguments.
+    :type args: argparse.Namespace
+    :return: The results.
+    :rtype: dict
+    """
+    TemplateCompiler.configure(enabled=args.compile_templates)
+    # parse (and compile) the templates beforehand
+    await measure(1, args.interval)
+    result = {"pipelines": args.pipelines, "scenarios": {}}
+    for workers in [0, args.workers]:
+        TemplateExecutor.configure(workers)
+        name = "event-loop" if workers == 0 else f"pool-{workers}"
+        result["scenarios"][name] = await measure(args.pipelines, args.interval)
+    return result
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("-n", "--pipelines", type=int, default=20)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=0.001,
+        help="The time, in seconds, the probe sleeps between samples",
+    )
+    parser.add_argument(
+        "--compile-templates",
+        action="store_true",
+        help="Use the compiled templates",
+    )
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(benchmark(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,140 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/import_time.py
+
+This script measures how long importing the main packages takes, and how many modules they pull in.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = [
+    "pythoneda.tools.artifact.new_domain.events",
+    "pythoneda.tools.artifact.new_domain.events.infrastructure.dbus",
+    "pythoneda.tools.artifact.new_domain.application.new_domain_app",
+]
+# Modules that shouldn't be imported just to start the app
+HEAVY = ["dbus_next"]
+
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module: str) -> dict:
+    """
+    Imports given module in a fresh interpreter, and measures it.
+    :param module: The module.
+    :type module: str
+    :return: The cumulative import time, in milliseconds, the modules imported, and the heavy ones among them.
+    :rtype: dict
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    modules = {}
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+    return {
+        "ms": modules.get(module, 0) / 1000,
+        "modules": len(modules),
+        "package-modules": len(
+            [name for name in modules if name.startswith("pythoneda.tools.")]
+        ),
+        "heavy": [heavy for heavy in HEAVY if heavy in modules],
+    }
+
+
+def median(values: list) -> float:
+    """
+    Retrieves the median of given values.
+    :param values: The values.
+    :type values: list
+    :return: The median.
+    :rtype: float
+    """
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def benchmark(modules: list, repeat: int) -> dict:
+    """
+    Measures the import of given modules.
+    :param modules: The modules.
+    :type modules: list
+    :param repeat: The number of fresh interpreters per module.
+    :type repeat: int
+    :return: For each module, the median import time, and the modules it pulls in.
+    :rtype: dict
+    """
+    result = {}
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        result[module] = {**runs[-1], "ms": median([run["ms"] for run in runs])}
+    return result
+
+
+def main():
+    """
+    Runs the benchmark, and fails if any module exceeds the given limits.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "--max-ms", type=float, help="Fail if importing a module takes longer"
+    )
+    parser.add_argument(
+        "--max-modules",
+        type=int,
+        help="Fail if a module pulls in more modules of this package",
+    )
+    args = parser.parse_args()
+    results = benchmark(args.modules, args.repeat)
+    print(json.dumps(results, indent=2))
+    failures = []
+    for module, result in results.items():
+        if args.max_ms is not None and result["ms"] > args.max_ms:
+            failures.append(f"{module} took {result['ms']:.1f}ms")
+        if args.max_modules is not None and result["package-modules"] > args.max_modules:
+            failures.append(f"{module} imported {result['package-modules']} modules")
+        if result["heavy"]:
+            failures.append(f"{module} imported {', '.join(result['heavy'])}")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
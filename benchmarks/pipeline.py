@@ -0,0 +1,334 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/pipeline.py
+
+This script benchmarks whole new-domain pipelines, offline, against local stand-ins.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from standins import Standins
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = "pythoneda.tools.artifact.new_domain.application.new_domain_app"
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Retrieves a percentile of given values.
+    :param values: The values, sorted.
+    :type values: list
+    :param fraction: The percentile, between 0 and 1.
+    :type fraction: float
+    :return: The percentile.
+    :rtype: float
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def step_latencies(reports: list) -> dict:
+    """
+    Aggregates the latency of each step across the timing reports.
+    :param reports: The timing reports.
+    :type reports: list
+    :return: For each step, its count, mean, median, 95th percentile and maximum, in seconds.
+    :rtype: dict
+    """
+    samples = {}
+    for report in reports:
+        for step in report["steps"]:
+            key = f"{step['step']}.{step['event']}"
+            samples.setdefault(key, []).append(step)
+    result = {}
+    for key, steps in sorted(samples.items()):
+        elapsed = sorted([step["elapsed"] for step in steps])
+        result[key] = {
+            "count": len(elapsed),
+            "mean": sum(elapsed) / len(elapsed),
+            "p50": percentile(elapsed, 0.5),
+            "p95": percentile(elapsed, 0.95),
+            "max": elapsed[-1],
+            "subprocess": sum([step["subprocess"] for step in steps]) / len(steps),
+            "network": sum([step["network"] for step in steps]) / len(steps),
+        }
+    return result
+
+
+def run_scenario(
+    standins: Standins, name: str, domains: int, concurrency: int, appArgs: list
+) -> dict:
+    """
+    Creates given number of domains in one process, and measures it.
+    :param standins: The local stand-ins.
+    :type standins: Standins
+    :param name: The name of the scenario.
+    :type name: str
+    :param domains: The number of domains.
+    :type domains: int
+    :param concurrency: The maximum number of domains created at once.
+    :type concurrency: int
+    :param appArgs: Additional arguments for the app.
+    :type appArgs: list
+    :return: The measurements.
+    :rtype: dict
+    """
+    folder = os.path.join(standins.root, name)
+    os.makedirs(folder, exist_ok=True)
+    timing_report = os.path.join(folder, "timing.jsonl")
+    org = f"bench-{name}"
+    command = [
+        sys.executable,
+        "-m",
+        APP,
+        "-t",
+        "benchmark-token",
+        "-g",
+        "BENCHMARK",
+        "--timing-report",
+        timing_report,
+    ]
+    if domains == 1:
+        command += [
+            "-o",
+            org,
+            "-n",
+            "domain-0",
+            "-d",
+            "Benchmark domain",
+            "-p",
+            f"pythoneda.{org.replace('-', '_')}.domain_0",
+        ]
+    else:
+        manifest = os.path.join(folder, "manifest.jsonl")
+        with open(manifest, "w") as file:
+            for index in range(domains):
+                file.write(
+                    json.dumps(
+                        {
+                            "org": org,
+                            "name": f"domain-{index}",
+                            "description": "Benchmark domain",
+                            "package": f"pythoneda.{org.replace('-', '_')}.domain_{index}",
+                        }
+                    )
+                    + "\n"
+                )
+        command += ["-m", manifest, "-c", str(concurrency)]
+    command += appArgs
+    standins.calls()
+    with open(os.path.join(folder, "output.log"), "w") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command, cwd=REPO, env=standins.env(), stdout=log, stderr=subprocess.STDOUT
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+        wall_time = time.perf_counter() - start
+    reports = []
+    if os.path.exists(timing_report):
+        with open(timing_report) as file:
+            reports = [json.loads(line) for line in file if line.strip()]
+    created = [
+        report
+        for report in reports
+        if any([step["event"] == "NewDomainCreated" for step in report["steps"]])
+    ]
+    with open(os.path.join(folder, "output.log")) as log:
+        output = log.read().splitlines()
+    return {
+        "domains": domains,
+        "concurrency": concurrency,
+        "exit-code": os.waitstatus_to_exitcode(status),
+        "succeeded": len(created),
+        "wall-time": wall_time,
+        "wall-time-per-domain": wall_time / domains,
+        "peak-rss-kib": usage.ru_maxrss,
+        "subprocesses": standins.calls(),
+        "steps": step_latencies(reports),
+        "output-tail": output[-20:] if status != 0 else [],
+    }
+
+
+def commit() -> str:
+    """
+    Retrieves the commit being benchmarked.
+    :return: The commit id, or None if not available.
+    :rtype: str
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(args) -> dict:
+    """
+    Runs the scenarios.
+    :param args: The command-line arguments.
+    :type args: argparse.Namespace
+    :return: The results.
+    :rtype: dict
+    """
+    sizes = [int(size) for size in args.scenarios.split(",")]
+    result = {
+        "commit": commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "app-args": args.app_args,
+        "scenarios": {},
+    }
+    with Standins(args.root, args.github_throttle, args.push_latency) as standins:
+        result["dbus"] = standins.dbus_address is not None
+        result["push-latency"] = args.push_latency
+        for size in sizes:
+            name = "single" if size == 1 else f"batch-{size}"
+            throttled = standins.github.throttled
+            result["scenarios"][name] = run_scenario(
+                standins, name, size, args.concurrency, shlex.split(args.app_args)
+            )
+            result["scenarios"][name]["github-throttled"] = (
+                standins.github.throttled - throttled
+            )
+    return result
+
+
+def compare(baseline: dict, candidate: dict, steps: str = None) -> str:
+    """
+    Compares two results.
+    :param baseline: The results to compare against.
+    :type baseline: dict
+    :param candidate: The new results.
+    :type candidate: dict
+    :param steps: Also compare the mean latency of the steps whose name contains it, if any.
+    :type steps: str
+    :return: A table with the relative change of the main metrics.
+    :rtype: str
+    """
+    lines = [
+        f"{(baseline.get('commit') or '?')[:10]} -> {(candidate.get('commit') or '?')[:10]}"
+    ]
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name, None)
+        if old is None:
+            continue
+        lines.append(name)
+        metrics = [
+            ("wall-time", old["wall-time"], new["wall-time"]),
+            ("peak-rss-kib", old["peak-rss-kib"], new["peak-rss-kib"]),
+        ]
+        for executable in sorted(new["subprocesses"].keys()):
+            metrics.append(
+                (
+                    "pushes" if executable == "push" else f"{executable} processes",
+                    old["subprocesses"].get(executable, 0),
+                    new["subprocesses"][executable],
+                )
+            )
+        if steps:
+            for step in sorted(new["steps"].keys()):
+                if steps in step and step in old["steps"]:
+                    metrics.append(
+                        (step, old["steps"][step]["mean"], new["steps"][step]["mean"])
+                    )
+        for metric, before, after in metrics:
+            change = (after - before) / before * 100 if before else 0.0
+            lines.append(f"  {metric:<20} {before:>12.2f} {after:>12.2f} {change:>+8.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    """
+    Runs the benchmark, or compares two results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    subparsers = parser.add_subparsers(dest="command")
+    run = subparsers.add_parser("run", help="Run the scenarios")
+    run.add_argument(
+        "-s",
+        "--scenarios",
+        default="1,10,100",
+        help="Comma-separated number of domains per scenario",
+    )
+    run.add_argument("-c", "--concurrency", type=int, default=4)
+    run.add_argument("-o", "--output", help="The file to write the results to")
+    run.add_argument("-r", "--root", help="The folder to run in (kept afterwards)")
+    run.add_argument(
+        "-a", "--app-args", default="", help="Additional arguments for the app"
+    )
+    run.add_argument(
+        "-t",
+        "--github-throttle",
+        type=int,
+        default=0,
+        help="Rate-limit one of every given number of GitHub API requests",
+    )
+    run.add_argument(
+        "-l",
+        "--push-latency",
+        type=float,
+        default=0.0,
+        help="The time, in seconds, each git push takes, to simulate a remote",
+    )
+    diff = subparsers.add_parser("compare", help="Compare two results")
+    diff.add_argument("baseline")
+    diff.add_argument("candidate")
+    diff.add_argument(
+        "-s",
+        "--steps",
+        help="Also compare the mean latency of the steps whose name contains it",
+    )
+    args = parser.parse_args()
+    if args.command == "compare":
+        with open(args.baseline) as old, open(args.candidate) as new:
+            print(compare(json.load(old), json.load(new), args.steps))
+        return
+    if args.command is None:
+        args = run.parse_args([])
+    results = benchmark(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(f"{output}\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
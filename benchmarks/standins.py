@@ -0,0 +1,437 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/standins.py
+
+This file defines the local stand-ins used by the benchmarks.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import re
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Stub for nix, nix-prefetch-url and nix-prefetch-git. It logs each call,
+# writes an empty flake.lock when a lock is requested, and prints a fixed
+# hash otherwise.
+NIX_STUB = """#!{python}
+import json, os, sys
+with open(os.environ["STANDINS_CALLS"], "a") as calls:
+    calls.write("nix\\n")
+args = sys.argv[1:]
+hash = "0mdqa9w1p6cmli6976v4wi0sw9r4p5prkj7lzfd1877wk11c9c73"
+if "flake" in args and ("lock" in args or "update" in args):
+    folder = os.getcwd()
+    for arg in args:
+        if os.path.isdir(arg):
+            folder = arg
+    with open(os.path.join(folder, "flake.lock"), "w") as lock:
+        json.dump({{"nodes": {{"root": {{}}}}, "root": "root", "version": 7}}, lock)
+elif os.path.basename(sys.argv[0]) == "nix-prefetch-git":
+    print(json.dumps({{"sha256": hash}}))
+else:
+    print(hash)
+"""
+
+# Wrapper counting the git processes before running the real git. Pushes
+# are counted too, and take the given time, to simulate the handshake with
+# a remote.
+GIT_WRAPPER = """#!/bin/sh
+echo git >> "$STANDINS_CALLS"
+if [ "$1" = push ]; then
+    echo push >> "$STANDINS_CALLS"
+    sleep {push_latency}
+fi
+exec {git} "$@"
+"""
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    """
+    Handles the repository-creation requests of the fake GitHub API.
+
+    Class name: FakeGithubHandler
+
+    Responsibilities:
+        - Create a bare repository for each POST /orgs/{org}/repos or /user/repos request.
+        - Tell the login of the authenticated user.
+        - Rate-limit some requests, if asked to, the way GitHub does.
+
+    Collaborators:
+        - FakeGithub
+    """
+
+    protocol_version = "HTTP/1.1"
+    login = "bench-user"
+
+    def do_GET(self):
+        """
+        Retrieves the authenticated user.
+        """
+        if self.path != "/user":
+            return self.reply(404, {"message": "Not Found"})
+        self.reply(200, {"login": self.login})
+
+    def do_POST(self):
+        """
+        Creates a repository.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self.server.lock:
+            self.server.requests += 1
+            count = self.server.requests
+        if self.server.throttle and count % self.server.throttle == 0:
+            self.server.throttled += 1
+            # alternate between primary and secondary rate limits
+            if count // self.server.throttle % 2:
+                return self.reply(
+                    429,
+                    {"message": "API rate limit exceeded"},
+                    {"Retry-After": "1"},
+                )
+            return self.reply(
+                403,
+                {"message": "You have exceeded a secondary rate limit"},
+                {
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(int(time.time()) + 1),
+                },
+            )
+        match = re.fullmatch(r"/orgs/([^/]+)/repos", self.path)
+        if self.path == "/user/repos" and "name" in body:
+            org = self.login
+        elif match is None or "name" not in body:
+            return self.reply(404, {"message": "Not Found"})
+        else:
+            org = match.group(1)
+        folder = os.path.join(self.server.remotes, org, body["name"])
+        if os.path.exists(folder):
+            return self.reply(
+                422, {"message": "Repository creation failed: name already exists"}
+            )
+        os.makedirs(os.path.dirname(folder), exist_ok=True)
+        subprocess.run(
+            ["git", "init", "--quiet", "--bare", "--initial-branch=main", folder],
+            check=True,
+        )
+        self.reply(
+            201,
+            {
+                "name": body["name"],
+                "full_name": f"{org}/{body['name']}",
+                "clone_url": f"file://{folder}",
+            },
+        )
+
+    def reply(self, status: int, body: dict, headers: dict = None):
+        """
+        Sends a JSON response.
+        :param status: The HTTP status.
+        :type status: int
+        :param body: The response.
+        :type body: dict
+        :param headers: Additional headers.
+        :type headers: dict
+        """
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """
+        Keeps the benchmark output clean.
+        """
+        pass
+
+
+class FakeGithub:
+    """
+    A local stand-in for the repository-creation endpoint of the GitHub API.
+
+    Class name: FakeGithub
+
+    Responsibilities:
+        - Serve the fake API in a background thread.
+
+    Collaborators:
+        - FakeGithubHandler
+    """
+
+    def __init__(self, remotes: str, throttle: int = 0):
+        """
+        Creates a new FakeGithub instance.
+        :param remotes: The folder of the bare repositories.
+        :type remotes: str
+        :param throttle: Rate-limit one of every given number of requests (0 to never do it).
+        :type throttle: int
+        """
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGithubHandler)
+        self._server.remotes = remotes
+        self._server.throttle = throttle
+        self._server.requests = 0
+        self._server.throttled = 0
+        self._server.lock = threading.Lock()
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """
+        Retrieves the url of the fake API.
+        :return: Such url.
+        :rtype: str
+        """
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def throttled(self) -> int:
+        """
+        Retrieves the number of requests rate-limited so far.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._server.throttled
+
+    def start(self):
+        """
+        Starts serving requests.
+        """
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops serving requests.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class Standins:
+    """
+    A self-contained, offline environment to run new-domain pipelines in.
+
+    Class name: Standins
+
+    Responsibilities:
+        - Provide bare repositories as remotes, a fake GitHub API, a stub nix and,
+          if dbus-daemon is available, a private D-Bus session bus.
+        - Count the git and nix processes spawned, and the pushes.
+        - Simulate the latency of pushing to a remote, if asked to.
+
+    Collaborators:
+        - FakeGithub
+    """
+
+    def __init__(
+        self, root: str = None, githubThrottle: int = 0, pushLatency: float = 0.0
+    ):
+        """
+        Creates a new Standins instance.
+        :param root: The folder to create everything in, or None to use a temporary one.
+        :type root: str
+        :param githubThrottle: Rate-limit one of every given number of GitHub API requests (0 to never do it).
+        :type githubThrottle: int
+        :param pushLatency: The time, in seconds, each git push takes before running.
+        :type pushLatency: float
+        """
+        self._own_root = root is None
+        self._root = root or tempfile.mkdtemp(prefix="new-domain-bench-")
+        self._remotes = os.path.join(self._root, "remotes")
+        self._bin = os.path.join(self._root, "bin")
+        self._home = os.path.join(self._root, "home")
+        self._calls = os.path.join(self._root, "calls")
+        self._github = FakeGithub(self._remotes, githubThrottle)
+        self._push_latency = pushLatency
+        self._dbus = None
+        self._dbus_address = None
+
+    @property
+    def root(self) -> str:
+        """
+        Retrieves the root folder.
+        :return: Such folder.
+        :rtype: str
+        """
+        return self._root
+
+    @property
+    def git_url(self) -> str:
+        """
+        Retrieves the base url of the bare repositories.
+        :return: Such url.
+        :rtype: str
+        """
+        return f"file://{self._remotes}"
+
+    @property
+    def github_api_url(self) -> str:
+        """
+        Retrieves the url of the fake GitHub API.
+        :return: Such url.
+        :rtype: str
+        """
+        return self._github.url
+
+    @property
+    def github(self) -> FakeGithub:
+        """
+        Retrieves the fake GitHub API.
+        :return: Such server.
+        :rtype: FakeGithub
+        """
+        return self._github
+
+    @property
+    def dbus_address(self) -> str:
+        """
+        Retrieves the address of the private D-Bus session bus.
+        :return: Such address, or None if dbus-daemon is not available.
+        :rtype: str
+        """
+        return self._dbus_address
+
+    def _install(self, name: str, content: str):
+        """
+        Installs an executable in the bin folder.
+        :param name: The name of the executable.
+        :type name: str
+        :param content: Its content.
+        :type content: str
+        """
+        path = os.path.join(self._bin, name)
+        with open(path, "w") as file:
+            file.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    def start(self):
+        """
+        Sets up the environment.
+        """
+        for folder in [self._remotes, self._bin, self._home]:
+            os.makedirs(folder, exist_ok=True)
+        open(self._calls, "w").close()
+        nix = NIX_STUB.format(python=sys.executable)
+        for name in ["nix", "nix-prefetch-url", "nix-prefetch-git"]:
+            self._install(name, nix)
+        self._install(
+            "git",
+            GIT_WRAPPER.format(
+                git=shutil.which("git"), push_latency=f"{self._push_latency:.3f}"
+            ),
+        )
+        with open(os.path.join(self._home, ".gitconfig"), "w") as file:
+            file.write(
+                "[user]\n\tname = Benchmark\n\temail = benchmark@example.com\n"
+                "[init]\n\tdefaultBranch = main\n"
+                "[commit]\n\tgpgSign = false\n"
+                "[tag]\n\tgpgSign = false\n"
+            )
+        self._github.start()
+        if shutil.which("dbus-daemon"):
+            self._dbus = subprocess.Popen(
+                ["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+            self._dbus_address = self._dbus.stdout.readline().strip()
+
+    def stop(self):
+        """
+        Tears the environment down.
+        """
+        self._github.stop()
+        if self._dbus is not None:
+            self._dbus.terminate()
+            self._dbus.wait()
+        if self._own_root:
+            shutil.rmtree(self._root, ignore_errors=True)
+
+    def env(self) -> dict:
+        """
+        Retrieves the environment variables for processes running in the stand-ins.
+        :return: Such variables.
+        :rtype: dict
+        """
+        result = dict(os.environ)
+        result.update(
+            {
+                "PATH": f"{self._bin}{os.pathsep}{os.environ.get('PATH', '')}",
+                "HOME": self._home,
+                "GIT_CONFIG_GLOBAL": os.path.join(self._home, ".gitconfig"),
+                "XDG_CACHE_HOME": os.path.join(self._home, ".cache"),
+                "STANDINS_CALLS": self._calls,
+                "GITHUB_API_URL": self.github_api_url,
+                "PYTHONEDA_NEW_DOMAIN_GIT_URL": self.git_url,
+                "PYTHONEDA_NEW_DOMAIN_GITHUB_MIN_INTERVAL": "0",
+                "PYTHONEDA_NEW_DOMAIN_WORKSPACES": os.path.join(self._root, "workspaces"),
+            }
+        )
+        if self._dbus_address:
+            result["DBUS_SESSION_BUS_ADDRESS"] = self._dbus_address
+        return result
+
+    def calls(self) -> dict:
+        """
+        Retrieves the number of git and nix processes spawned, and of pushes, so far, and resets the counters.
+        :return: A dictionary with the number of processes per executable, and the number of pushes.
+        :rtype: dict
+        """
+        result = {"git": 0, "nix": 0, "push": 0}
+        with open(self._calls) as file:
+            for line in file:
+                name = line.strip()
+                result[name] = result.get(name, 0) + 1
+        open(self._calls, "w").close()
+        return result
+
+    def __enter__(self):
+        """
+        Sets up the environment.
+        :return: This instance.
+        :rtype: Standins
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """
+        Tears the environment down.
+        """
+        self.stop()
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,111 @@
+# vim: set fileencoding=utf-8
+"""
+benchmarks/template_render.py
+
+This script compares rendering the scaffolding templates with StringTemplate and with their compiled functions.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+from pythoneda.tools.artifact.new_domain import ScaffoldPreview, TemplateCompiler
+
+
+def render_all(domains: int) -> list:
+    """
+    Renders the files of given number of domains.
+    :param domains: The number of domains.
+    :type domains: int
+    :return: The files of each domain.
+    :rtype: list
+    """
+    return [
+        ScaffoldPreview.render(
+            f"bench-org-{index % 7}",
+            f"domain-{index}",
+            f"Benchmark domain {index}",
+            f"pythoneda.bench_org_{index % 7}.domain_{index}",
+        )
+        for index in range(domains)
+    ]
+
+
+def measure(domains: int, repeat: int, compiled: bool) -> dict:
+    """
+    Renders the files of given number of domains several times, and measures it.
+    :param domains: The number of domains.
+    :type domains: int
+    :param repeat: The number of rounds.
+    :type repeat: int
+    :param compiled: Whether to use the compiled templates.
+    :type compiled: bool
+    :return: The median time per domain, in milliseconds, and the files of the last round.
+    :rtype: dict
+    """
+    TemplateCompiler.configure(enabled=compiled)
+    # the first round parses the groups and compiles the templates
+    files = render_all(domains)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        files = render_all(domains)
+        samples.append((time.perf_counter() - start) * 1000 / domains)
+    return {"ms-per-domain": statistics.median(samples), "files": files}
+
+
+def main():
+    """
+    Runs the benchmark, and fails if both ways render different files.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    parser.add_argument("-n", "--domains", type=int, default=100)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+    interpreted = measure(args.domains, args.repeat, False)
+    compiled = measure(args.domains, args.repeat, True)
+    print(
+        json.dumps(
+            {
+                "domains": args.domains,
+                "interpreted-ms-per-domain": interpreted["ms-per-domain"],
+                "compiled-ms-per-domain": compiled["ms-per-domain"],
+                "speedup": interpreted["ms-per-domain"] / compiled["ms-per-domain"],
+                "compiler": TemplateCompiler.stats(),
+            },
+            indent=2,
+        )
+    )
+    if compiled["files"] != interpreted["files"]:
+        sys.exit("compiled templates render different files")
+
+
+if __name__ == "__main__":
+    main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
+from .bulk_renderer import BulkRenderer
 from .clone_definition_repository_locally import CloneDefinitionRepositoryLocally
 from .clone_domain_repository_locally import CloneDomainRepositoryLocally
 from .clone_repository_locally import CloneRepositoryLocally
@@ -29,13 +30,31 @@ from .create_domain_repository_gitattributes import CreateDomainRepositoryGitatt
 from .create_domain_repository_gitignore import CreateDomainRepositoryGitignore
 from .create_domain_repository_readme import CreateDomainRepositoryReadme
 from .new_file_from_template import NewFileFromTemplate
+from .string_template_group_cache import StringTemplateGroupCache
+from .template_compiler import TemplateCompiler
+from .template_executor import TemplateExecutor
 from .gitattributes import Gitattributes
 from .gitignore import Gitignore
+from .initial_commit import InitialCommit
 from .readme import Readme
+from .scaffold_preview import ScaffoldPreview
+from .skeleton_cache import SkeletonCache
+from .staging_area import StagingArea
+from .step_timer import StepTimer
+from .workspace_manager import WorkspaceManager
 from .definition_nix_flake import DefinitionNixFlake
 from .definition_readme import DefinitionReadme
 from .domain_readme import DomainReadme
+from .event_log import EventLog
+from .flake_lock_cache import FlakeLockCache
+from .git_command import GitCommand, GitCommandFailed
+from .github_client import GithubClient, GithubClientPool
+from .github_rate_limiter import GithubRateLimiter
+from .nar_hash import NarHash
 from .new_domain import NewDomain
+from .new_domain_batch import NewDomainBatch
+from .new_domain_daemon import NewDomainDaemon
+from .push_repository import PushRepository
 from .pyprojecttoml_template import PyprojecttomlTemplate
 
 
@@ -21,12 +21,32 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import asyncio
 from pythoneda.shared.application import enable, PythonEDA
-from pythoneda.tools.artifact.new_domain.events import NewDomainRequested
+from pythoneda.tools.artifact.new_domain import (
+    EventLog,
+    GithubClientPool,
+    GithubRateLimiter,
+    InitialCommit,
+    NewDomainBatch,
+    NewDomainDaemon,
+    SkeletonCache,
+    StagingArea,
+    TemplateCompiler,
+    TemplateExecutor,
+    WorkspaceManager,
+)
+from pythoneda.tools.artifact.new_domain.events import (
+    NewDomainRequested,
+    PipelineGraph,
+)
 from pythoneda.tools.artifact.new_domain.infrastructure.cli import (
     NewDomainOptionsCli,
 )
+from pythoneda.tools.artifact.new_domain.infrastructure.server import (
+    NewDomainSocketServer,
+)
 from pythoneda.shared.infrastructure.dbus import DbusSignalEmitter, DbusSignalListener
-from typing import Dict
+import signal
+from typing import Dict, List
 
 
 @enable(NewDomainOptionsCli)
@@ -64,23 +84,152 @@ class NewDomainApp(PythonEDA):
 
         super().__init__(name, banner, __file__)
         self.accept_one_shot(True)
+        self._daemon = None
+        # independent steps run concurrently, each in a branch of its own
+        PipelineGraph.configure(self.accept)
 
-    async def accept_options(self, options: Dict):
+    @classmethod
+    def new_domain_requested_for(cls, options: Dict) -> NewDomainRequested:
         """
-        Receives the options for creating a new domain.
+        Builds the NewDomainRequested event for given options.
         :param options: The options.
         :type options: Dict
+        :return: The event.
+        :rtype: pythoneda.tools.artifact.new_domain.events.NewDomainRequested
         """
-        new_domain_requested = NewDomainRequested(
+        context = {
+            "clone-mode": "init" if options.get("local-init", False) else "clone",
+            "sha256-mode": "local" if options.get("local-sha256", False) else "remote",
+            "verify-sha256": options.get("verify-sha256", False),
+            "refresh-flake-lock": options.get("refresh-flake-lock", False),
+            "speculative-definition": options.get("speculative-definition", True),
+        }
+        return NewDomainRequested(
             options.get("org", None),
             options.get("name", None),
             options.get("description", None),
             options.get("package", None),
             options.get("github-token", None),
             options.get("gpg-key-id", None),
+            context,
         )
+
+    async def accept(self, event):
+        """
+        Accepts an event. In daemon mode, NewDomainRequested events are queued
+        instead of being processed right away.
+        :param event: The event.
+        :type event: pythoneda.shared.Event
+        """
+        if self._daemon is not None and isinstance(event, NewDomainRequested):
+            if not await self._daemon.submit(event):
+                NewDomainApp.logger().warning(
+                    f"Rejected {event.org}/{event.name}: the queue is full"
+                )
+            return None
+        return await super().accept(event)
+
+    async def accept_options(self, options: Dict):
+        """
+        Receives the options for creating a new domain.
+        :param options: The options.
+        :type options: Dict
+        """
+        new_domain_requested = self.__class__.new_domain_requested_for(options)
         if new_domain_requested:
             await self.accept(new_domain_requested)
+            NewDomainApp.logger().info(f"GitHub API: {GithubClientPool.stats()}")
+            NewDomainApp.logger().info(f"Skeleton cache: {SkeletonCache.stats()}")
+            NewDomainApp.logger().info(f"Initial commits: {InitialCommit.stats()}")
+            NewDomainApp.logger().info(f"Staging: {StagingArea.stats()}")
+            NewDomainApp.logger().info(f"Workspaces: {WorkspaceManager.stats()}")
+
+    async def accept_resume(self, runId: str, githubToken: str):
+        """
+        Resumes a failed run from its last successful steps.
+        :param runId: The id of the run.
+        :type runId: str
+        :param githubToken: The github token.
+        :type githubToken: str
+        """
+        events = EventLog.resume(runId, githubToken)
+        for event in await PipelineGraph.fan_out(events):
+            await self.accept(event)
+        # the steps triggered before, but never completed
+        for event in await PipelineGraph.fan_out(PipelineGraph.frontier(events[0])):
+            await self.accept(event)
+
+    async def accept_manifest(self, entries: List[Dict], concurrency: int = 4) -> str:
+        """
+        Creates the domains described in a manifest.
+        :param entries: The options of each domain.
+        :type entries: List[Dict]
+        :param concurrency: The maximum number of domains created at once.
+        :type concurrency: int
+        :return: A summary of the outcome of each domain.
+        :rtype: str
+        """
+        events = [self.__class__.new_domain_requested_for(entry) for entry in entries]
+        results = await NewDomainBatch(self.accept, concurrency).run(events)
+        NewDomainApp.logger().info(f"GitHub rate limits: {GithubRateLimiter.stats()}")
+        NewDomainApp.logger().info(f"GitHub API: {GithubClientPool.stats()}")
+        NewDomainApp.logger().info(f"Template rendering: {TemplateExecutor.stats()}")
+        NewDomainApp.logger().info(f"Skeleton cache: {SkeletonCache.stats()}")
+        NewDomainApp.logger().info(f"Initial commits: {InitialCommit.stats()}")
+        NewDomainApp.logger().info(f"Staging: {StagingArea.stats()}")
+        NewDomainApp.logger().info(f"Workspaces: {WorkspaceManager.stats()}")
+        if TemplateCompiler.enabled():
+            NewDomainApp.logger().info(f"Compiled templates: {TemplateCompiler.stats()}")
+        return NewDomainBatch.summary(results)
+
+    async def accept_daemon(
+        self,
+        defaults: Dict,
+        socketPath: str = None,
+        workers: int = 4,
+        queueSize: int = 64,
+        backpressure: str = "wait",
+    ):
+        """
+        Keeps running, creating the domains requested through the socket
+        (or any other port), until interrupted.
+        :param defaults: The options to use when a request doesn't provide them.
+        :type defaults: Dict
+        :param socketPath: The path of the socket.
+        :type socketPath: str
+        :param workers: The maximum number of domains created at once.
+        :type workers: int
+        :param queueSize: The maximum number of domains waiting to be created.
+        :type queueSize: int
+        :param backpressure: What to do when the queue is full: "wait" or "reject".
+        :type backpressure: str
+        """
+        self._daemon = NewDomainDaemon(
+            super().accept, workers, queueSize, backpressure
+        )
+        server = NewDomainSocketServer(
+            self._daemon, self.__class__.new_domain_requested_for, socketPath, defaults
+        )
+        # fails if another daemon is listening already
+        await server.start()
+        self._daemon.start()
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            loop.add_signal_handler(signum, stopped.set)
+        NewDomainApp.logger().info(f"Accepting requests on {server.path}")
+        try:
+            await stopped.wait()
+        finally:
+            for signum in [signal.SIGINT, signal.SIGTERM]:
+                loop.remove_signal_handler(signum)
+            await server.stop()
+            NewDomainApp.logger().info(
+                f"Finishing {self._daemon.stats()['queued']} queued domains"
+            )
+            await self._daemon.stop()
+            NewDomainApp.logger().info(f"Daemon stats: {self._daemon.stats()}")
+            self._daemon = None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,318 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/bulk_renderer.py
+
+This file defines the BulkRenderer class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from concurrent.futures import as_completed, ProcessPoolExecutor
+import datetime
+from .definition_nix_flake import DefinitionNixFlake
+from .definition_readme import DefinitionReadme
+from .domain_readme import DomainReadme
+from .gitattributes import Gitattributes
+from .gitignore import Gitignore
+from .init import Init
+import multiprocessing
+from .new_domain import NewDomain
+from .new_file_from_template import NewFileFromTemplate
+import os
+from pathlib import Path
+from pythoneda.shared import BaseObject
+from .pyprojecttoml_template import PyprojecttomlTemplate
+from .string_template_group_cache import StringTemplateGroupCache
+from .template_compiler import TemplateCompiler
+import time
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Tuple
+
+
+def _pyprojecttoml_template(
+    org: str, name: str, description: str, package: str, url: str, version: str
+) -> PyprojecttomlTemplate:
+    """
+    Creates the pyprojecttoml.template file of a definition repository, along with its flake.
+    :param org: The organization.
+    :type org: str
+    :param name: The name of the domain.
+    :type name: str
+    :param description: A brief description of the domain.
+    :type description: str
+    :param package: The Python package.
+    :type package: str
+    :param url: The url of the domain repository.
+    :type url: str
+    :param version: The version.
+    :type version: str
+    :return: The file.
+    :rtype: pythoneda.tools.artifact.new_domain.PyprojecttomlTemplate
+    """
+    return PyprojecttomlTemplate(
+        DefinitionNixFlake(org, name, description, package, url, version)
+    )
+
+
+def _initialize(templateFolder: str, compileTemplates: bool):
+    """
+    Prepares a worker process: parses every template group once.
+    :param templateFolder: The folder with the templates.
+    :type templateFolder: str
+    :param compileTemplates: Whether templates get compiled.
+    :type compileTemplates: bool
+    """
+    TemplateCompiler.configure(enabled=compileTemplates)
+    StringTemplateGroupCache.preload(templateFolder)
+
+
+def _render(specs: List[Tuple[str, Callable, tuple]]) -> List[Dict]:
+    """
+    Renders and writes given files, in a worker process.
+    :param specs: The output path, the factory and its arguments, of each file.
+    :type specs: List[Tuple[str, Callable, tuple]]
+    :return: The outcome of each file.
+    :rtype: List[Dict]
+    """
+    result = []
+    for path, factory, args in specs:
+        start = time.perf_counter()
+        outcome = {"path": path, "changed": False, "error": None}
+        try:
+            contents = factory(*args).render()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            outcome["changed"] = NewFileFromTemplate.write_if_changed(path, contents)
+        except Exception as e:
+            outcome["error"] = str(e)
+        outcome["elapsed"] = time.perf_counter() - start
+        outcome["pid"] = os.getpid()
+        result.append(outcome)
+    return result
+
+
+class BulkRenderer(BaseObject):
+    """
+    Renders the files of many domains at once, over a pool of processes.
+
+    Class name: BulkRenderer
+
+    Responsibilities:
+        - Describe the files of a domain as picklable specs: output path, factory and arguments.
+        - Keep a pool of worker processes, each one with the template groups already parsed.
+        - Fan the specs out over the pool, in chunks, and stream each file back once written.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewFileFromTemplate: Renders each file.
+        - pythoneda.tools.artifact.new_domain.StringTemplateGroupCache: Holds the parsed groups of each worker.
+        - pythoneda.tools.artifact.new_domain.TemplateCompiler: Compiles the templates of each worker, if enabled.
+    """
+
+    def __init__(
+        self, processes: int = None, chunkSize: int = 16, compileTemplates: bool = None
+    ):
+        """
+        Creates a new BulkRenderer instance.
+        :param processes: The number of worker processes (the number of CPUs by default).
+        :type processes: int
+        :param chunkSize: The number of files sent to a worker at once.
+        :type chunkSize: int
+        :param compileTemplates: Whether workers compile the templates (as configured in TemplateCompiler, by default).
+        :type compileTemplates: bool
+        """
+        super().__init__()
+        self._processes = max(1, processes or os.cpu_count() or 1)
+        self._chunk_size = max(1, chunkSize)
+        self._compile_templates = (
+            compileTemplates
+            if compileTemplates is not None
+            else TemplateCompiler.enabled()
+        )
+        self._executor = None
+
+    @property
+    def processes(self) -> int:
+        """
+        Retrieves the number of worker processes.
+        :return: Such number.
+        :rtype: int
+        """
+        return self._processes
+
+    @classmethod
+    def specs_for(
+        cls,
+        org: str,
+        name: str,
+        description: str,
+        package: str,
+        domainFolder: str,
+        definitionFolder: str,
+    ) -> List[Tuple[str, Callable, tuple]]:
+        """
+        Describes the files of both repositories of a domain.
+        flake.lock is not included, since resolving it requires nix.
+        :param org: The organization.
+        :type org: str
+        :param name: The name of the domain.
+        :type name: str
+        :param description: A brief description of the domain.
+        :type description: str
+        :param package: The Python package.
+        :type package: str
+        :param domainFolder: The folder of the domain repository.
+        :type domainFolder: str
+        :param definitionFolder: The folder of the definition repository.
+        :type definitionFolder: str
+        :return: The output path, the factory and its arguments, of each file.
+        :rtype: List[Tuple[str, Callable, tuple]]
+        """
+        context = NewDomain.context_for(org, name)
+        readme = (
+            org,
+            name,
+            description,
+            package,
+            context["def-org"],
+            context["url"],
+            context["def-url"],
+        )
+        flake = (org, name, description, package, context["url"], context["version"])
+        result = [
+            (os.path.join(domainFolder, ".gitignore"), Gitignore, ()),
+            (
+                os.path.join(domainFolder, ".gitattributes"),
+                Gitattributes,
+                (context["def-url"], context["artifact-url"]),
+            ),
+            (os.path.join(domainFolder, "README.md"), DomainReadme, readme),
+        ]
+        year = datetime.datetime.now().year
+        subfolders = package.split(".")
+        for index in range(len(subfolders)):
+            relative_folder = "/".join(subfolders[: index + 1])
+            result.append(
+                (
+                    os.path.join(domainFolder, relative_folder, "__init__.py"),
+                    Init,
+                    (
+                        org,
+                        name,
+                        ".".join(subfolders[: index + 1]),
+                        relative_folder,
+                        year,
+                    ),
+                )
+            )
+        result += [
+            (os.path.join(definitionFolder, "README.md"), DefinitionReadme, readme),
+            (os.path.join(definitionFolder, "flake.nix"), DefinitionNixFlake, flake),
+            (
+                os.path.join(definitionFolder, "pyprojecttoml.template"),
+                _pyprojecttoml_template,
+                flake,
+            ),
+        ]
+        return result
+
+    def start(self):
+        """
+        Starts the worker processes.
+        """
+        if self._executor is not None:
+            return
+        # spawned workers don't inherit the threads or locks of this process
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize,
+            initargs=(
+                str(Path(NewFileFromTemplate.templates_folder()) / "pythoneda"),
+                self._compile_templates,
+            ),
+        )
+
+    def stop(self):
+        """
+        Stops the worker processes, once they finish their work.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _submit(self, specs: List[Tuple[str, Callable, tuple]]) -> List:
+        """
+        Sends given specs to the workers, in chunks.
+        :param specs: The output path, the factory and its arguments, of each file.
+        :type specs: List[Tuple[str, Callable, tuple]]
+        :return: The future of each chunk.
+        :rtype: List[concurrent.futures.Future]
+        """
+        self.start()
+        return [
+            self._executor.submit(_render, specs[index : index + self._chunk_size])
+            for index in range(0, len(specs), self._chunk_size)
+        ]
+
+    def render(self, specs: List[Tuple[str, Callable, tuple]]) -> Iterator[Dict]:
+        """
+        Renders and writes given files, yielding each one as soon as it's written.
+        :param specs: The output path, the factory and its arguments, of each file.
+        :type specs: List[Tuple[str, Callable, tuple]]
+        :return: The path of each file, whether it was written, the error if it failed, the time it took and the worker.
+        :rtype: Iterator[Dict]
+        """
+        for future in as_completed(self._submit(specs)):
+            for outcome in future.result():
+                yield outcome
+
+    async def stream(
+        self, specs: List[Tuple[str, Callable, tuple]]
+    ) -> AsyncIterator[Dict]:
+        """
+        Renders and writes given files without blocking the event loop,
+        yielding each one as soon as it's written.
+        :param specs: The output path, the factory and its arguments, of each file.
+        :type specs: List[Tuple[str, Callable, tuple]]
+        :return: The path of each file, whether it was written, the error if it failed, the time it took and the worker.
+        :rtype: AsyncIterator[Dict]
+        """
+        futures = [asyncio.wrap_future(future) for future in self._submit(specs)]
+        for future in asyncio.as_completed(futures):
+            for outcome in await future:
+                yield outcome
+
+    def __enter__(self):
+        """
+        Starts the worker processes.
+        :return: This instance.
+        :rtype: pythoneda.tools.artifact.new_domain.BulkRenderer
+        """
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """
+        Stops the worker processes.
+        """
+        self.stop()
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -20,8 +20,9 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .clone_repository_locally import CloneRepositoryLocally
+import os
 from pythoneda.shared import listen
-from pythoneda.shared.git import GitBranch
+from .step_timer import StepTimer
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryCloned,
     DefinitionRepositoryCloneRequested,
@@ -64,6 +65,7 @@ class CloneDefinitionRepositoryLocally(CloneRepositoryLocally):
 
     @classmethod
     @listen(DefinitionRepositoryCloneRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryCloneRequested(
         cls, event: DefinitionRepositoryCloneRequested
     ) -> DefinitionRepositoryCloned:
@@ -74,9 +76,12 @@ class CloneDefinitionRepositoryLocally(CloneRepositoryLocally):
         :return: The event representing the repository has been clone locally.
         :rtype: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryCloned
         """
-        repo_folder = await cls.clone(event.context["def-url"], event.name)
-        await GitBranch(repo_folder).branch("main")
+        # A repository we've just created is empty: no need to clone it
+        local_init = event.context.get("clone-mode", "clone") == "init"
+        empty = local_init and event.context.get("def-repo-created", False)
+        repo_folder = await cls.checkout(event.context["def-url"], event.name, empty)
         event.context["def-repo-folder"] = repo_folder
+        event.context.setdefault("workspaces", []).append(os.path.dirname(repo_folder))
         return DefinitionRepositoryCloned(
             event.org,
             event.name,
@@ -20,14 +20,15 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import abc
-import atexit
 import os
 from pythoneda.shared import EventListener, listen
 from pythoneda.shared.git import (
+    GitBranch,
     GitClone,
 )
-import shutil
-import tempfile
+from .git_command import GitCommand
+from .step_timer import StepTimer
+from .workspace_manager import WorkspaceManager
 from typing import List
 
 
@@ -55,7 +56,7 @@ class CloneRepositoryLocally(EventListener, abc.ABC):
     @classmethod
     async def clone(cls, url: str, name: str) -> str:
         """
-        Clones given repository in a temporary folder.
+        Clones given repository in a new workspace.
         :param url: The url of the repository.
         :type url: str
         :param name: The repository name.
@@ -63,19 +64,70 @@ class CloneRepositoryLocally(EventListener, abc.ABC):
         :return: The folder with the cloned repository.
         :rtype: str
         """
-        temp_dir = tempfile.mkdtemp()
-        atexit.register(lambda: cleanup_temp_dir(temp_dir))
-        repo = await GitClone(temp_dir).clone(url, name)
-        return os.path.join(temp_dir, name)
+        workspace = WorkspaceManager.lease()
+        async with StepTimer.span("network"):
+            repo = await GitClone(workspace).clone(url, name)
+        return os.path.join(workspace, name)
 
+    @classmethod
+    async def init(cls, url: str, name: str, branch: str = "main") -> str:
+        """
+        Initializes a local repository for given, empty, remote repository.
+        :param url: The url of the repository.
+        :type url: str
+        :param name: The repository name.
+        :type name: str
+        :param branch: The initial branch.
+        :type branch: str
+        :return: The folder with the new repository.
+        :rtype: str
+        """
+        workspace = WorkspaceManager.lease()
+        repo_folder = os.path.join(workspace, name)
+        os.mkdir(repo_folder)
+        git = GitCommand(repo_folder)
+        await git.run("init", "--quiet", f"--initial-branch={branch}")
+        await git.run("remote", "add", "origin", url)
+        return repo_folder
 
-def cleanup_temp_dir(folder: str):
-    """
-    Exit hook to delete given folder.
-    :param folder: The folder to delete.
-    :type folder: str
-    """
-    shutil.rmtree(folder)
+    @classmethod
+    async def is_empty(cls, url: str) -> bool:
+        """
+        Checks whether given remote repository has no branches yet.
+        :param url: The url of the repository.
+        :type url: str
+        :return: True if the repository has no branches.
+        :rtype: bool
+        """
+        async with StepTimer.span("network"):
+            heads = await GitCommand(os.getcwd()).run("ls-remote", "--heads", url)
+        return heads.strip() == ""
+
+    @classmethod
+    async def checkout(
+        cls, url: str, name: str, empty: bool, branch: str = "main"
+    ) -> str:
+        """
+        Retrieves a local working tree for given repository.
+        If the remote repository is believed to be empty, and has no branches
+        indeed, it's initialized locally; otherwise, it's cloned.
+        :param url: The url of the repository.
+        :type url: str
+        :param name: The repository name.
+        :type name: str
+        :param empty: Whether the remote repository is believed to be empty.
+        :type empty: bool
+        :param branch: The branch to work on.
+        :type branch: str
+        :return: The folder with the repository.
+        :rtype: str
+        """
+        if empty and await cls.is_empty(url):
+            return await cls.init(url, name, branch)
+        repo_folder = await cls.clone(url, name)
+        async with StepTimer.span("subprocess"):
+            await GitBranch(repo_folder).branch(branch)
+        return repo_folder
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -19,8 +19,12 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .initial_commit import InitialCommit
+import os
 from pythoneda.shared import EventListener, listen
+from .step_timer import StepTimer
 from pythoneda.shared.git import GitCommit
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryChangesCommitted,
     DefinitionRepositoryCommitRequested,
@@ -38,6 +42,7 @@ class CommitDefinitionRepository(EventListener):
         - Know the steps required to create the commit in the definition repository.
 
     Collaborators:
+        - pythoneda.tools.artifact.new_domain.InitialCommit: Writes the commit directly, when possible.
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryChangesCommitted
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryCommitRequested
     """
@@ -64,6 +69,7 @@ class CommitDefinitionRepository(EventListener):
 
     @classmethod
     @listen(DefinitionRepositoryCommitRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryCommitRequested(
         cls, event: DefinitionRepositoryCommitRequested
     ) -> DefinitionRepositoryChangesCommitted:
@@ -71,12 +77,25 @@ class CommitDefinitionRepository(EventListener):
         Commits the changes in the definition repository.
         :param event: The trigger event.
         :type event: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryCommitRequested
-        :return: The event representing the commit has been created.
+        :return: The event representing the commit has been created, or None if there's nothing to tag and push.
         :rtype: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryChangesCommitted
         """
         repo_folder = event.context["def-repo-folder"]
         version = event.context["version"]
-        await GitCommit(repo_folder).commit("Initial commit", False)
+        staging_area = StagingArea.for_repository(repo_folder)
+        event.context.setdefault("changed-files", {})["definition"] = staging_area.paths
+        if await InitialCommit.commit(staging_area, "Initial commit"):
+            cls.logger().debug(f"Wrote the initial commit of {repo_folder} directly")
+        elif await staging_area.flush() > 0:
+            async with StepTimer.span("subprocess"):
+                await GitCommit(repo_folder).commit("Initial commit", False)
+        elif InitialCommit.unborn_branch(os.path.join(repo_folder, ".git")):
+            # tagging and pushing an unborn branch would fail
+            cls.logger().error(f"Nothing to commit in {repo_folder}, stopping")
+            return None
+        else:
+            # every generated file was already up to date
+            cls.logger().info(f"Nothing to commit in {repo_folder}")
         return DefinitionRepositoryChangesCommitted(
             event.org,
             event.name,
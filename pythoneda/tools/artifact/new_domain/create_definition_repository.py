@@ -19,8 +19,9 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .github_client import GithubClientPool
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git.github import Repository
+from .step_timer import StepTimer
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryCreated,
     DefinitionRepositoryRequested,
@@ -40,6 +41,7 @@ class CreateDefinitionRepository(EventListener):
     Collaborators:
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryCreated
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryRequested
+        - pythoneda.tools.artifact.new_domain.GithubClientPool: Provides the GitHub client.
     """
 
     _token = None
@@ -64,6 +66,7 @@ class CreateDefinitionRepository(EventListener):
 
     @classmethod
     @listen(DefinitionRepositoryRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryRequested(
         cls, event: DefinitionRepositoryRequested
     ) -> DefinitionRepositoryCreated:
@@ -74,8 +77,11 @@ class CreateDefinitionRepository(EventListener):
         :return: The event representing the definition repository has been created, or None if the process failed.
         :rtype: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryCreated
         """
-        r = Repository(event.github_token)
-        response = await r.create(event.context["def-org"], event.name)
+        response = await GithubClientPool.client_for(
+            event.github_token
+        ).create_repository(event.context["def-org"], event.name)
+        # If it already existed, it might not be empty
+        event.context["def-repo-created"] = not response.get("__error__")
         return (
             DefinitionRepositoryCreated(
                 event.org,
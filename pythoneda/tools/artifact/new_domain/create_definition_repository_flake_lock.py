@@ -19,9 +19,11 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .definition_nix_flake import DefinitionNixFlake
+from .flake_lock_cache import FlakeLockCache
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
-from pythoneda.shared.nix.flake import NixFlake
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryFlakeLockCreated,
     DefinitionRepositoryFlakeLockRequested,
@@ -40,6 +42,7 @@ class CreateDefinitionRepositoryFlakeLock(EventListener):
     Collaborators:
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryFlakeLockCreated
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryFlakeLockRequested
+        - pythoneda.tools.artifact.new_domain.FlakeLockCache: Reuses flake.lock files resolved before.
     """
 
     _token = None
@@ -64,6 +67,7 @@ class CreateDefinitionRepositoryFlakeLock(EventListener):
 
     @classmethod
     @listen(DefinitionRepositoryFlakeLockRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryFlakeLockRequested(
         cls, event: DefinitionRepositoryFlakeLockRequested
     ) -> DefinitionRepositoryFlakeLockCreated:
@@ -74,9 +78,21 @@ class CreateDefinitionRepositoryFlakeLock(EventListener):
         :return: The event representing the flake.lock file has been created.
         :rtype: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryFlakeLockCreated
         """
+        flake = DefinitionNixFlake(
+            event.org,
+            event.name,
+            event.description,
+            event.package,
+            event.context["url"],
+            event.context["version"],
+        )
         repo_folder = event.context["def-repo-folder"]
-        await NixFlake.update_flake_lock(repo_folder)
-        await GitAdd(repo_folder).add("flake.lock")
+        await FlakeLockCache.update_flake_lock(
+            flake.inputs,
+            repo_folder,
+            event.context.get("refresh-flake-lock", False),
+        )
+        StagingArea.for_repository(repo_folder).stage("flake.lock")
         return DefinitionRepositoryFlakeLockCreated(
             event.org,
             event.name,
@@ -20,12 +20,14 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryNixFlakeCreated,
     DefinitionRepositoryNixFlakeRequested,
 )
 from .definition_nix_flake import DefinitionNixFlake
+from .template_executor import TemplateExecutor
 from typing import List
 
 
@@ -65,6 +67,7 @@ class CreateDefinitionRepositoryNixFlake(EventListener):
 
     @classmethod
     @listen(DefinitionRepositoryNixFlakeRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryNixFlakeRequested(
         cls, event: DefinitionRepositoryNixFlakeRequested
     ) -> DefinitionRepositoryNixFlakeCreated:
@@ -83,10 +86,11 @@ class CreateDefinitionRepositoryNixFlake(EventListener):
             event.context["url"],
             event.context["version"],
         )
-        event.context["flake"] = flake
         repo_folder = event.context["def-repo-folder"]
-        flake_file = await flake.generate_flake(repo_folder)
-        await GitAdd(repo_folder).add(flake_file)
+        flake_file = await TemplateExecutor.run_coroutine(
+            flake.generate_flake(repo_folder)
+        )
+        StagingArea.for_repository(repo_folder).stage(flake_file)
         return DefinitionRepositoryNixFlakeCreated(
             event.org,
             event.name,
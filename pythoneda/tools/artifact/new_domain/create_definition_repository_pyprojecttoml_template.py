@@ -20,11 +20,13 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryPyprojecttomlTemplateCreated,
     DefinitionRepositoryPyprojecttomlTemplateRequested,
 )
+from .definition_nix_flake import DefinitionNixFlake
 from .pyprojecttoml_template import PyprojecttomlTemplate
 from typing import List
 
@@ -65,6 +67,7 @@ class CreateDefinitionRepositoryPyprojecttomlTemplate(EventListener):
 
     @classmethod
     @listen(DefinitionRepositoryPyprojecttomlTemplateRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryPyprojecttomlTemplateRequested(
         cls, event: DefinitionRepositoryPyprojecttomlTemplateRequested
     ) -> DefinitionRepositoryPyprojecttomlTemplateCreated:
@@ -75,12 +78,20 @@ class CreateDefinitionRepositoryPyprojecttomlTemplate(EventListener):
         :return: The event representing the pyprojecttoml.template file has been created.
         :rtype: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryPyprojecttomlTemplateCreated
         """
-        pyprojecttoml_template = PyprojecttomlTemplate(
-            event.context["flake"],
+        # The flake is built here, so this step doesn't wait for flake.nix
+        flake = DefinitionNixFlake(
+            event.org,
+            event.name,
+            event.description,
+            event.package,
+            event.context["url"],
+            event.context["version"],
         )
+        pyprojecttoml_template = PyprojecttomlTemplate(flake)
         repo_folder = event.context["def-repo-folder"]
         pyprojecttoml_template_file = await pyprojecttoml_template.generate(repo_folder)
-        await GitAdd(repo_folder).add(pyprojecttoml_template_file)
+        if pyprojecttoml_template.changed:
+            StagingArea.for_repository(repo_folder).stage(pyprojecttoml_template_file)
         return DefinitionRepositoryPyprojecttomlTemplateCreated(
             event.org,
             event.name,
@@ -19,8 +19,9 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .github_client import GithubClientPool
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git.github import Repository
+from .step_timer import StepTimer
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryCreated,
     DomainRepositoryRequested,
@@ -40,6 +41,7 @@ class CreateDomainRepository(EventListener):
     Collaborators:
         - pythoneda.tools.artifact.new_domain.events.DomainRepositoryCreated
         - pythoneda.tools.artifact.new_domain.events.DomainRepositoryRequested
+        - pythoneda.tools.artifact.new_domain.GithubClientPool: Provides the GitHub client.
     """
 
     _token = None
@@ -64,6 +66,7 @@ class CreateDomainRepository(EventListener):
 
     @classmethod
     @listen(DomainRepositoryRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryRequested(
         cls, event: DomainRepositoryRequested
     ) -> DomainRepositoryCreated:
@@ -74,11 +77,13 @@ class CreateDomainRepository(EventListener):
         :return: The event representing the domain repository has been created, or None if the process failed.
         :rtype: pythoneda.tools.artifact.new_domain.events.DomainRepositoryCreated
         """
-        r = Repository(event.github_token)
-        response = await r.create(event.org, event.name)
+        response = await GithubClientPool.client_for(
+            event.github_token
+        ).create_repository(event.org, event.name)
         if response.get("__error__"):
             CreateDomainRepository.logger().error(response)
         else:
+            event.context["repo-created"] = True
             return DomainRepositoryCreated(
                 event.org,
                 event.name,
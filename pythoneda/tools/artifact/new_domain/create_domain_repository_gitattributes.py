@@ -20,7 +20,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryGitattributesCreated,
     DomainRepositoryGitattributesRequested,
@@ -65,6 +66,7 @@ class CreateDomainRepositoryGitattributes(EventListener):
 
     @classmethod
     @listen(DomainRepositoryGitattributesRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryGitattributesRequested(
         cls, event: DomainRepositoryGitattributesRequested
     ) -> DomainRepositoryGitattributesCreated:
@@ -82,7 +84,8 @@ class CreateDomainRepositoryGitattributes(EventListener):
         print(f'def-url: {event.context["def-url"]} -> {gitattributes}')
         repo_folder = event.context["repo-folder"]
         gitattributes_file = await gitattributes.generate(repo_folder)
-        await GitAdd(repo_folder).add(gitattributes_file)
+        if gitattributes.changed:
+            StagingArea.for_repository(repo_folder).stage(gitattributes_file)
         return DomainRepositoryGitattributesCreated(
             event.org,
             event.name,
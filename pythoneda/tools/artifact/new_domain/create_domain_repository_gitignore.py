@@ -20,7 +20,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryGitignoreCreated,
     DomainRepositoryGitignoreRequested,
@@ -65,6 +66,7 @@ class CreateDomainRepositoryGitignore(EventListener):
 
     @classmethod
     @listen(DomainRepositoryGitignoreRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryGitignoreRequested(
         cls, event: DomainRepositoryGitignoreRequested
     ) -> DomainRepositoryGitignoreCreated:
@@ -78,7 +80,8 @@ class CreateDomainRepositoryGitignore(EventListener):
         gitignore = Gitignore()
         repo_folder = event.context["repo-folder"]
         gitignore_file = await gitignore.generate(repo_folder)
-        await GitAdd(repo_folder).add(gitignore_file)
+        if gitignore.changed:
+            StagingArea.for_repository(repo_folder).stage(gitignore_file)
         return DomainRepositoryGitignoreCreated(
             event.org,
             event.name,
@@ -23,7 +23,8 @@ import datetime
 from .init import Init
 import os
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryInitFilesCreated,
     DomainRepositoryInitFilesRequested,
@@ -67,6 +68,7 @@ class CreateDomainRepositoryInitFiles(EventListener):
 
     @classmethod
     @listen(DomainRepositoryInitFilesRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryInitFilesRequested(
         cls, event: DomainRepositoryInitFilesRequested
     ) -> DomainRepositoryInitFilesCreated:
@@ -97,14 +99,16 @@ class CreateDomainRepositoryInitFiles(EventListener):
                 relative_folder = subfolder
             else:
                 relative_folder = f"{relative_folder}/{subfolder}"
-            init_file = await Init(
+            init = Init(
                 event.org,
                 event.name,
                 relative_package,
                 relative_folder,
                 datetime.datetime.now().year,
-            ).generate(current_folder)
-            await GitAdd(repo_folder).add(init_file)
+            )
+            init_file = await init.generate(current_folder)
+            if init.changed:
+                StagingArea.for_repository(repo_folder).stage(init_file)
         return DomainRepositoryInitFilesCreated(
             event.org,
             event.name,
@@ -20,7 +20,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryReadmeCreated,
     DomainRepositoryReadmeRequested,
@@ -65,6 +66,7 @@ class CreateDomainRepositoryReadme(EventListener):
 
     @classmethod
     @listen(DomainRepositoryReadmeRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryReadmeRequested(
         cls, event: DomainRepositoryReadmeRequested
     ) -> DomainRepositoryReadmeCreated:
@@ -86,7 +88,8 @@ class CreateDomainRepositoryReadme(EventListener):
         )
         repo_folder = event.context["repo-folder"]
         readme_file = await readme.generate(repo_folder)
-        await GitAdd(repo_folder).add(readme_file)
+        if readme.changed:
+            StagingArea.for_repository(repo_folder).stage(readme_file)
         return DomainRepositoryReadmeCreated(
             event.org,
             event.name,
@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import datetime
 from .new_file_from_template import NewFileFromTemplate
+from pathlib import Path
 from pythoneda.shared import attribute
 from pythoneda.shared.nix.flake import (
     FlakeUtilsNixFlake,
@@ -29,6 +30,7 @@ from pythoneda.shared.nix.flake import (
     PythonedaSharedBannerNixFlake,
     PythonedaSharedDomainNixFlake,
 )
+from .template_compiler import TemplateCompiler
 
 
 class DefinitionNixFlake(PythonedaNixFlake):
@@ -89,6 +91,7 @@ class DefinitionNixFlake(PythonedaNixFlake):
         )
         self._org = org
         self._package = package
+        self._template_subfolder = templateSubfolder
 
     @property
     @attribute
@@ -128,6 +131,21 @@ class DefinitionNixFlake(PythonedaNixFlake):
         """
         return self.__class__.kebab_to_camel(self.name)
 
+    def render(self) -> str:
+        """
+        Renders the contents of the flake.nix file, without writing it.
+        :return: The contents.
+        :rtype: str
+        """
+        return TemplateCompiler.render(
+            Path(NewFileFromTemplate.templates_folder()) / self._template_subfolder,
+            "FlakeNix",
+            "FlakeNix",
+            "root",
+            "flake",
+            self,
+        )
+
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
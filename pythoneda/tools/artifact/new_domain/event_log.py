@@ -0,0 +1,279 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/event_log.py
+
+This file defines the EventLog class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Dict, List
+from .workspace_manager import WorkspaceManager
+
+
+class EventLog(BaseObject):
+    """
+    Append-only log of the events of each new-domain pipeline, to resume failed ones.
+
+    Class name: EventLog
+
+    Responsibilities:
+        - Persist, per pipeline, the events each step received and emitted, with their context.
+        - Keep the workspaces of unfinished pipelines, so they can be resumed.
+        - Persist the paths waiting to be staged in each repository, which are only kept in memory.
+        - Rebuild the emitted events of a pipeline nothing followed, ready to be emitted again.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.StepTimer: Records the events of each step.
+        - pythoneda.tools.artifact.new_domain.WorkspaceManager: Keeps the workspaces.
+        - pythoneda.tools.artifact.new_domain.StagingArea: Its pending paths are logged and restored.
+    """
+
+    _folder = None
+    _enabled = True
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, folder: str = None, enabled: bool = None):
+        """
+        Configures the event log.
+        :param folder: The folder of the logs.
+        :type folder: str
+        :param enabled: Whether events get logged.
+        :type enabled: bool
+        """
+        if folder is not None:
+            cls._folder = folder
+        if enabled is not None:
+            cls._enabled = enabled
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        Checks whether events get logged.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return cls._enabled
+
+    @classmethod
+    def folder(cls) -> str:
+        """
+        Retrieves the folder of the logs.
+        :return: Such folder.
+        :rtype: str
+        """
+        if cls._folder is None:
+            cls._folder = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_EVENT_LOG",
+                os.path.join(
+                    os.environ.get(
+                        "XDG_STATE_HOME",
+                        os.path.join(os.path.expanduser("~"), ".local", "state"),
+                    ),
+                    "pythoneda",
+                    "new-domain",
+                    "runs",
+                ),
+            )
+        return cls._folder
+
+    @classmethod
+    def path_of(cls, runId: str) -> str:
+        """
+        Retrieves the log of given pipeline.
+        :param runId: The id of the pipeline.
+        :type runId: str
+        :return: The path of the log.
+        :rtype: str
+        """
+        return os.path.join(cls.folder(), f"{runId}.jsonl")
+
+    @classmethod
+    def entry_for(cls, kind: str, event) -> Dict:
+        """
+        Builds the log entry of given event. The github token is never logged.
+        :param kind: Either "received" or "emitted".
+        :type kind: str
+        :param event: The event.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :return: The entry.
+        :rtype: Dict
+        """
+        # StagingArea runs git, which is timed by StepTimer, which uses this class
+        from .staging_area import StagingArea
+
+        staged = {}
+        for key in ["repo-folder", "def-repo-folder"]:
+            folder = event.context.get(key, None)
+            if folder is not None:
+                staged[key] = StagingArea.pending(folder)
+        return {
+            "timestamp": time.time(),
+            "kind": kind,
+            "event": event.__class__.__name__,
+            "id": event.id,
+            "previous-event-ids": event.previous_event_ids or [],
+            "org": event.org,
+            "name": event.name,
+            "description": event.description,
+            "package": event.package,
+            "gpg-key-id": event.gpg_key_id,
+            "context": event.context,
+            "staged": staged,
+        }
+
+    @classmethod
+    def record(cls, runId: str, kind: str, events):
+        """
+        Appends given events to the log of their pipeline.
+        :param runId: The id of the pipeline.
+        :type runId: str
+        :param kind: Either "received" or "emitted".
+        :type kind: str
+        :param events: The event, a list of events, or None.
+        :type events: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        """
+        if not cls._enabled or events is None:
+            return
+        if not isinstance(events, list):
+            events = [events]
+        lines = []
+        for event in events:
+            if not hasattr(event, "context"):
+                continue
+            for workspace in event.context.get("workspaces", []):
+                WorkspaceManager.retain(workspace)
+            lines.append(json.dumps(cls.entry_for(kind, event), default=str))
+        if not lines:
+            return
+        try:
+            with cls._lock:
+                os.makedirs(cls.folder(), exist_ok=True)
+                with open(cls.path_of(runId), "a", encoding="utf-8") as log:
+                    log.write("\n".join(lines) + "\n")
+        except OSError as e:
+            cls.logger().warning(f"Could not log the events of {runId}: {e}")
+
+    @classmethod
+    def entries(cls, runId: str) -> List[Dict]:
+        """
+        Reads the log of given pipeline.
+        :param runId: The id of the pipeline.
+        :type runId: str
+        :return: The entries.
+        :rtype: List[Dict]
+        """
+        result = []
+        with open(cls.path_of(runId), "r", encoding="utf-8") as log:
+            for line in log:
+                if line.strip():
+                    try:
+                        result.append(json.loads(line))
+                    except ValueError:
+                        # a partial line, if the process died while writing it
+                        pass
+        return result
+
+    @classmethod
+    def resume(cls, runId: str, githubToken: str) -> List:
+        """
+        Rebuilds the events emitted by given pipeline that no step followed,
+        so they can be emitted again. The steps they triggered, but never
+        completed, are left to
+        pythoneda.tools.artifact.new_domain.events.PipelineGraph.frontier.
+        :param runId: The id of the pipeline.
+        :type runId: str
+        :param githubToken: The github token.
+        :type githubToken: str
+        :return: The events.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        # StagingArea runs git, which is timed by StepTimer, which uses this class
+        from .staging_area import StagingArea
+        import pythoneda.tools.artifact.new_domain.events as events
+
+        try:
+            entries = cls.entries(runId)
+        except OSError as e:
+            raise ValueError(f"No event log for {runId}: {e}")
+        if any([item["event"] == "NewDomainCreated" for item in entries]):
+            raise ValueError(f"{runId} already finished")
+        emitted = [entry for entry in entries if entry["kind"] == "emitted"]
+        if not emitted:
+            emitted = entries[:1]
+        if not emitted:
+            raise ValueError(f"The event log of {runId} is empty")
+        last = emitted[-1]
+        if last["context"].get("new-domain-created", False):
+            raise ValueError(f"{runId} already finished")
+        # all events share the latest progress, as they did before
+        context = last["context"]
+        context["run-id"] = runId
+        for workspace in context.get("workspaces", []):
+            if not os.path.isdir(workspace):
+                raise ValueError(
+                    f"The workspace {workspace} of {runId} no longer exists"
+                )
+            WorkspaceManager.adopt(workspace)
+        # the pending paths were only kept in memory
+        for key, paths in last.get("staged", {}).items():
+            folder = context.get(key, None)
+            if folder is not None and os.path.isdir(folder):
+                staging_area = StagingArea.for_repository(folder)
+                for path in paths:
+                    staging_area.stage(path)
+        followed = set()
+        for entry in emitted:
+            followed.update(entry["previous-event-ids"])
+        result = []
+        for entry in emitted:
+            if entry["id"] in followed:
+                continue
+            event_class = getattr(events, entry["event"], None)
+            if event_class is None:
+                raise ValueError(
+                    f"Unknown event {entry['event']} in the log of {runId}"
+                )
+            cls.logger().info(f"Resuming {runId} from {entry['event']} ({entry['id']})")
+            result.append(
+                event_class(
+                    entry["org"],
+                    entry["name"],
+                    entry["description"],
+                    entry["package"],
+                    githubToken,
+                    entry["gpg-key-id"],
+                    context,
+                    entry["previous-event-ids"],
+                    entry["id"],
+                )
+            )
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
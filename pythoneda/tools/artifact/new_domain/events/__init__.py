@@ -21,75 +21,81 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
-from .new_domain_event import NewDomainEvent
-from .definition_repository_changes_committed import (
-    DefinitionRepositoryChangesCommitted,
-)
-from .definition_repository_changes_pushed import DefinitionRepositoryChangesPushed
-from .definition_repository_changes_tagged import DefinitionRepositoryChangesTagged
-from .definition_repository_cloned import DefinitionRepositoryCloned
-from .definition_repository_clone_requested import DefinitionRepositoryCloneRequested
-from .definition_repository_commit_requested import DefinitionRepositoryCommitRequested
-from .definition_repository_created import DefinitionRepositoryCreated
-from .definition_repository_flake_lock_created import (
-    DefinitionRepositoryFlakeLockCreated,
-)
-from .definition_repository_flake_lock_requested import (
-    DefinitionRepositoryFlakeLockRequested,
-)
-from .definition_repository_nix_flake_created import DefinitionRepositoryNixFlakeCreated
-from .definition_repository_nix_flake_requested import (
-    DefinitionRepositoryNixFlakeRequested,
-)
-from .definition_repository_pyprojecttoml_template_created import (
-    DefinitionRepositoryPyprojecttomlTemplateCreated,
-)
-from .definition_repository_pyprojecttoml_template_requested import (
-    DefinitionRepositoryPyprojecttomlTemplateRequested,
-)
-from .definition_repository_push_requested import DefinitionRepositoryPushRequested
-from .definition_repository_readme_created import DefinitionRepositoryReadmeCreated
-from .definition_repository_readme_requested import DefinitionRepositoryReadmeRequested
-from .definition_repository_requested import DefinitionRepositoryRequested
-from .definition_repository_tag_requested import DefinitionRepositoryTagRequested
-from .domain_repository_changes_committed import DomainRepositoryChangesCommitted
-from .domain_repository_changes_pushed import DomainRepositoryChangesPushed
-from .domain_repository_changes_tagged import DomainRepositoryChangesTagged
-from .domain_repository_cloned import DomainRepositoryCloned
-from .domain_repository_clone_requested import DomainRepositoryCloneRequested
-from .domain_repository_commit_requested import DomainRepositoryCommitRequested
-from .domain_repository_created import DomainRepositoryCreated
-from .domain_repository_gitattributes_created import (
-    DomainRepositoryGitattributesCreated,
-)
-from .domain_repository_gitattributes_requested import (
-    DomainRepositoryGitattributesRequested,
-)
-from .domain_repository_gitignore_created import (
-    DomainRepositoryGitignoreCreated,
-)
-from .domain_repository_gitignore_requested import (
-    DomainRepositoryGitignoreRequested,
-)
-from .domain_repository_init_files_created import (
-    DomainRepositoryInitFilesCreated,
-)
-from .domain_repository_init_files_requested import (
-    DomainRepositoryInitFilesRequested,
-)
-from .domain_repository_push_requested import DomainRepositoryPushRequested
-from .domain_repository_readme_created import DomainRepositoryReadmeCreated
-from .domain_repository_readme_requested import DomainRepositoryReadmeRequested
-from .domain_repository_requested import DomainRepositoryRequested
-from .domain_repository_tag_requested import DomainRepositoryTagRequested
-from .new_domain_created import NewDomainCreated
-from .new_domain_requested import NewDomainRequested
-from .sha256_in_definition_repository_nix_flake_updated import (
-    Sha256InDefinitionRepositoryNixFlakeUpdated,
-)
-from .update_sha256_in_definition_repository_nix_flake_requested import (
-    UpdateSha256InDefinitionRepositoryNixFlakeRequested,
-)
+import importlib
+
+# Each name is imported from its module the first time it's accessed
+_index = {
+    "NewDomainEvent": ".new_domain_event",
+    "DefinitionRepositoryChangesCommitted": ".definition_repository_changes_committed",
+    "DefinitionRepositoryChangesPushed": ".definition_repository_changes_pushed",
+    "DefinitionRepositoryChangesTagged": ".definition_repository_changes_tagged",
+    "DefinitionRepositoryCloned": ".definition_repository_cloned",
+    "DefinitionRepositoryCloneRequested": ".definition_repository_clone_requested",
+    "DefinitionRepositoryCommitRequested": ".definition_repository_commit_requested",
+    "DefinitionRepositoryCreated": ".definition_repository_created",
+    "DefinitionRepositoryFlakeLockCreated": ".definition_repository_flake_lock_created",
+    "DefinitionRepositoryFlakeLockRequested": ".definition_repository_flake_lock_requested",
+    "DefinitionRepositoryNixFlakeCreated": ".definition_repository_nix_flake_created",
+    "DefinitionRepositoryNixFlakeRequested": ".definition_repository_nix_flake_requested",
+    "DefinitionRepositoryPyprojecttomlTemplateCreated": ".definition_repository_pyprojecttoml_template_created",
+    "DefinitionRepositoryPyprojecttomlTemplateRequested": ".definition_repository_pyprojecttoml_template_requested",
+    "DefinitionRepositoryPushRequested": ".definition_repository_push_requested",
+    "DefinitionRepositoryReadmeCreated": ".definition_repository_readme_created",
+    "DefinitionRepositoryReadmeRequested": ".definition_repository_readme_requested",
+    "DefinitionRepositoryRequested": ".definition_repository_requested",
+    "DefinitionRepositoryTagRequested": ".definition_repository_tag_requested",
+    "DomainRepositoryChangesCommitted": ".domain_repository_changes_committed",
+    "DomainRepositoryChangesPushed": ".domain_repository_changes_pushed",
+    "DomainRepositoryChangesTagged": ".domain_repository_changes_tagged",
+    "DomainRepositoryCloned": ".domain_repository_cloned",
+    "DomainRepositoryCloneRequested": ".domain_repository_clone_requested",
+    "DomainRepositoryCommitRequested": ".domain_repository_commit_requested",
+    "DomainRepositoryCreated": ".domain_repository_created",
+    "DomainRepositoryGitattributesCreated": ".domain_repository_gitattributes_created",
+    "DomainRepositoryGitattributesRequested": ".domain_repository_gitattributes_requested",
+    "DomainRepositoryGitignoreCreated": ".domain_repository_gitignore_created",
+    "DomainRepositoryGitignoreRequested": ".domain_repository_gitignore_requested",
+    "DomainRepositoryInitFilesCreated": ".domain_repository_init_files_created",
+    "DomainRepositoryInitFilesRequested": ".domain_repository_init_files_requested",
+    "DomainRepositoryPushRequested": ".domain_repository_push_requested",
+    "DomainRepositoryReadmeCreated": ".domain_repository_readme_created",
+    "DomainRepositoryReadmeRequested": ".domain_repository_readme_requested",
+    "DomainRepositoryRequested": ".domain_repository_requested",
+    "DomainRepositoryTagRequested": ".domain_repository_tag_requested",
+    "NewDomainCreated": ".new_domain_created",
+    "NewDomainRequested": ".new_domain_requested",
+    "PipelineGraph": ".pipeline_graph",
+    "Sha256InDefinitionRepositoryNixFlakeUpdated": ".sha256_in_definition_repository_nix_flake_updated",
+    "UpdateSha256InDefinitionRepositoryNixFlakeRequested": ".update_sha256_in_definition_repository_nix_flake_requested",
+}
+
+__all__ = list(_index.keys())
+
+
+def __getattr__(name: str):
+    """
+    Imports given name from its module, the first time it's accessed.
+    :param name: The name.
+    :type name: str
+    :return: The imported object.
+    :rtype: object
+    """
+    module = _index.get(name, None)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    result = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = result
+    return result
+
+
+def __dir__():
+    """
+    Lists the names of this package, including the ones not imported yet.
+    :return: Such names.
+    :rtype: list
+    """
+    return sorted(set(globals().keys()) | set(__all__))
+
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .definition_repository_tag_requested import DefinitionRepositoryTagRequested
 from .new_domain_event import NewDomainEvent
+from .pipeline_graph import PipelineGraph
 from pythoneda.shared import attribute, sensitive
 from typing import Dict, List
 
@@ -86,9 +87,11 @@ class DefinitionRepositoryChangesCommitted(NewDomainEvent):
     async def maybe_trigger(self) -> List[DefinitionRepositoryTagRequested]:
         """
         Triggers new events.
+        Completes the commit step of the pipeline, as well.
         :return: The triggered events.
         :rtype: List[pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryTagRequested
         """
+        PipelineGraph.definition().complete(self, "commit")
         return [
             DefinitionRepositoryTagRequested(
                 self.org,
@@ -19,8 +19,8 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from .definition_repository_readme_requested import DefinitionRepositoryReadmeRequested
 from .new_domain_event import NewDomainEvent
+from .pipeline_graph import PipelineGraph
 from pythoneda.shared import attribute, sensitive
 from typing import Dict, List
 
@@ -83,24 +83,13 @@ class DefinitionRepositoryCloned(NewDomainEvent):
             reconstructedId,
         )
 
-    async def maybe_trigger(self) -> List[DefinitionRepositoryReadmeRequested]:
+    async def maybe_trigger(self) -> List[NewDomainEvent]:
         """
-        Triggers new events.
-        :return: The triggered events.
-        :rtype: List[pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryReadmeRequested]
+        Triggers the steps of the definition pipeline that can run now.
+        :return: The triggered events, unless they have been dispatched concurrently already.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
         """
-        return [
-            DefinitionRepositoryReadmeRequested(
-                self.org,
-                self.name,
-                self.description,
-                self.package,
-                self.github_token,
-                self.gpg_key_id,
-                self.context,
-                [self.id] + self.previous_event_ids,
-            ),
-        ]
+        return await PipelineGraph.definition().advance(self, "clone")
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -19,10 +19,8 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from .update_sha256_in_definition_repository_nix_flake_requested import (
-    UpdateSha256InDefinitionRepositoryNixFlakeRequested,
-)
 from .new_domain_event import NewDomainEvent
+from .pipeline_graph import PipelineGraph
 from pythoneda.shared import attribute, sensitive
 from typing import Dict, List
 
@@ -85,26 +83,13 @@ class DefinitionRepositoryFlakeLockCreated(NewDomainEvent):
             reconstructedId,
         )
 
-    async def maybe_trigger(
-        self,
-    ) -> List[UpdateSha256InDefinitionRepositoryNixFlakeRequested]:
+    async def maybe_trigger(self) -> List[NewDomainEvent]:
         """
-        Triggers new events.
-        :return: The triggered events.
-        :rtype: List[pythoneda.tools.artifact.new_domain.events.UpdateSha256InDefinitionRepositoryNixFlakeRequested]
+        Triggers the steps of the definition pipeline that can run now.
+        :return: The triggered events, unless they have been dispatched concurrently already.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
         """
-        return [
-            UpdateSha256InDefinitionRepositoryNixFlakeRequested(
-                self.org,
-                self.name,
-                self.description,
-                self.package,
-                self.github_token,
-                self.gpg_key_id,
-                self.context,
-                [self.id] + self.previous_event_ids,
-            ),
-        ]
+        return await PipelineGraph.definition().advance(self, "flake-lock")
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -19,8 +19,8 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from .definition_repository_requested import DefinitionRepositoryRequested
 from .new_domain_event import NewDomainEvent
+from .pipeline_graph import PipelineGraph
 from typing import Dict, List
 
 
@@ -82,24 +82,13 @@ class DomainRepositoryChangesPushed(NewDomainEvent):
             reconstructedId,
         )
 
-    async def maybe_trigger(self) -> List[DefinitionRepositoryRequested]:
+    async def maybe_trigger(self) -> List[NewDomainEvent]:
         """
-        Triggers new events.
-        :return: The triggered events.
-        :rtype: List[pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryRequested]
+        Triggers the steps of the definition repository waiting for the domain repository to be pushed.
+        :return: The triggered events, unless they have been dispatched concurrently already.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
         """
-        return [
-            DefinitionRepositoryRequested(
-                self.org,
-                self.name,
-                self.description,
-                self.package,
-                self.github_token,
-                self.gpg_key_id,
-                self.context,
-                [self.id] + self.previous_event_ids,
-            ),
-        ]
+        return await PipelineGraph.definition().advance(self, "domain-pushed")
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -21,99 +21,83 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
+import importlib
+
 DBUS_PATH = "/pythoneda/tools/artifact/new_domain"
 
-from .dbus_new_domain_event import DbusNewDomainEvent
-from .dbus_definition_repository_changes_committed import (
-    DbusDefinitionRepositoryChangesCommitted,
-)
-from .dbus_definition_repository_changes_pushed import (
-    DbusDefinitionRepositoryChangesPushed,
-)
-from .dbus_definition_repository_changes_tagged import (
-    DbusDefinitionRepositoryChangesTagged,
-)
-from .dbus_definition_repository_cloned import (
-    DbusDefinitionRepositoryCloned,
-)
-from .dbus_definition_repository_clone_requested import (
-    DbusDefinitionRepositoryCloneRequested,
-)
-from .dbus_definition_repository_commit_requested import (
-    DbusDefinitionRepositoryCommitRequested,
-)
-from .dbus_definition_repository_created import DbusDefinitionRepositoryCreated
-from .dbus_definition_repository_flake_lock_created import (
-    DbusDefinitionRepositoryFlakeLockCreated,
-)
-from .dbus_definition_repository_flake_lock_requested import (
-    DbusDefinitionRepositoryFlakeLockRequested,
-)
-from .dbus_definition_repository_nix_flake_created import (
-    DbusDefinitionRepositoryNixFlakeCreated,
-)
-from .dbus_definition_repository_nix_flake_requested import (
-    DbusDefinitionRepositoryNixFlakeRequested,
-)
-from .dbus_definition_repository_pyprojecttoml_template_created import (
-    DbusDefinitionRepositoryPyprojecttomlTemplateCreated,
-)
-from .dbus_definition_repository_pyprojecttoml_template_requested import (
-    DbusDefinitionRepositoryPyprojecttomlTemplateRequested,
-)
-from .dbus_definition_repository_push_requested import (
-    DbusDefinitionRepositoryPushRequested,
-)
-from .dbus_definition_repository_readme_created import (
-    DbusDefinitionRepositoryReadmeCreated,
-)
-from .dbus_definition_repository_readme_requested import (
-    DbusDefinitionRepositoryReadmeRequested,
-)
-from .dbus_definition_repository_requested import DbusDefinitionRepositoryRequested
-from .dbus_definition_repository_tag_requested import (
-    DbusDefinitionRepositoryTagRequested,
-)
-from .dbus_domain_repository_changes_committed import (
-    DbusDomainRepositoryChangesCommitted,
-)
-from .dbus_domain_repository_changes_pushed import DbusDomainRepositoryChangesPushed
-from .dbus_domain_repository_changes_tagged import DbusDomainRepositoryChangesTagged
-from .dbus_domain_repository_cloned import DbusDomainRepositoryCloned
-from .dbus_domain_repository_clone_requested import DbusDomainRepositoryCloneRequested
-from .dbus_domain_repository_commit_requested import DbusDomainRepositoryCommitRequested
-from .dbus_domain_repository_created import DbusDomainRepositoryCreated
-from .dbus_domain_repository_gitattributes_created import (
-    DbusDomainRepositoryGitattributesCreated,
-)
-from .dbus_domain_repository_gitattributes_requested import (
-    DbusDomainRepositoryGitattributesRequested,
-)
-from .dbus_domain_repository_gitignore_created import (
-    DbusDomainRepositoryGitignoreCreated,
-)
-from .dbus_domain_repository_gitignore_requested import (
-    DbusDomainRepositoryGitignoreRequested,
-)
-from .dbus_domain_repository_init_files_created import (
-    DbusDomainRepositoryInitFilesCreated,
-)
-from .dbus_domain_repository_init_files_requested import (
-    DbusDomainRepositoryInitFilesRequested,
-)
-from .dbus_domain_repository_push_requested import DbusDomainRepositoryPushRequested
-from .dbus_domain_repository_readme_created import DbusDomainRepositoryReadmeCreated
-from .dbus_domain_repository_readme_requested import DbusDomainRepositoryReadmeRequested
-from .dbus_domain_repository_requested import DbusDomainRepositoryRequested
-from .dbus_domain_repository_tag_requested import DbusDomainRepositoryTagRequested
-from .dbus_new_domain_created import DbusNewDomainCreated
-from .dbus_new_domain_requested import DbusNewDomainRequested
-from .dbus_update_sha256_in_definition_repository_nix_flake_requested import (
-    DbusUpdateSha256InDefinitionRepositoryNixFlakeRequested,
-)
-from .dbus_sha256_in_definition_repository_nix_flake_updated import (
-    DbusSha256InDefinitionRepositoryNixFlakeUpdated,
-)
+# Each name is imported from its module the first time it's accessed
+_index = {
+    "NewDomainEventCodec": ".new_domain_event_codec",
+    "DbusNewDomainEvent": ".dbus_new_domain_event",
+    "DbusDefinitionRepositoryChangesCommitted": ".dbus_definition_repository_changes_committed",
+    "DbusDefinitionRepositoryChangesPushed": ".dbus_definition_repository_changes_pushed",
+    "DbusDefinitionRepositoryChangesTagged": ".dbus_definition_repository_changes_tagged",
+    "DbusDefinitionRepositoryCloned": ".dbus_definition_repository_cloned",
+    "DbusDefinitionRepositoryCloneRequested": ".dbus_definition_repository_clone_requested",
+    "DbusDefinitionRepositoryCommitRequested": ".dbus_definition_repository_commit_requested",
+    "DbusDefinitionRepositoryCreated": ".dbus_definition_repository_created",
+    "DbusDefinitionRepositoryFlakeLockCreated": ".dbus_definition_repository_flake_lock_created",
+    "DbusDefinitionRepositoryFlakeLockRequested": ".dbus_definition_repository_flake_lock_requested",
+    "DbusDefinitionRepositoryNixFlakeCreated": ".dbus_definition_repository_nix_flake_created",
+    "DbusDefinitionRepositoryNixFlakeRequested": ".dbus_definition_repository_nix_flake_requested",
+    "DbusDefinitionRepositoryPyprojecttomlTemplateCreated": ".dbus_definition_repository_pyprojecttoml_template_created",
+    "DbusDefinitionRepositoryPyprojecttomlTemplateRequested": ".dbus_definition_repository_pyprojecttoml_template_requested",
+    "DbusDefinitionRepositoryPushRequested": ".dbus_definition_repository_push_requested",
+    "DbusDefinitionRepositoryReadmeCreated": ".dbus_definition_repository_readme_created",
+    "DbusDefinitionRepositoryReadmeRequested": ".dbus_definition_repository_readme_requested",
+    "DbusDefinitionRepositoryRequested": ".dbus_definition_repository_requested",
+    "DbusDefinitionRepositoryTagRequested": ".dbus_definition_repository_tag_requested",
+    "DbusDomainRepositoryChangesCommitted": ".dbus_domain_repository_changes_committed",
+    "DbusDomainRepositoryChangesPushed": ".dbus_domain_repository_changes_pushed",
+    "DbusDomainRepositoryChangesTagged": ".dbus_domain_repository_changes_tagged",
+    "DbusDomainRepositoryCloned": ".dbus_domain_repository_cloned",
+    "DbusDomainRepositoryCloneRequested": ".dbus_domain_repository_clone_requested",
+    "DbusDomainRepositoryCommitRequested": ".dbus_domain_repository_commit_requested",
+    "DbusDomainRepositoryCreated": ".dbus_domain_repository_created",
+    "DbusDomainRepositoryGitattributesCreated": ".dbus_domain_repository_gitattributes_created",
+    "DbusDomainRepositoryGitattributesRequested": ".dbus_domain_repository_gitattributes_requested",
+    "DbusDomainRepositoryGitignoreCreated": ".dbus_domain_repository_gitignore_created",
+    "DbusDomainRepositoryGitignoreRequested": ".dbus_domain_repository_gitignore_requested",
+    "DbusDomainRepositoryInitFilesCreated": ".dbus_domain_repository_init_files_created",
+    "DbusDomainRepositoryInitFilesRequested": ".dbus_domain_repository_init_files_requested",
+    "DbusDomainRepositoryPushRequested": ".dbus_domain_repository_push_requested",
+    "DbusDomainRepositoryReadmeCreated": ".dbus_domain_repository_readme_created",
+    "DbusDomainRepositoryReadmeRequested": ".dbus_domain_repository_readme_requested",
+    "DbusDomainRepositoryRequested": ".dbus_domain_repository_requested",
+    "DbusDomainRepositoryTagRequested": ".dbus_domain_repository_tag_requested",
+    "DbusNewDomainCreated": ".dbus_new_domain_created",
+    "DbusNewDomainRequested": ".dbus_new_domain_requested",
+    "DbusUpdateSha256InDefinitionRepositoryNixFlakeRequested": ".dbus_update_sha256_in_definition_repository_nix_flake_requested",
+    "DbusSha256InDefinitionRepositoryNixFlakeUpdated": ".dbus_sha256_in_definition_repository_nix_flake_updated",
+}
+
+__all__ = list(_index.keys())
+
+
+def __getattr__(name: str):
+    """
+    Imports given name from its module, the first time it's accessed.
+    :param name: The name.
+    :type name: str
+    :return: The imported object.
+    :rtype: object
+    """
+    module = _index.get(name, None)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    result = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = result
+    return result
+
+
+def __dir__():
+    """
+    Lists the names of this package, including the ones not imported yet.
+    :return: Such names.
+    :rtype: list
+    """
+    return sorted(set(globals().keys()) | set(__all__))
+
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
@@ -25,6 +25,7 @@ from pythoneda.shared import Event
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryChangesCommitted,
 )
+from typing import Type
 
 
 class DbusDefinitionRepositoryChangesCommitted(DbusNewDomainEvent):
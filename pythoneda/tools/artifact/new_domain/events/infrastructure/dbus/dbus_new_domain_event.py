@@ -23,6 +23,8 @@ import abc
 from dbus_next import Message
 from dbus_next.service import signal
 import json
+from .new_domain_event_codec import NewDomainEventCodec
+import os
 from pythoneda.shared import Invariants
 from pythoneda.shared.infrastructure.dbus import DbusEvent
 from pythoneda.tools.artifact.new_domain.events import NewDomainEvent
@@ -38,11 +40,16 @@ class DbusNewDomainEvent(DbusEvent, abc.ABC):
 
     Responsibilities:
         - Define the common logic for all d-bus interfaces of new-domain events.
+        - Emit events either as strings ("json" format) or as a compact byte array ("binary" format).
+        - Understand both formats when receiving events.
 
     Collaborators:
-        - None
+        - pythoneda.tools.artifact.new_domain.events.infrastructure.dbus.NewDomainEventCodec
     """
 
+    _formats = ["json", "binary"]
+    _wire_format = None
+
     def __init__(self):
         """
         Creates a new DbusNewDomainEvent.
@@ -50,14 +57,59 @@ class DbusNewDomainEvent(DbusEvent, abc.ABC):
         super().__init__(DBUS_PATH)
 
     @classmethod
-    def transform(cls, event: NewDomainEvent) -> List[str]:
+    def wire_format(cls) -> str:
+        """
+        Retrieves the format used to emit events.
+        :return: Either "json" or "binary".
+        :rtype: str
+        """
+        if DbusNewDomainEvent._wire_format is None:
+            DbusNewDomainEvent.use_wire_format(
+                os.environ.get("PYTHONEDA_NEW_DOMAIN_DBUS_FORMAT", "json")
+            )
+        return DbusNewDomainEvent._wire_format
+
+    @classmethod
+    def use_wire_format(cls, format: str):
+        """
+        Specifies the format used to emit events.
+        Events are parsed in any of them, so "binary" emitters can talk to
+        receivers that still emit "json".
+        :param format: Either "json" or "binary".
+        :type format: str
+        """
+        if format not in DbusNewDomainEvent._formats:
+            raise ValueError(
+                f"Unknown d-bus format {format} (expected one of {', '.join(DbusNewDomainEvent._formats)})"
+            )
+        DbusNewDomainEvent._wire_format = format
+
+    @classmethod
+    def transform(cls, event: NewDomainEvent) -> List:
         """
         Transforms given event to signal parameters.
         :param event: The event to transform.
         :type event: pythoneda.tools.artifact.new_domain.NewDomainEvent
         :return: The event information.
-        :rtype: List[str]
+        :rtype: List
         """
+        if cls.wire_format() == "binary":
+            return [
+                NewDomainEventCodec.encode(
+                    [
+                        event.org,
+                        event.name,
+                        event.description,
+                        event.package,
+                        event.github_token.get(),
+                        event.gpg_key_id,
+                        Invariants.instance().to_json(event),
+                        event.id,
+                    ],
+                    event.context,
+                    event.previous_event_ids,
+                )
+            ]
         return [
             event.org,
             event.name,
@@ -80,6 +132,8 @@ class DbusNewDomainEvent(DbusEvent, abc.ABC):
         :return: The signature.
         :rtype: str
         """
+        if cls.wire_format() == "binary":
+            return "ay"
         return "ssssssssss"
 
     @classmethod
@@ -91,6 +145,8 @@ class DbusNewDomainEvent(DbusEvent, abc.ABC):
         :return: The specify NewDomainEvent event.
         :rtype: pythoneda.tools.artifact.new_domain.NewDomainEvent
         """
+        if message.signature == "ay":
+            return cls.parse_binary(message.body[0])
         (
             org,
             name,
@@ -118,6 +174,41 @@ class DbusNewDomainEvent(DbusEvent, abc.ABC):
             ),
         )
 
+    @classmethod
+    def parse_binary(cls, payload: bytes) -> NewDomainEvent:
+        """
+        Parses given payload in "binary" format.
+        :param payload: The payload.
+        :type payload: bytes
+        :return: The specify NewDomainEvent event.
+        :rtype: pythoneda.tools.artifact.new_domain.NewDomainEvent
+        """
+        fields, context, prev_event_ids = NewDomainEventCodec.decode(payload)
+        (
+            org,
+            name,
+            description,
+            package,
+            githubToken,
+            gpgKeyId,
+            invariants,
+            event_id,
+        ) = fields
+        return (
+            invariants,
+            cls.event_class(
+                org,
+                name,
+                description,
+                package,
+                githubToken,
+                gpgKeyId,
+                context,
+                prev_event_ids,
+                event_id,
+            ),
+        )
+
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
 # Local Variables:
@@ -0,0 +1,218 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/events/infrastructure/dbus/new_domain_event_codec.py
+
+This file defines the NewDomainEventCodec class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+from typing import Dict, List, Tuple
+import zlib
+
+
+class NewDomainEventCodec:
+    """
+    Compact binary encoding of new-domain events, for the "ay" d-bus signature.
+
+    Class name: NewDomainEventCodec
+
+    Responsibilities:
+        - Encode the fields of a new-domain event as a single byte array.
+        - Deflate the context once it gets large enough.
+        - Decode such byte arrays back.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.events.infrastructure.dbus.DbusNewDomainEvent
+    """
+
+    _magic = b"NDE"
+    _version = 1
+    _raw = 0
+    _deflated = 1
+    _compression_threshold = 256
+
+    @classmethod
+    def configure(cls, compressionThreshold: int = None):
+        """
+        Configures the codec.
+        :param compressionThreshold: The size from which the context gets deflated, or a negative value to never deflate it.
+        :type compressionThreshold: int
+        """
+        if compressionThreshold is not None:
+            cls._compression_threshold = compressionThreshold
+
+    @classmethod
+    def _write_varint(cls, buffer: bytearray, value: int):
+        """
+        Appends given non-negative integer to the buffer, as a LEB128 varint.
+        :param buffer: The buffer.
+        :type buffer: bytearray
+        :param value: The value.
+        :type value: int
+        """
+        while value >= 0x80:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    @classmethod
+    def _read_varint(cls, payload: bytes, offset: int) -> Tuple[int, int]:
+        """
+        Reads a LEB128 varint.
+        :param payload: The payload.
+        :type payload: bytes
+        :param offset: The position of the varint.
+        :type offset: int
+        :return: The value, and the position right after it.
+        :rtype: Tuple[int, int]
+        """
+        result = 0
+        shift = 0
+        while True:
+            if offset >= len(payload):
+                raise ValueError("Truncated new-domain event payload")
+            byte = payload[offset]
+            offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, offset
+            shift += 7
+
+    @classmethod
+    def _write_string(cls, buffer: bytearray, value: str):
+        """
+        Appends given string, which can be None, to the buffer.
+        :param buffer: The buffer.
+        :type buffer: bytearray
+        :param value: The string.
+        :type value: str
+        """
+        if value is None:
+            cls._write_varint(buffer, 0)
+        else:
+            data = value.encode("utf-8")
+            cls._write_varint(buffer, len(data) + 1)
+            buffer += data
+
+    @classmethod
+    def _read_string(cls, payload: bytes, offset: int) -> Tuple[str, int]:
+        """
+        Reads a string, which can be None.
+        :param payload: The payload.
+        :type payload: bytes
+        :param offset: The position of the string.
+        :type offset: int
+        :return: The string, and the position right after it.
+        :rtype: Tuple[str, int]
+        """
+        length, offset = cls._read_varint(payload, offset)
+        if length == 0:
+            return None, offset
+        end = offset + length - 1
+        if end > len(payload):
+            raise ValueError("Truncated new-domain event payload")
+        return payload[offset:end].decode("utf-8"), end
+
+    @classmethod
+    def is_encoded(cls, payload) -> bool:
+        """
+        Checks whether given value is a payload produced by this codec.
+        :param payload: The value.
+        :type payload: Any
+        :return: True in such case.
+        :rtype: bool
+        """
+        return isinstance(payload, (bytes, bytearray)) and bytes(
+            payload[: len(cls._magic)]
+        ) == cls._magic
+
+    @classmethod
+    def encode(
+        cls, fields: List[str], context: Dict, previousEventIds: List[str]
+    ) -> bytes:
+        """
+        Encodes the fields of an event.
+        :param fields: The string fields of the event.
+        :type fields: List[str]
+        :param context: The context.
+        :type context: Dict
+        :param previousEventIds: The ids of the previous events.
+        :type previousEventIds: List[str]
+        :return: The payload.
+        :rtype: bytes
+        """
+        buffer = bytearray(cls._magic)
+        buffer.append(cls._version)
+        cls._write_varint(buffer, len(fields))
+        for field in fields:
+            cls._write_string(buffer, field)
+        # both grow at each hop, and compress well together
+        data = json.dumps(
+            [previousEventIds, context], separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+        if 0 <= cls._compression_threshold <= len(data):
+            compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+            deflated = compressor.compress(data) + compressor.flush()
+            if len(deflated) < len(data):
+                buffer.append(cls._deflated)
+                buffer += deflated
+                return bytes(buffer)
+        buffer.append(cls._raw)
+        buffer += data
+        return bytes(buffer)
+
+    @classmethod
+    def decode(cls, payload: bytes) -> Tuple[List[str], Dict, List[str]]:
+        """
+        Decodes a payload.
+        :param payload: The payload.
+        :type payload: bytes
+        :return: The string fields, the context and the ids of the previous events.
+        :rtype: Tuple[List[str], Dict, List[str]]
+        """
+        payload = bytes(payload)
+        if not cls.is_encoded(payload):
+            raise ValueError("Not a new-domain event payload")
+        offset = len(cls._magic)
+        if offset >= len(payload) or payload[offset] != cls._version:
+            raise ValueError("Unsupported new-domain event payload version")
+        offset += 1
+        count, offset = cls._read_varint(payload, offset)
+        fields = []
+        for _ in range(count):
+            field, offset = cls._read_string(payload, offset)
+            fields.append(field)
+        if offset >= len(payload):
+            raise ValueError("Truncated new-domain event payload")
+        compression = payload[offset]
+        data = payload[offset + 1 :]
+        if compression == cls._deflated:
+            data = zlib.decompress(data, -15)
+        elif compression != cls._raw:
+            raise ValueError(f"Unknown compression {compression}")
+        previous_event_ids, context = json.loads(data.decode("utf-8"))
+        return fields, context, previous_event_ids
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
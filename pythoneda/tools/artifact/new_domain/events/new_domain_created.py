@@ -20,7 +20,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .new_domain_event import NewDomainEvent
-from typing import List
+from typing import Dict, List
 
 
 class NewDomainCreated(NewDomainEvent):
@@ -44,6 +44,7 @@ class NewDomainCreated(NewDomainEvent):
         package: str,
         githubToken: str,
         gpgKeyId: str,
+        context: Dict = None,
         previousEventIds: List[str] = None,
         reconstructedId: str = None,
     ):
@@ -61,6 +62,8 @@ class NewDomainCreated(NewDomainEvent):
         :type githubToken: str
         :param gpgKeyId: The GnuPG key id.
         :type gpgKeyId: str
+        :param context: A dictionary with additional values.
+        :type context: Dict
         :param previousEventIds: The id of the previous events.
         :type previousEventIds: List[str]
         :param reconstructedId: The id of the event, if it's generated externally.
@@ -73,7 +76,7 @@ class NewDomainCreated(NewDomainEvent):
             package,
             githubToken,
             gpgKeyId,
-            {},
+            context,
             previousEventIds,
             reconstructedId,
         )
@@ -0,0 +1,294 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/events/pipeline_graph.py
+
+This script defines the PipelineGraph class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from .definition_repository_commit_requested import DefinitionRepositoryCommitRequested
+from .definition_repository_flake_lock_requested import (
+    DefinitionRepositoryFlakeLockRequested,
+)
+from .definition_repository_nix_flake_requested import (
+    DefinitionRepositoryNixFlakeRequested,
+)
+from .definition_repository_pyprojecttoml_template_requested import (
+    DefinitionRepositoryPyprojecttomlTemplateRequested,
+)
+from .definition_repository_readme_requested import DefinitionRepositoryReadmeRequested
+from .domain_repository_commit_requested import DomainRepositoryCommitRequested
+from .domain_repository_gitattributes_requested import (
+    DomainRepositoryGitattributesRequested,
+)
+from .domain_repository_gitignore_requested import DomainRepositoryGitignoreRequested
+from .domain_repository_init_files_requested import (
+    DomainRepositoryInitFilesRequested,
+)
+from .domain_repository_readme_requested import DomainRepositoryReadmeRequested
+from .new_domain_event import NewDomainEvent
+from .update_sha256_in_definition_repository_nix_flake_requested import (
+    UpdateSha256InDefinitionRepositoryNixFlakeRequested,
+)
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+
+class PipelineGraph:
+    """
+    The declared dependencies among the steps of a pipeline.
+
+    Class name: PipelineGraph
+
+    Responsibilities:
+        - Declare which steps each step depends on.
+        - Fan out all steps whose dependencies are met, so they can run concurrently.
+        - Join concurrent branches, triggering a step only once all its dependencies are met.
+        - Dispatch the steps triggered at once concurrently, through the configured dispatcher.
+        - Rebuild the steps triggered but never completed, to resume a pipeline.
+
+    The progress is kept in the context of the pipeline, which every branch
+    shares by reference. Joins therefore only hold while all branches run in
+    the same process: events received over D-Bus carry a copy of the context,
+    so their progress is not seen by the other branches.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+    """
+
+    _domain = None
+    _definition = None
+    _dispatcher = None
+
+    def __init__(self, name: str, steps: Dict[str, Tuple[type, List[str]]]):
+        """
+        Creates a new PipelineGraph instance.
+        :param name: The name of the pipeline.
+        :type name: str
+        :param steps: For each step, the event requesting it and the steps it depends on.
+        :type steps: Dict[str, Tuple[type, List[str]]]
+        """
+        self._name = name
+        self._steps = steps
+
+    @classmethod
+    def configure(cls, dispatcher: Callable[[NewDomainEvent], Awaitable] = None):
+        """
+        Configures how the steps triggered at once get dispatched.
+        :param dispatcher: The coroutine function running a whole branch from given event (the app's accept, usually).
+        :type dispatcher: Callable[[pythoneda.tools.artifact.new_domain.events.NewDomainEvent], Awaitable]
+        """
+        cls._dispatcher = dispatcher
+
+    @classmethod
+    async def fan_out(cls, events: List[NewDomainEvent]) -> List[NewDomainEvent]:
+        """
+        Runs the branches started by given events concurrently, if there's
+        more than one and a dispatcher is configured.
+        :param events: The events.
+        :type events: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        :return: The events still to be emitted: none if they were dispatched, all of them otherwise.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        if cls._dispatcher is None or len(events) < 2:
+            return events
+        results = await asyncio.gather(
+            *[cls._dispatcher(event) for event in events], return_exceptions=True
+        )
+        # every branch has finished by now, so failing doesn't orphan any of them
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return []
+
+    @classmethod
+    def domain(cls):
+        """
+        Retrieves the graph of the domain repository pipeline.
+        :return: Such graph.
+        :rtype: pythoneda.tools.artifact.new_domain.events.PipelineGraph
+        """
+        if cls._domain is None:
+            cls._domain = cls(
+                "domain",
+                {
+                    "readme": (DomainRepositoryReadmeRequested, ["clone"]),
+                    "gitattributes": (DomainRepositoryGitattributesRequested, ["clone"]),
+                    "gitignore": (DomainRepositoryGitignoreRequested, ["clone"]),
+                    "init-files": (DomainRepositoryInitFilesRequested, ["clone"]),
+                    "commit": (
+                        DomainRepositoryCommitRequested,
+                        ["readme", "gitattributes", "gitignore", "init-files"],
+                    ),
+                },
+            )
+        return cls._domain
+
+    @classmethod
+    def definition(cls):
+        """
+        Retrieves the graph of the definition repository pipeline.
+        :return: Such graph.
+        :rtype: pythoneda.tools.artifact.new_domain.events.PipelineGraph
+        """
+        if cls._definition is None:
+            cls._definition = cls(
+                "definition",
+                {
+                    "readme": (DefinitionRepositoryReadmeRequested, ["clone"]),
+                    "nix-flake": (DefinitionRepositoryNixFlakeRequested, ["clone"]),
+                    "pyprojecttoml-template": (
+                        DefinitionRepositoryPyprojecttomlTemplateRequested,
+                        ["clone"],
+                    ),
+                    "flake-lock": (
+                        DefinitionRepositoryFlakeLockRequested,
+                        ["nix-flake"],
+                    ),
+                    # the sha256 is the one of the pushed tag of the domain
+                    "sha256": (
+                        UpdateSha256InDefinitionRepositoryNixFlakeRequested,
+                        ["flake-lock", "domain-pushed"],
+                    ),
+                    "commit": (
+                        DefinitionRepositoryCommitRequested,
+                        ["readme", "pyprojecttoml-template", "sha256"],
+                    ),
+                },
+            )
+        return cls._definition
+
+    @property
+    def name(self) -> str:
+        """
+        Retrieves the name of the pipeline.
+        :return: Such name.
+        :rtype: str
+        """
+        return self._name
+
+    @property
+    def steps(self) -> Dict[str, Tuple[type, List[str]]]:
+        """
+        Retrieves the declared steps.
+        :return: Such steps.
+        :rtype: Dict[str, Tuple[type, List[str]]]
+        """
+        return self._steps
+
+    def state(self, context: Dict) -> Dict:
+        """
+        Retrieves the progress of the pipeline, stored in given context so it travels with the events.
+        :param context: The context of the pipeline.
+        :type context: Dict
+        :return: The completed and the already-triggered steps.
+        :rtype: Dict
+        """
+        pipelines = context.setdefault("pipeline", {})
+        return pipelines.setdefault(self.name, {"done": [], "triggered": []})
+
+    def complete(self, event: NewDomainEvent, step: str) -> List[NewDomainEvent]:
+        """
+        Marks given step as completed, and triggers the steps that can run now.
+        :param event: The event representing the step has been completed.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :param step: The completed step.
+        :type step: str
+        :return: The events requesting the steps that can run now.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        state = self.state(event.context)
+        if step not in state["done"]:
+            state["done"].append(step)
+        result = []
+        for name, (event_class, dependencies) in self.steps.items():
+            if name in state["triggered"]:
+                continue
+            if all(dependency in state["done"] for dependency in dependencies):
+                state["triggered"].append(name)
+                result.append(self.request(name, event))
+        return result
+
+    def request(self, step: str, event: NewDomainEvent) -> NewDomainEvent:
+        """
+        Builds the event requesting given step.
+        :param step: The step.
+        :type step: str
+        :param event: The event the request follows.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :return: The request.
+        :rtype: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        """
+        event_class, _ = self.steps[step]
+        return event_class(
+            event.org,
+            event.name,
+            event.description,
+            event.package,
+            event.github_token,
+            event.gpg_key_id,
+            event.context,
+            [event.id] + event.previous_event_ids,
+        )
+
+    def unfinished(self, event: NewDomainEvent) -> List[NewDomainEvent]:
+        """
+        Builds the events requesting the steps that were triggered but never completed.
+        :param event: The event whose context holds the progress of the pipeline.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :return: Such events.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        state = self.state(event.context)
+        return [
+            self.request(step, event)
+            for step in state["triggered"]
+            if step not in state["done"]
+        ]
+
+    @classmethod
+    def frontier(cls, event: NewDomainEvent) -> List[NewDomainEvent]:
+        """
+        Builds the events requesting the unfinished steps of both pipelines.
+        :param event: The event whose context holds the progress of the pipelines.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :return: Such events.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        return cls.domain().unfinished(event) + cls.definition().unfinished(event)
+
+    async def advance(self, event: NewDomainEvent, step: str) -> List[NewDomainEvent]:
+        """
+        Marks given step as completed, and runs the steps that can run now,
+        concurrently if there are several.
+        :param event: The event representing the step has been completed.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :param step: The completed step.
+        :type step: str
+        :return: The events still to be emitted.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        return await PipelineGraph.fan_out(self.complete(event, step))
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
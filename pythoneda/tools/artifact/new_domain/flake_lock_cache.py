@@ -0,0 +1,249 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/flake_lock_cache.py
+
+This file defines the FlakeLockCache class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import json
+import os
+from pythoneda.shared import BaseObject
+from pythoneda.shared.nix.flake import NixFlake
+import shutil
+from .step_timer import StepTimer
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+
+class FlakeLockCache(BaseObject):
+    """
+    Reuses flake.lock files across definition repositories sharing the same inputs.
+
+    Class name: FlakeLockCache
+
+    Responsibilities:
+        - Identify a set of flake inputs with a stable key.
+        - Store the flake.lock resolved for each input set on disk.
+        - Provide cached flake.lock files while they are fresh, and resolve them with Nix otherwise.
+        - Keep track of cache hits and misses.
+
+    Collaborators:
+        - pythoneda.shared.nix.flake.NixFlake: Resolves the flake.lock files.
+        - pythoneda.tools.artifact.new_domain.CreateDefinitionRepositoryFlakeLock: Uses the cache.
+    """
+
+    _folder = None
+    _ttl = 24 * 60 * 60
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _refreshes = 0
+
+    @classmethod
+    def configure(cls, folder: str = None, ttl: float = None):
+        """
+        Configures the cache.
+        :param folder: The folder where flake.lock files are stored.
+        :type folder: str
+        :param ttl: The time, in seconds, a cached flake.lock is considered fresh.
+        :type ttl: float
+        """
+        if folder is not None:
+            cls._folder = folder
+        if ttl is not None:
+            cls._ttl = ttl
+
+    @classmethod
+    def folder(cls) -> str:
+        """
+        Retrieves the folder where flake.lock files are stored.
+        :return: Such folder.
+        :rtype: str
+        """
+        if cls._folder is None:
+            cls._folder = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_FLAKE_LOCKS",
+                os.path.join(
+                    os.environ.get(
+                        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+                    ),
+                    "pythoneda",
+                    "new-domain",
+                    "flake-locks",
+                ),
+            )
+        return cls._folder
+
+    @classmethod
+    def key(cls, inputs: List) -> str:
+        """
+        Builds the key of given flake inputs.
+        :param inputs: The inputs.
+        :type inputs: List[pythoneda.shared.nix.flake.NixFlakeInput]
+        :return: The key.
+        :rtype: str
+        """
+        entries = sorted(
+            [
+                [
+                    input.name,
+                    input.url,
+                    sorted([other.name for other in input.follows]),
+                ]
+                for input in inputs
+            ]
+        )
+        return hashlib.sha256(
+            json.dumps(entries, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    def path_of(cls, key: str) -> str:
+        """
+        Retrieves the path of the cached flake.lock for given key.
+        :param key: The key.
+        :type key: str
+        :return: The path.
+        :rtype: str
+        """
+        return os.path.join(cls.folder(), f"{key}.lock")
+
+    @classmethod
+    def is_fresh(cls, path: str) -> bool:
+        """
+        Checks whether given cached flake.lock can still be used.
+        :param path: The path of the cached file.
+        :type path: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        try:
+            return time.time() - os.stat(path).st_mtime < cls._ttl
+        except OSError:
+            return False
+
+    @classmethod
+    def store(cls, key: str, lockFile: str):
+        """
+        Stores given flake.lock in the cache.
+        :param key: The key.
+        :type key: str
+        :param lockFile: The flake.lock file.
+        :type lockFile: str
+        """
+        os.makedirs(cls.folder(), exist_ok=True)
+        descriptor, temp_file = tempfile.mkstemp(dir=cls.folder(), suffix=".tmp")
+        os.close(descriptor)
+        try:
+            shutil.copyfile(lockFile, temp_file)
+            # readers never see a partially-written lock
+            os.replace(temp_file, cls.path_of(key))
+        except OSError as e:
+            cls.logger().warning(f"Could not cache {lockFile}: {e}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    @classmethod
+    def invalidate(cls, inputs: List = None) -> int:
+        """
+        Removes cached flake.lock files.
+        :param inputs: The inputs whose flake.lock to remove, or None to remove them all.
+        :type inputs: List[pythoneda.shared.nix.flake.NixFlakeInput]
+        :return: The number of files removed.
+        :rtype: int
+        """
+        if inputs is not None:
+            paths = [cls.path_of(cls.key(inputs))]
+        elif os.path.isdir(cls.folder()):
+            paths = [
+                os.path.join(cls.folder(), file)
+                for file in os.listdir(cls.folder())
+                if file.endswith(".lock")
+            ]
+        else:
+            paths = []
+        result = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                result += 1
+            except OSError:
+                pass
+        return result
+
+    @classmethod
+    async def update_flake_lock(
+        cls, inputs: List, repoFolder: str, refresh: bool = False
+    ) -> bool:
+        """
+        Writes the flake.lock of given repository, reusing a cached one if possible.
+        :param inputs: The inputs of the repository's flake.
+        :type inputs: List[pythoneda.shared.nix.flake.NixFlakeInput]
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :param refresh: Whether to resolve the inputs again even if a fresh flake.lock is cached.
+        :type refresh: bool
+        :return: True if the cached flake.lock was used.
+        :rtype: bool
+        """
+        key = cls.key(inputs)
+        cached = cls.path_of(key)
+        lock_file = os.path.join(repoFolder, "flake.lock")
+        if not refresh and cls.is_fresh(cached):
+            try:
+                shutil.copyfile(cached, lock_file)
+                with cls._lock:
+                    cls._hits += 1
+                cls.logger().debug(f"Reusing cached flake.lock {cached}")
+                return True
+            except OSError as e:
+                cls.logger().warning(f"Could not reuse {cached}: {e}")
+        async with StepTimer.span("network"):
+            await NixFlake.update_flake_lock(repoFolder)
+        with cls._lock:
+            cls._misses += 1
+            if refresh:
+                cls._refreshes += 1
+        if os.path.exists(lock_file):
+            cls.store(key, lock_file)
+        return False
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the cache statistics.
+        :return: A dictionary with the number of hits, misses and forced refreshes.
+        :rtype: Dict
+        """
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "refreshes": cls._refreshes,
+            }
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
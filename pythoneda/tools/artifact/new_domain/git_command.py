@@ -0,0 +1,164 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/git_command.py
+
+This file defines the GitCommand class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from pythoneda.shared import BaseObject
+from .step_timer import StepTimer
+
+
+class GitCommandFailed(Exception):
+    """
+    A git command exited with a non-zero status.
+
+    Class name: GitCommandFailed
+
+    Responsibilities:
+        - Represent the failure of a git command.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GitCommand
+    """
+
+    def __init__(self, args: tuple, returnCode: int, stderr: str):
+        """
+        Creates a new GitCommandFailed instance.
+        :param args: The arguments of the git command.
+        :type args: tuple
+        :param returnCode: The exit status.
+        :type returnCode: int
+        :param stderr: The error output.
+        :type stderr: str
+        """
+        super().__init__(f"git {' '.join(args)} failed ({returnCode}): {stderr}")
+        self._return_code = returnCode
+        self._stderr = stderr
+
+    @property
+    def return_code(self) -> int:
+        """
+        Retrieves the exit status.
+        :return: Such status.
+        :rtype: int
+        """
+        return self._return_code
+
+    @property
+    def stderr(self) -> str:
+        """
+        Retrieves the error output.
+        :return: Such output.
+        :rtype: str
+        """
+        return self._stderr
+
+
+class GitCommand(BaseObject):
+    """
+    Runs git commands not covered by pythoneda.shared.git.
+
+    Class name: GitCommand
+
+    Responsibilities:
+        - Run a git command in a repository folder, asynchronously.
+        - Count the git processes spawned.
+
+    Collaborators:
+        - None
+    """
+
+    _spawns = 0
+
+    def __init__(self, folder: str):
+        """
+        Creates a new GitCommand instance.
+        :param folder: The repository folder.
+        :type folder: str
+        """
+        super().__init__()
+        self._folder = folder
+
+    @property
+    def folder(self) -> str:
+        """
+        Retrieves the repository folder.
+        :return: Such folder.
+        :rtype: str
+        """
+        return self._folder
+
+    @classmethod
+    def spawns(cls) -> int:
+        """
+        Retrieves the number of git processes spawned so far.
+        :return: Such number.
+        :rtype: int
+        """
+        return cls._spawns
+
+    async def run(self, *args: str, input: bytes = None) -> str:
+        """
+        Runs git with given arguments.
+        :param args: The arguments.
+        :type args: str
+        :param input: The data to send to git's standard input, if any.
+        :type input: bytes
+        :return: The standard output.
+        :rtype: str
+        """
+        output = await self.run_binary(*args, input=input)
+        return output.decode("utf-8")
+
+    async def run_binary(self, *args: str, input: bytes = None) -> bytes:
+        """
+        Runs git with given arguments, retrieving the raw output.
+        :param args: The arguments.
+        :type args: str
+        :param input: The data to send to git's standard input, if any.
+        :type input: bytes
+        :return: The standard output.
+        :rtype: bytes
+        """
+        GitCommand._spawns += 1
+        async with StepTimer.span("subprocess"):
+            process = await asyncio.create_subprocess_exec(
+                "git",
+                *args,
+                cwd=self.folder,
+                stdin=asyncio.subprocess.PIPE if input is not None else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await process.communicate(input)
+        if process.returncode != 0:
+            raise GitCommandFailed(
+                args, process.returncode, stderr.decode("utf-8", "replace")
+            )
+        return stdout
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,399 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/github_client.py
+
+This file defines the GithubClient and GithubClientPool classes.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import http.client
+import json
+import os
+from .github_rate_limiter import GithubRateLimiter
+from pythoneda.shared import BaseObject
+from .step_timer import StepTimer
+import threading
+import time
+from typing import Dict, Tuple
+import urllib.parse
+
+
+class GithubClient(BaseObject):
+    """
+    Talks to the GitHub API on behalf of a token, reusing its connections.
+
+    Class name: GithubClient
+
+    Responsibilities:
+        - Send GitHub API requests over keep-alive connections, as the rate limits allow.
+        - Create repositories, under an organization or the authenticated user.
+        - Keep track of connection reuse and request latency.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GithubClientPool: Shares clients across listeners and pipelines.
+        - pythoneda.tools.artifact.new_domain.GithubRateLimiter: Paces and retries the requests.
+    """
+
+    _idempotent_methods = ["GET", "HEAD", "PUT", "DELETE", "OPTIONS"]
+
+    def __init__(self, token: str, baseUrl: str, maxIdle: int = 4, timeout: float = 30):
+        """
+        Creates a new GithubClient instance.
+        :param token: The github token.
+        :type token: str
+        :param baseUrl: The url of the GitHub API.
+        :type baseUrl: str
+        :param maxIdle: The maximum number of idle connections kept open.
+        :type maxIdle: int
+        :param timeout: The timeout of each request, in seconds.
+        :type timeout: float
+        """
+        super().__init__()
+        self._token = token
+        url = urllib.parse.urlsplit(baseUrl)
+        self._scheme = url.scheme
+        self._host = url.hostname
+        self._port = url.port
+        self._prefix = url.path.rstrip("/")
+        self._max_idle = maxIdle
+        self._timeout = timeout
+        self._idle = []
+        self._login = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._opened = 0
+        self._reused = 0
+        self._latency = 0.0
+        self._max_latency = 0.0
+
+    def _connection(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """
+        Retrieves an idle connection, or opens a new one.
+        :return: The connection, and whether it's being reused.
+        :rtype: Tuple[http.client.HTTPConnection, bool]
+        """
+        with self._lock:
+            if self._idle:
+                self._reused += 1
+                return self._idle.pop(), True
+            self._opened += 1
+        if self._scheme == "https":
+            return (
+                http.client.HTTPSConnection(
+                    self._host, self._port, timeout=self._timeout
+                ),
+                False,
+            )
+        return (
+            http.client.HTTPConnection(self._host, self._port, timeout=self._timeout),
+            False,
+        )
+
+    def _release(self, connection: http.client.HTTPConnection):
+        """
+        Keeps given connection for later requests, if there's room for it.
+        :param connection: The connection.
+        :type connection: http.client.HTTPConnection
+        """
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _send(self, method: str, path: str, body: Dict = None) -> Tuple[int, Dict, Dict]:
+        """
+        Sends a request, blocking until the response arrives.
+        :param method: The HTTP method.
+        :type method: str
+        :param path: The path, relative to the API url.
+        :type path: str
+        :param body: The JSON body, if any.
+        :type body: Dict
+        :return: The status, the headers and the JSON response.
+        :rtype: Tuple[int, Dict, Dict]
+        """
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self._token}",
+            "User-Agent": "pythoneda-tools-artifact-new-domain",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        start = time.monotonic()
+        while True:
+            connection, reused = self._connection()
+            sent = False
+            try:
+                connection.request(
+                    method, f"{self._prefix}{path}", body=payload, headers=headers
+                )
+                sent = True
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                if not reused or (sent and method not in self._idempotent_methods):
+                    # the request might have been processed already
+                    raise
+                # the server closed an idle connection; retry on a fresh one
+            except Exception:
+                connection.close()
+                raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self._requests += 1
+            self._latency += elapsed
+            self._max_latency = max(self._max_latency, elapsed)
+        try:
+            result = json.loads(data.decode("utf-8")) if data else {}
+        except ValueError:
+            result = {"message": data.decode("utf-8", "replace")}
+        return response.status, dict(response.getheaders()), result
+
+    async def request(
+        self, method: str, path: str, body: Dict = None
+    ) -> Tuple[int, Dict, Dict]:
+        """
+        Sends a request to the GitHub API, once the rate limits of the token
+        allow it, and retries it while it's rate-limited.
+        :param method: The HTTP method.
+        :type method: str
+        :param path: The path, relative to the API url.
+        :type path: str
+        :param body: The JSON body, if any.
+        :type body: Dict
+        :return: The status, the headers and the JSON response.
+        :rtype: Tuple[int, Dict, Dict]
+        """
+
+        async def send():
+            return await asyncio.to_thread(self._send, method, path, body)
+
+        async with StepTimer.span("network"):
+            return await GithubRateLimiter.request(
+                self._token, send, method not in ["GET", "HEAD"]
+            )
+
+    async def login(self) -> str:
+        """
+        Retrieves the login of the user the token belongs to.
+        :return: Such login, or None if it's unknown.
+        :rtype: str
+        """
+        if self._login is None:
+            try:
+                status, _, result = await self.request("GET", "/user")
+            except (OSError, http.client.HTTPException):
+                return None
+            if status == 200 and isinstance(result, dict):
+                self._login = result.get("login", "")
+            else:
+                self._login = ""
+        return self._login or None
+
+    async def create_repository(self, org: str, name: str) -> Dict:
+        """
+        Creates a repository.
+        :param org: The organization, or the authenticated user.
+        :type org: str
+        :param name: The name of the repository.
+        :type name: str
+        :return: The response from GitHub, including an "__error__" entry if the repository could not be created.
+        :rtype: Dict
+        """
+        if org == await self.login():
+            path = "/user/repos"
+        else:
+            path = f"/orgs/{org}/repos"
+        retried = False
+        while True:
+            try:
+                status, _, result = await self.request("POST", path, {"name": name})
+                break
+            except (http.client.RemoteDisconnected, ConnectionError) as e:
+                if retried:
+                    return {"__error__": str(e)}
+                # the connection dropped after sending the request: GitHub
+                # might have created the repository already
+                retried = True
+            except (OSError, http.client.HTTPException) as e:
+                return {"__error__": str(e)}
+        if not isinstance(result, dict):
+            result = {"response": result}
+        if (
+            retried
+            and status == 422
+            and "already exists" in json.dumps(result).lower()
+        ):
+            return {"name": name, "full_name": f"{org}/{name}"}
+        if status >= 300:
+            result["__error__"] = f"{status}: {result.get('message', '')}"
+        return result
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+        for connection in idle:
+            connection.close()
+
+    def stats(self) -> Dict:
+        """
+        Retrieves the statistics of this client.
+        :return: A dictionary with the number of requests, opened and reused connections, and the total and maximum latency in seconds.
+        :rtype: Dict
+        """
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "connections-opened": self._opened,
+                "connections-reused": self._reused,
+                "latency": self._latency,
+                "max-latency": self._max_latency,
+            }
+
+
+class GithubClientPool(BaseObject):
+    """
+    Shares a GithubClient per token across all listeners and pipelines.
+
+    Class name: GithubClientPool
+
+    Responsibilities:
+        - Provide the client of each token, creating it the first time.
+        - Know the url of the GitHub API.
+        - Aggregate the statistics of all clients.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GithubClient
+    """
+
+    _base_url = None
+    _max_idle = 4
+    _clients = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, baseUrl: str = None, maxIdle: int = None):
+        """
+        Configures the pool.
+        :param baseUrl: The url of the GitHub API (a local fake server, for example).
+        :type baseUrl: str
+        :param maxIdle: The maximum number of idle connections per token.
+        :type maxIdle: int
+        """
+        with cls._lock:
+            if baseUrl is not None and baseUrl != cls._base_url:
+                cls._base_url = baseUrl
+                cls._close_all()
+            if maxIdle is not None:
+                cls._max_idle = maxIdle
+
+    @classmethod
+    def base_url(cls) -> str:
+        """
+        Retrieves the url of the GitHub API.
+        :return: Such url.
+        :rtype: str
+        """
+        if cls._base_url is None:
+            cls._base_url = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+        return cls._base_url
+
+    @classmethod
+    def client_for(cls, token: str) -> GithubClient:
+        """
+        Retrieves the client of given token.
+        :param token: The github token.
+        :type token: str
+        :return: The client.
+        :rtype: pythoneda.tools.artifact.new_domain.GithubClient
+        """
+        with cls._lock:
+            result = cls._clients.get(token, None)
+            if result is None:
+                result = GithubClient(token, cls.base_url(), cls._max_idle)
+                cls._clients[token] = result
+            return result
+
+    @classmethod
+    def _close_all(cls):
+        """
+        Closes and forgets all clients. The lock must be held.
+        """
+        for client in cls._clients.values():
+            client.close()
+        cls._clients = {}
+
+    @classmethod
+    def close_all(cls):
+        """
+        Closes and forgets all clients.
+        """
+        with cls._lock:
+            cls._close_all()
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the aggregated statistics of all clients.
+        :return: A dictionary with the number of clients, requests, opened and reused connections, and the average and maximum latency in seconds.
+        :rtype: Dict
+        """
+        with cls._lock:
+            clients = list(cls._clients.values())
+        result = {
+            "clients": len(clients),
+            "requests": 0,
+            "connections-opened": 0,
+            "connections-reused": 0,
+            "average-latency": 0.0,
+            "max-latency": 0.0,
+        }
+        latency = 0.0
+        for client in clients:
+            stats = client.stats()
+            result["requests"] += stats["requests"]
+            result["connections-opened"] += stats["connections-opened"]
+            result["connections-reused"] += stats["connections-reused"]
+            result["max-latency"] = max(result["max-latency"], stats["max-latency"])
+            latency += stats["latency"]
+        if result["requests"] > 0:
+            result["average-latency"] = latency / result["requests"]
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,406 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/github_rate_limiter.py
+
+This file defines the GithubRateLimiter class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import email.utils
+import os
+from pythoneda.shared import BaseObject
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Tuple
+
+
+class GithubRateLimiter(BaseObject):
+    """
+    Paces the GitHub operations of each token, according to GitHub's rate limits.
+
+    Class name: GithubRateLimiter
+
+    Responsibilities:
+        - Learn the remaining quota of each token from the X-RateLimit-* headers.
+        - Space out the operations creating content, as GitHub asks for.
+        - Hold back the operations of a token while it's being rate-limited.
+        - Retry rate-limited operations, with jittered exponential backoff.
+        - Report how long operations waited, and how many were retried.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GithubClient: Its requests are scheduled.
+        - pythoneda.tools.artifact.new_domain.PushRepository: Its pushes are scheduled.
+    """
+
+    _max_retries = 5
+    _base_delay = 1.0
+    _max_delay = 120.0
+    _min_interval = None
+    # "secondary rate limit" and "API rate limit exceeded" included
+    _rate_limit_phrases = [
+        "rate limit",
+        "http 429",
+        "returned error: 429",
+        "too many requests",
+    ]
+    _tokens = {}
+    _lock = threading.Lock()
+    _scheduled = 0
+    _waits = 0
+    _waited = 0.0
+    _max_wait = 0.0
+    _limited = 0
+    _retries = 0
+    _exhausted = 0
+
+    @classmethod
+    def configure(
+        cls,
+        maxRetries: int = None,
+        baseDelay: float = None,
+        maxDelay: float = None,
+        minInterval: float = None,
+    ):
+        """
+        Configures the scheduling.
+        :param maxRetries: The number of times a rate-limited operation is retried.
+        :type maxRetries: int
+        :param baseDelay: The backoff of the first retry, in seconds, when GitHub doesn't say how long to wait.
+        :type baseDelay: float
+        :param maxDelay: The maximum time, in seconds, to wait before a retry.
+        :type maxDelay: float
+        :param minInterval: The minimum time, in seconds, between operations of the same token creating content.
+        :type minInterval: float
+        """
+        with cls._lock:
+            if maxRetries is not None:
+                cls._max_retries = maxRetries
+            if baseDelay is not None:
+                cls._base_delay = baseDelay
+            if maxDelay is not None:
+                cls._max_delay = maxDelay
+            if minInterval is not None:
+                cls._min_interval = minInterval
+
+    @classmethod
+    def min_interval(cls) -> float:
+        """
+        Retrieves the minimum time between operations of the same token creating content.
+        :return: Such time, in seconds: $PYTHONEDA_NEW_DOMAIN_GITHUB_MIN_INTERVAL, or one second, as GitHub recommends.
+        :rtype: float
+        """
+        if cls._min_interval is None:
+            cls._min_interval = float(
+                os.environ.get("PYTHONEDA_NEW_DOMAIN_GITHUB_MIN_INTERVAL", "1")
+            )
+        return cls._min_interval
+
+    @classmethod
+    def _state_of(cls, token: str) -> Dict:
+        """
+        Retrieves the scheduling state of given token. The lock must be held.
+        :param token: The github token.
+        :type token: str
+        :return: The state.
+        :rtype: Dict
+        """
+        result = cls._tokens.get(token, None)
+        if result is None:
+            result = {
+                "remaining": None,
+                "reset": None,
+                "blocked-until": 0.0,
+                "next-mutation": 0.0,
+            }
+            cls._tokens[token] = result
+        return result
+
+    @classmethod
+    async def acquire(cls, token: str, mutating: bool = True) -> float:
+        """
+        Waits until an operation of given token can be sent.
+        :param token: The github token.
+        :type token: str
+        :param mutating: Whether the operation creates content.
+        :type mutating: bool
+        :return: The time waited, in seconds.
+        :rtype: float
+        """
+        with cls._lock:
+            state = cls._state_of(token)
+            now = time.monotonic()
+            start = max(now, state["blocked-until"])
+            if state["remaining"] == 0 and state["reset"] is not None:
+                start = max(start, now + state["reset"] - time.time())
+            if mutating:
+                start = max(start, state["next-mutation"])
+                # reserve the slot, so concurrent operations queue behind
+                state["next-mutation"] = start + cls.min_interval()
+            cls._scheduled += 1
+            wait = start - now
+            if wait > 0:
+                cls._waits += 1
+                cls._waited += wait
+                cls._max_wait = max(cls._max_wait, wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return max(0.0, wait)
+
+    @classmethod
+    def _header(cls, headers: Dict, name: str) -> str:
+        """
+        Retrieves a header, regardless of its case.
+        :param headers: The headers.
+        :type headers: Dict
+        :param name: The name of the header, in lowercase.
+        :type name: str
+        :return: Its value, or None if missing.
+        :rtype: str
+        """
+        for key, value in (headers or {}).items():
+            if key.lower() == name:
+                return value
+        return None
+
+    @classmethod
+    def retry_after(cls, headers: Dict) -> float:
+        """
+        Retrieves how long GitHub asks to wait, from the Retry-After header.
+        :param headers: The response headers.
+        :type headers: Dict
+        :return: The time to wait, in seconds, or None if not specified.
+        :rtype: float
+        """
+        value = cls._header(headers, "retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(
+                0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+            )
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def observe(cls, token: str, headers: Dict):
+        """
+        Updates the quota of given token from the X-RateLimit-* headers of a response.
+        :param token: The github token.
+        :type token: str
+        :param headers: The response headers.
+        :type headers: Dict
+        """
+        remaining = cls._header(headers, "x-ratelimit-remaining")
+        reset = cls._header(headers, "x-ratelimit-reset")
+        if remaining is None:
+            return
+        with cls._lock:
+            state = cls._state_of(token)
+            try:
+                state["remaining"] = int(remaining)
+                state["reset"] = float(reset) if reset is not None else None
+            except ValueError:
+                pass
+
+    @classmethod
+    def is_rate_limited(cls, status: int, headers: Dict, body: Dict) -> bool:
+        """
+        Checks whether a response means the request was rate-limited.
+        GitHub answers 403 to forbidden requests too, so those are told apart
+        by the headers and the message.
+        :param status: The HTTP status.
+        :type status: int
+        :param headers: The response headers.
+        :type headers: Dict
+        :param body: The JSON response.
+        :type body: Dict
+        :return: True in such case.
+        :rtype: bool
+        """
+        if status == 429:
+            return True
+        if status != 403:
+            return False
+        if cls._header(headers, "retry-after") is not None:
+            return True
+        if cls._header(headers, "x-ratelimit-remaining") == "0":
+            return True
+        message = body.get("message", "") if isinstance(body, dict) else ""
+        return "rate limit" in str(message).lower()
+
+    @classmethod
+    def is_rate_limit_error(cls, message: str) -> bool:
+        """
+        Checks whether the error of an operation other than an API request
+        means it was rate-limited. Only the phrases git and GitHub use are
+        matched, since a bare status could be part of a hash or a path.
+        :param message: The error message.
+        :type message: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        message = message.lower()
+        return any([phrase in message for phrase in cls._rate_limit_phrases])
+
+    @classmethod
+    def backoff(cls, attempt: int, headers: Dict = None) -> float:
+        """
+        Retrieves how long to wait before retrying a rate-limited operation.
+        :param attempt: The number of retries so far.
+        :type attempt: int
+        :param headers: The headers of the rate-limited response, if any.
+        :type headers: Dict
+        :return: The time to wait, in seconds.
+        :rtype: float
+        """
+        result = cls.retry_after(headers)
+        if result is None:
+            reset = cls._header(headers, "x-ratelimit-reset")
+            if cls._header(headers, "x-ratelimit-remaining") == "0" and reset:
+                try:
+                    result = float(reset) - time.time()
+                except ValueError:
+                    result = None
+        if result is None:
+            # full jitter, so throttled pipelines don't retry in lockstep
+            result = random.uniform(0, cls._base_delay * (2**attempt))
+        else:
+            result += random.uniform(0, cls._base_delay)
+        return min(cls._max_delay, max(0.0, result))
+
+    @classmethod
+    def block(cls, token: str, delay: float):
+        """
+        Holds back all operations of given token for a while.
+        :param token: The github token.
+        :type token: str
+        :param delay: The time, in seconds.
+        :type delay: float
+        """
+        with cls._lock:
+            state = cls._state_of(token)
+            state["blocked-until"] = max(
+                state["blocked-until"], time.monotonic() + delay
+            )
+
+    @classmethod
+    async def request(
+        cls,
+        token: str,
+        send: Callable[[], Awaitable[Tuple[int, Dict, Dict]]],
+        mutating: bool = True,
+    ) -> Tuple[int, Dict, Dict]:
+        """
+        Sends a GitHub API request when the token allows it, retrying it while it's rate-limited.
+        :param token: The github token.
+        :type token: str
+        :param send: Sends the request, and returns the status, the headers and the JSON response.
+        :type send: Callable[[], Awaitable[Tuple[int, Dict, Dict]]]
+        :param mutating: Whether the request creates content.
+        :type mutating: bool
+        :return: The status, the headers and the JSON response of the last attempt.
+        :rtype: Tuple[int, Dict, Dict]
+        """
+        attempt = 0
+        while True:
+            await cls.acquire(token, mutating)
+            status, headers, body = await send()
+            cls.observe(token, headers)
+            if not cls.is_rate_limited(status, headers, body):
+                return status, headers, body
+            with cls._lock:
+                cls._limited += 1
+                if attempt >= cls._max_retries:
+                    cls._exhausted += 1
+                    return status, headers, body
+                cls._retries += 1
+            delay = cls.backoff(attempt, headers)
+            cls.logger().warning(
+                f"GitHub rate limit hit ({status}), retrying in {delay:.1f}s"
+            )
+            cls.block(token, delay)
+            attempt += 1
+
+    @classmethod
+    async def run(
+        cls, token: str, operation: Callable[[], Awaitable], mutating: bool = True
+    ):
+        """
+        Runs a GitHub operation other than an API request (a git push, for
+        example) when the token allows it, retrying it while it fails because of rate limits.
+        :param token: The github token.
+        :type token: str
+        :param operation: The operation.
+        :type operation: Callable[[], Awaitable]
+        :param mutating: Whether the operation creates content.
+        :type mutating: bool
+        :return: What the operation returns.
+        :rtype: object
+        """
+        attempt = 0
+        while True:
+            await cls.acquire(token, mutating)
+            try:
+                return await operation()
+            except Exception as e:
+                if not cls.is_rate_limit_error(str(e)):
+                    raise
+                with cls._lock:
+                    cls._limited += 1
+                    if attempt >= cls._max_retries:
+                        cls._exhausted += 1
+                        raise
+                    cls._retries += 1
+                delay = cls.backoff(attempt)
+                cls.logger().warning(
+                    f"GitHub rate limit hit, retrying in {delay:.1f}s: {e}"
+                )
+                cls.block(token, delay)
+                attempt += 1
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the scheduling metrics.
+        :return: A dictionary with the number of operations scheduled, the ones that had to wait, the total and maximum wait in seconds, the rate-limited responses, the retries, and the operations given up on.
+        :rtype: Dict
+        """
+        with cls._lock:
+            return {
+                "scheduled": cls._scheduled,
+                "waits": cls._waits,
+                "waited": cls._waited,
+                "max-wait": cls._max_wait,
+                "rate-limited": cls._limited,
+                "retries": cls._retries,
+                "exhausted": cls._exhausted,
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
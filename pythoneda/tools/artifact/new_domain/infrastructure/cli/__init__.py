@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 __path__ = __import__("pkgutil").extend_path(__path__, __name__)
 
+from .new_domain_manifest import NewDomainManifest
 from .new_domain_options_cli import NewDomainOptionsCli
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,216 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/infrastructure/cli/new_domain_manifest.py
+
+This file defines the NewDomainManifest class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+from pythoneda.shared import BaseObject
+import sys
+from typing import Dict, List
+
+
+class NewDomainManifest(BaseObject):
+    """
+    A manifest describing several domains to create at once.
+
+    Class name: NewDomainManifest
+
+    Responsibilities:
+        - Read manifests in JSON, JSONL or YAML format, from a file or stdin.
+        - Normalize each entry into the options accepted by NewDomainApp.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.application.NewDomainApp: Receives the entries.
+    """
+
+    _keys = ["org", "name", "description", "package", "github-token", "gpg-key-id"]
+    _preview_keys = ["org", "name", "description", "package"]
+
+    @classmethod
+    def load(
+        cls, path: str, defaults: Dict = None, requiredKeys: List[str] = None
+    ) -> List[Dict]:
+        """
+        Reads the manifest in given path.
+        :param path: The manifest file, or "-" for stdin.
+        :type path: str
+        :param defaults: The values to use when an entry doesn't provide them.
+        :type defaults: Dict
+        :param requiredKeys: The keys each entry must provide. All of them, by default.
+        :type requiredKeys: List[str]
+        :return: The normalized entries.
+        :rtype: List[Dict]
+        """
+        if path == "-":
+            content = sys.stdin.read()
+            extension = None
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            extension = os.path.splitext(path)[1].lower()
+        return cls.parse(content, extension, defaults, requiredKeys)
+
+    @classmethod
+    def parse(
+        cls,
+        content: str,
+        extension: str = None,
+        defaults: Dict = None,
+        requiredKeys: List[str] = None,
+    ) -> List[Dict]:
+        """
+        Parses given manifest contents.
+        :param content: The contents.
+        :type content: str
+        :param extension: The extension of the manifest file, used to pick the format. If None, it's guessed.
+        :type extension: str
+        :param defaults: The values to use when an entry doesn't provide them.
+        :type defaults: Dict
+        :param requiredKeys: The keys each entry must provide. All of them, by default.
+        :type requiredKeys: List[str]
+        :return: The normalized entries.
+        :rtype: List[Dict]
+        """
+        if extension in [".jsonl", ".ndjson"]:
+            data = cls.parse_jsonl(content)
+        elif extension in [".yaml", ".yml"]:
+            data = cls.parse_yaml(content)
+        elif extension == ".json":
+            data = json.loads(content)
+        else:
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError:
+                try:
+                    data = cls.parse_jsonl(content)
+                except json.JSONDecodeError:
+                    data = cls.parse_yaml(content)
+
+        if isinstance(data, dict):
+            if defaults is None:
+                defaults = {}
+            if not isinstance(data.get("defaults", {}), dict):
+                raise ValueError("The defaults of the manifest must be a mapping")
+            defaults = {**defaults, **cls.normalize(data.get("defaults", {}))}
+            data = data.get("domains", [])
+
+        if not isinstance(data, list):
+            raise ValueError(
+                "The manifest must be a list of domains, or a mapping with a list of domains"
+            )
+
+        return [
+            cls.entry(item, defaults, requiredKeys, index)
+            for index, item in enumerate(data)
+        ]
+
+    @classmethod
+    def parse_jsonl(cls, content: str) -> List[Dict]:
+        """
+        Parses given JSONL contents.
+        :param content: The contents.
+        :type content: str
+        :return: The entries.
+        :rtype: List[Dict]
+        """
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    @classmethod
+    def parse_yaml(cls, content: str):
+        """
+        Parses given YAML contents. Errors only tell where the problem is,
+        since quoting the contents could disclose a token.
+        :param content: The contents.
+        :type content: str
+        :return: The parsed document.
+        :rtype: object
+        """
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("YAML manifests require PyYAML to be installed")
+        try:
+            return yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            mark = getattr(e, "problem_mark", None)
+            if mark is None:
+                raise ValueError("Invalid YAML")
+            raise ValueError(
+                f"Invalid YAML at line {mark.line + 1}, column {mark.column + 1}"
+            )
+
+    @classmethod
+    def normalize(cls, item: Dict) -> Dict:
+        """
+        Normalizes the keys of given entry, so "github_token" and "github-token" are equivalent.
+        :param item: The entry.
+        :type item: Dict
+        :return: The normalized entry.
+        :rtype: Dict
+        """
+        return {key.replace("_", "-"): value for key, value in item.items()}
+
+    @classmethod
+    def entry(
+        cls,
+        item: Dict,
+        defaults: Dict = None,
+        requiredKeys: List[str] = None,
+        index: int = None,
+    ) -> Dict:
+        """
+        Builds the options for a single domain.
+        Errors never include the values of the entry, since it may carry a token.
+        :param item: The manifest entry.
+        :type item: Dict
+        :param defaults: The values to use when the entry doesn't provide them.
+        :type defaults: Dict
+        :param requiredKeys: The keys the entry must provide. All of them, by default.
+        :type requiredKeys: List[str]
+        :param index: The position of the entry in the manifest, if any.
+        :type index: int
+        :return: The options.
+        :rtype: Dict
+        """
+        label = "Manifest entry" if index is None else f"Manifest entry #{index}"
+        if not isinstance(item, dict):
+            raise ValueError(f"{label} is not a mapping")
+        result = {}
+        if defaults:
+            result.update(
+                {key: value for key, value in defaults.items() if value is not None}
+            )
+        result.update(cls.normalize(item))
+        if requiredKeys is None:
+            requiredKeys = cls._keys
+        missing = [key for key in requiredKeys if not result.get(key, None)]
+        if missing:
+            raise ValueError(f"{label} is missing: {', '.join(missing)}")
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
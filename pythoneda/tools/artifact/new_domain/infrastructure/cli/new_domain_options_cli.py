@@ -23,6 +23,26 @@ from argparse import ArgumentParser
 from pythoneda.shared import PrimaryPort
 from pythoneda.shared.application import PythonEDA
 from pythoneda.shared.infrastructure.cli import CliHandler
+from pythoneda.tools.artifact.new_domain import (
+    BulkRenderer,
+    EventLog,
+    FlakeLockCache,
+    GithubClientPool,
+    GithubRateLimiter,
+    InitialCommit,
+    NewDomain,
+    PushRepository,
+    ScaffoldPreview,
+    SkeletonCache,
+    StepTimer,
+    TemplateCompiler,
+    TemplateExecutor,
+    WorkspaceManager,
+)
+from .new_domain_manifest import NewDomainManifest
+import os
+import sys
+from typing import Dict, List
 
 
 class NewDomainOptionsCli(CliHandler, PrimaryPort):
@@ -44,6 +64,7 @@ class NewDomainOptionsCli(CliHandler, PrimaryPort):
         Creates a new NewDomainOptionsCli instance.
         """
         super().__init__("Provide the NewDomain options")
+        self._parser = None
 
     @classmethod
     def priority(cls) -> int:
@@ -76,45 +97,254 @@ class NewDomainOptionsCli(CliHandler, PrimaryPort):
         parser.add_argument(
             "-o",
             "--org",
-            required=True,
+            required=False,
             help="The name of the Github organization",
         )
 
         parser.add_argument(
             "-n",
             "--name",
-            required=True,
+            required=False,
             help="The name of the domain",
         )
 
         parser.add_argument(
             "-d",
             "--description",
-            required=True,
+            required=False,
             help="A brief description of the domain",
         )
 
         parser.add_argument(
             "-p",
             "--package",
-            required=True,
+            required=False,
             help="The Python package",
         )
 
         parser.add_argument(
             "-t",
             "--github-token",
-            required=True,
+            required=False,
             help="The github token",
         )
 
         parser.add_argument(
             "-g",
             "--gpg-key-id",
-            required=True,
+            required=False,
             help="The GnuPG key id",
         )
 
+        parser.add_argument(
+            "-m",
+            "--manifest",
+            required=False,
+            help="A JSON, JSONL or YAML file (or - for stdin) describing several domains to create",
+        )
+
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            required=False,
+            type=int,
+            default=4,
+            help="The maximum number of domains created at once, in manifest mode",
+        )
+
+        parser.add_argument(
+            "--render-to",
+            required=False,
+            help="Write the files of the new repositories into given folder, rendered by a pool of processes, instead of creating them (no GitHub, git or nix involved)",
+        )
+
+        parser.add_argument(
+            "--render-processes",
+            required=False,
+            type=int,
+            help="The number of processes rendering files with --render-to (the number of CPUs by default)",
+        )
+
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Keep running, creating the domains requested through a local socket, at most --concurrency at once",
+        )
+
+        parser.add_argument(
+            "--socket",
+            required=False,
+            help="The Unix socket the daemon listens to",
+        )
+
+        parser.add_argument(
+            "--queue-size",
+            required=False,
+            type=int,
+            default=64,
+            help="The maximum number of domains waiting to be created, in daemon mode",
+        )
+
+        parser.add_argument(
+            "--backpressure",
+            choices=["wait", "reject"],
+            default="wait",
+            help="What to do with requests when the queue is full, in daemon mode",
+        )
+
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the files of the new repositories instead of creating them (no GitHub, git or nix involved)",
+        )
+
+        parser.add_argument(
+            "--resume",
+            required=False,
+            metavar="RUN_ID",
+            help="Resume a failed run from its last successful step",
+        )
+
+        parser.add_argument(
+            "--event-log",
+            required=False,
+            help="The folder where the events of each run are logged",
+        )
+
+        parser.add_argument(
+            "--no-event-log",
+            action="store_true",
+            help="Do not log the events of each run (failed runs cannot be resumed then)",
+        )
+
+        parser.add_argument(
+            "-l",
+            "--local-init",
+            action="store_true",
+            help="Initialize the freshly-created repositories locally instead of cloning them",
+        )
+
+        parser.add_argument(
+            "--local-sha256",
+            action="store_true",
+            help="Compute the sha256 of the domain tag from the local workspace, instead of downloading it",
+        )
+
+        parser.add_argument(
+            "--verify-sha256",
+            action="store_true",
+            help="Cross-check the locally-computed sha256 against the remote one",
+        )
+
+        parser.add_argument(
+            "--no-speculative-definition",
+            action="store_true",
+            help="Provision the definition repository only after the domain one has been pushed",
+        )
+
+        parser.add_argument(
+            "--git-url",
+            required=False,
+            help="The base url of the repositories (https://github.com by default)",
+        )
+
+        parser.add_argument(
+            "--github-api-url",
+            required=False,
+            help="The url of the GitHub API (https://api.github.com by default)",
+        )
+
+        parser.add_argument(
+            "--github-min-interval",
+            required=False,
+            type=float,
+            help="The minimum time, in seconds, between GitHub operations creating content (1 by default)",
+        )
+
+        parser.add_argument(
+            "--github-max-retries",
+            required=False,
+            type=int,
+            help="The number of times a rate-limited GitHub operation is retried (5 by default)",
+        )
+
+        parser.add_argument(
+            "--refresh-flake-lock",
+            action="store_true",
+            help="Resolve the flake inputs of the definition repository even if a cached flake.lock is available",
+        )
+
+        parser.add_argument(
+            "--flake-lock-ttl",
+            required=False,
+            type=int,
+            help="The time, in seconds, a cached flake.lock is reused",
+        )
+
+        parser.add_argument(
+            "--compile-templates",
+            action="store_true",
+            help="Compile the templates into Python functions, instead of interpreting them each time",
+        )
+
+        parser.add_argument(
+            "--no-atomic-push",
+            action="store_true",
+            help="Push the branch and the tags of each repository separately, instead of in a single atomic push",
+        )
+
+        parser.add_argument(
+            "--no-native-commit",
+            action="store_true",
+            help="Run git add, git commit and git tag, instead of writing the initial commit and tag of new repositories directly",
+        )
+
+        parser.add_argument(
+            "--no-skeleton-cache",
+            action="store_true",
+            help="Render the files that are the same for every domain, instead of linking them from the skeleton cache",
+        )
+
+        parser.add_argument(
+            "--skeleton-hardlinks",
+            action="store_true",
+            help="Hardlink the files of the skeleton cache into the workspaces, which leaves them read-only, instead of reflinking or copying them",
+        )
+
+        parser.add_argument(
+            "--render-workers",
+            required=False,
+            type=int,
+            help="The number of threads rendering templates and writing files, or 0 to do it in the event loop",
+        )
+
+        parser.add_argument(
+            "--timing-report",
+            required=False,
+            help="A file to append the timing report of each domain to, as JSON lines",
+        )
+
+        parser.add_argument(
+            "--workspace-root",
+            required=False,
+            help="The folder where repositories are checked out (a tmpfs mount, for example)",
+        )
+
+        parser.add_argument(
+            "--workspace-max-size",
+            required=False,
+            type=int,
+            help="The maximum disk usage of all workspaces, in MiB",
+        )
+
+        parser.add_argument(
+            "--workspace-max-age",
+            required=False,
+            type=int,
+            help="The age, in seconds, after which a workspace is evicted",
+        )
+        self._parser = parser
+
     async def handle(self, app: PythonEDA, args):
         """
         Processes the command specified from the command line.
@@ -123,16 +353,167 @@ class NewDomainOptionsCli(CliHandler, PrimaryPort):
         :param args: The CLI args.
         :type args: argparse.args
         """
-        await app.accept_options(
-            {
-                "org": args.org,
-                "name": args.name,
-                "description": args.description,
-                "package": args.package,
-                "github-token": args.github_token,
-                "gpg-key-id": args.gpg_key_id,
-            }
+        options = {
+            "org": args.org,
+            "name": args.name,
+            "description": args.description,
+            "package": args.package,
+            "github-token": args.github_token,
+            "gpg-key-id": args.gpg_key_id,
+        }
+        flags = {
+            "local-init": args.local_init,
+            "local-sha256": args.local_sha256,
+            "verify-sha256": args.verify_sha256,
+            "refresh-flake-lock": args.refresh_flake_lock,
+            "speculative-definition": not args.no_speculative_definition,
+        }
+        EventLog.configure(args.event_log, not args.no_event_log)
+        FlakeLockCache.configure(ttl=args.flake_lock_ttl)
+        GithubClientPool.configure(args.github_api_url)
+        GithubRateLimiter.configure(
+            maxRetries=args.github_max_retries, minInterval=args.github_min_interval
         )
+        InitialCommit.configure(enabled=not args.no_native_commit)
+        NewDomain.configure(args.git_url)
+        PushRepository.configure(atomic=not args.no_atomic_push)
+        SkeletonCache.configure(
+            enabled=not args.no_skeleton_cache, hardlinks=args.skeleton_hardlinks
+        )
+        StepTimer.configure(args.timing_report)
+        TemplateExecutor.configure(args.render_workers)
+        if args.compile_templates:
+            TemplateCompiler.configure(enabled=True)
+        WorkspaceManager.configure(
+            args.workspace_root,
+            (
+                args.workspace_max_size * 1024 * 1024
+                if args.workspace_max_size is not None
+                else None
+            ),
+            args.workspace_max_age,
+        )
+        if args.dry_run:
+            self.preview(args, options)
+        elif args.render_to:
+            self.bulk_render(args, options)
+        elif args.daemon:
+            try:
+                await app.accept_daemon(
+                    {**options, **flags},
+                    args.socket,
+                    args.concurrency,
+                    args.queue_size,
+                    args.backpressure,
+                )
+            except OSError as e:
+                self._parser.error(f"cannot start the daemon: {e}")
+        elif args.resume:
+            if args.github_token is None:
+                self._parser.error(
+                    "the following arguments are required: --github-token"
+                )
+            try:
+                await app.accept_resume(args.resume, args.github_token)
+            except ValueError as e:
+                self._parser.error(f"cannot resume {args.resume}: {e}")
+        elif args.manifest:
+            try:
+                entries = NewDomainManifest.load(args.manifest, {**options, **flags})
+            except (OSError, ValueError) as e:
+                self._parser.error(f"invalid manifest {args.manifest}: {e}")
+            print(await app.accept_manifest(entries, args.concurrency))
+        else:
+            missing = [
+                f"--{key}" for key, value in options.items() if value is None
+            ]
+            if missing:
+                self._parser.error(
+                    f"the following arguments are required: {', '.join(missing)}"
+                )
+            await app.accept_options({**options, **flags})
+
+    def offline_entries(self, args, options: Dict) -> List[Dict]:
+        """
+        Retrieves the domains to render without creating them, from the
+        manifest or the command line.
+        :param args: The CLI args.
+        :type args: argparse.args
+        :param options: The options given in the command line.
+        :type options: Dict
+        :return: The options of each domain.
+        :rtype: List[Dict]
+        """
+        keys = NewDomainManifest._preview_keys
+        if args.manifest:
+            try:
+                return NewDomainManifest.load(args.manifest, options, keys)
+            except (OSError, ValueError) as e:
+                self._parser.error(f"invalid manifest {args.manifest}: {e}")
+        missing = [f"--{key}" for key in keys if options[key] is None]
+        if missing:
+            self._parser.error(
+                f"the following arguments are required: {', '.join(missing)}"
+            )
+        return [options]
+
+    def bulk_render(self, args, options: Dict):
+        """
+        Writes the files of the new repositories into a local folder, using
+        a pool of processes, without creating the repositories.
+        :param args: The CLI args.
+        :type args: argparse.args
+        :param options: The options given in the command line.
+        :type options: Dict
+        """
+        specs = []
+        for entry in self.offline_entries(args, options):
+            folder = os.path.join(args.render_to, entry["org"], entry["name"])
+            specs += BulkRenderer.specs_for(
+                entry["org"],
+                entry["name"],
+                entry["description"],
+                entry["package"],
+                os.path.join(folder, "domain"),
+                os.path.join(folder, "definition"),
+            )
+        failures = 0
+        with BulkRenderer(args.render_processes) as renderer:
+            for outcome in renderer.render(specs):
+                if outcome["error"] is not None:
+                    failures += 1
+                    print(f"{outcome['path']}: {outcome['error']}", file=sys.stderr)
+                else:
+                    status = "wrote" if outcome["changed"] else "unchanged"
+                    print(f"{status} {outcome['path']}")
+        if failures > 0:
+            self._parser.exit(1, f"{failures}/{len(specs)} files could not be rendered\n")
+
+    def preview(self, args, options: Dict):
+        """
+        Prints the files of the new repositories, without creating them.
+        :param args: The CLI args.
+        :type args: argparse.args
+        :param options: The options given in the command line.
+        :type options: Dict
+        """
+        entries = self.offline_entries(args, options)
+        failures = 0
+        for entry in entries:
+            prefix = f"{entry['org']}/{entry['name']}/" if args.manifest else ""
+            try:
+                files = ScaffoldPreview.render(
+                    entry["org"], entry["name"], entry["description"], entry["package"]
+                )
+            except Exception as e:
+                failures += 1
+                print(f"{entry['org']}/{entry['name']}: {e}", file=sys.stderr)
+                continue
+            ScaffoldPreview.stream(files, sys.stdout, prefix)
+        if failures > 0:
+            self._parser.exit(
+                1, f"{failures}/{len(entries)} domains could not be rendered\n"
+            )
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
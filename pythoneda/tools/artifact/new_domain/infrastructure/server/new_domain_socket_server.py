@@ -0,0 +1,201 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/infrastructure/server/new_domain_socket_server.py
+
+This file defines the NewDomainSocketServer class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import errno
+import json
+import os
+from pythoneda.shared import BaseObject
+from pythoneda.tools.artifact.new_domain import NewDomainDaemon
+from pythoneda.tools.artifact.new_domain.events import NewDomainRequested
+from pythoneda.tools.artifact.new_domain.infrastructure.cli import NewDomainManifest
+import tempfile
+from typing import Callable, Dict
+
+
+class NewDomainSocketServer(BaseObject):
+    """
+    Accepts new-domain requests through a local Unix socket.
+
+    Class name: NewDomainSocketServer
+
+    Responsibilities:
+        - Read requests as JSON lines, each one either a manifest entry or a command.
+        - Submit the requested domains to the daemon, and reply whether they were accepted.
+        - Reply with the daemon metrics on demand.
+        - Make the socket reachable only by its owner, and never take over the socket of a running daemon.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewDomainDaemon: Runs the pipelines.
+        - pythoneda.tools.artifact.new_domain.infrastructure.cli.NewDomainManifest: Normalizes the requests.
+    """
+
+    def __init__(
+        self,
+        daemon: NewDomainDaemon,
+        factory: Callable[[Dict], NewDomainRequested],
+        path: str = None,
+        defaults: Dict = None,
+    ):
+        """
+        Creates a new NewDomainSocketServer instance.
+        :param daemon: The daemon.
+        :type daemon: pythoneda.tools.artifact.new_domain.NewDomainDaemon
+        :param factory: Builds the NewDomainRequested event for given options.
+        :type factory: Callable[[Dict], pythoneda.tools.artifact.new_domain.events.NewDomainRequested]
+        :param path: The path of the socket.
+        :type path: str
+        :param defaults: The values to use when a request doesn't provide them.
+        :type defaults: Dict
+        """
+        super().__init__()
+        self._daemon = daemon
+        self._factory = factory
+        self._path = path or self.__class__.default_path()
+        self._defaults = defaults or {}
+        self._server = None
+        self._writers = set()
+
+    @classmethod
+    def default_path(cls) -> str:
+        """
+        Retrieves the default path of the socket.
+        :return: $PYTHONEDA_NEW_DOMAIN_SOCKET, or a file in $XDG_RUNTIME_DIR or in the temporary folder.
+        :rtype: str
+        """
+        return os.environ.get(
+            "PYTHONEDA_NEW_DOMAIN_SOCKET",
+            os.path.join(
+                os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir()),
+                "pythoneda-new-domain.sock",
+            ),
+        )
+
+    @property
+    def path(self) -> str:
+        """
+        Retrieves the path of the socket.
+        :return: Such path.
+        :rtype: str
+        """
+        return self._path
+
+    async def start(self):
+        """
+        Starts listening.
+        The socket is created with no permissions for others, since requests
+        run with the daemon's default token and GnuPG key.
+        """
+        if os.path.exists(self._path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self._path)
+            except ConnectionRefusedError:
+                # a stale socket from a previous daemon
+                os.unlink(self._path)
+            else:
+                writer.close()
+                raise OSError(
+                    errno.EADDRINUSE, f"Another daemon is listening on {self._path}"
+                )
+        # the umask applies as the socket is bound, with no window for others
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self.handle, path=self._path
+            )
+        finally:
+            os.umask(umask)
+
+    async def stop(self):
+        """
+        Stops listening.
+        """
+        if self._server is not None:
+            self._server.close()
+            # idle clients would keep wait_closed() waiting otherwise
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves a connection. Requests are processed in order, so a producer
+        waiting for room in the queue doesn't send more until it gets it.
+        :param reader: To read the requests.
+        :type reader: asyncio.StreamReader
+        :param writer: To write the replies.
+        :type writer: asyncio.StreamWriter
+        """
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                reply = await self.process(line)
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def process(self, line: bytes) -> Dict:
+        """
+        Processes a request.
+        :param line: The request, in JSON format.
+        :type line: bytes
+        :return: The reply.
+        :rtype: Dict
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"accepted": False, "error": "the request is not valid JSON"}
+        if isinstance(request, dict) and request.get("command", None) == "stats":
+            return {"stats": self._daemon.stats()}
+        try:
+            event = self._factory(NewDomainManifest.entry(request, self._defaults))
+        except ValueError as e:
+            # the errors of the manifest never include the values of the entry
+            return {"accepted": False, "error": str(e)}
+        accepted = await self._daemon.submit(event)
+        result = {"accepted": accepted, "run-id": event.id}
+        if not accepted:
+            result["error"] = "the queue is full"
+        result["stats"] = self._daemon.stats()
+        return result
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
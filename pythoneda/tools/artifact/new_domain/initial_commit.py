@@ -0,0 +1,610 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/initial_commit.py
+
+This file defines the InitialCommit class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .git_command import GitCommand, GitCommandFailed
+import hashlib
+import os
+from pythoneda.shared import BaseObject
+import re
+from .staging_area import StagingArea
+import stat
+import struct
+from .template_executor import TemplateExecutor
+import threading
+import time
+from typing import Dict, List
+import zlib
+
+# attributes that make git add store something other than the file in the working tree
+_CONVERSION_ATTRIBUTES = ["crlf", "eol", "filter", "ident", "text", "working-tree-encoding"]
+
+# tag names check-ref-format accepts, as far as versions are concerned
+_TAG_NAME = re.compile(r"[A-Za-z0-9_+][A-Za-z0-9._+-]*")
+
+
+class InitialCommit(BaseObject):
+    """
+    Writes the first commit and tag of a new repository straight into its object database.
+
+    Class name: InitialCommit
+
+    Responsibilities:
+        - Tell whether a repository workspace is unborn, and plain enough for its objects to be written directly.
+        - Write the blobs, trees, commit and annotated tag as loose objects, along with the index and the refs.
+        - Keep track of the git processes saved, and of the repositories left to git.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.StagingArea: Provides the files to commit.
+        - pythoneda.tools.artifact.new_domain.GitCommand: Retrieves the identity and settings git would use.
+        - pythoneda.tools.artifact.new_domain.TemplateExecutor: Writes the objects off the event loop.
+        - pythoneda.tools.artifact.new_domain.CommitDomainRepository: Commits through it.
+        - pythoneda.tools.artifact.new_domain.TagDomainRepository: Tags through it.
+    """
+
+    _enabled = None
+    _pending = {}
+    _lock = threading.Lock()
+    _commits = 0
+    _tags = 0
+    _objects = 0
+    _fallbacks = 0
+    _spawns_saved = 0
+
+    @classmethod
+    def configure(cls, enabled: bool = None):
+        """
+        Configures the writer.
+        :param enabled: Whether initial commits and tags are written directly.
+        :type enabled: bool
+        """
+        if enabled is not None:
+            cls._enabled = enabled
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        Checks whether initial commits and tags are written directly.
+        :return: True in such case.
+        :rtype: bool
+        """
+        if cls._enabled is None:
+            cls._enabled = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_NATIVE_COMMIT", "1"
+            ).lower() not in ["0", "false", "no"]
+        return cls._enabled
+
+    @classmethod
+    def unborn_branch(cls, gitDir: str) -> str:
+        """
+        Retrieves the branch HEAD points to, if it has no commits yet.
+        :param gitDir: The .git folder.
+        :type gitDir: str
+        :return: The ref of the branch, or None if HEAD is detached or the branch exists already.
+        :rtype: str
+        """
+        try:
+            with open(os.path.join(gitDir, "HEAD")) as f:
+                head = f.read().strip()
+        except OSError:
+            return None
+        if not head.startswith("ref: refs/heads/"):
+            return None
+        result = head[len("ref: ") :]
+        if os.path.exists(os.path.join(gitDir, result)):
+            return None
+        try:
+            with open(os.path.join(gitDir, "packed-refs")) as f:
+                if any([line.rstrip("\n").endswith(f" {result}") for line in f]):
+                    return None
+        except FileNotFoundError:
+            pass
+        return result
+
+    @classmethod
+    async def settings(cls, repoFolder: str) -> Dict[str, str]:
+        """
+        Retrieves the configuration and the identities git would use in given repository.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :return: The output of git var -l, as a dictionary.
+        :rtype: Dict[str, str]
+        """
+        result = {}
+        for line in (await GitCommand(repoFolder).run("var", "-l")).splitlines():
+            key, separator, value = line.partition("=")
+            # valueless boolean keys are true
+            result[key] = value if separator else "true"
+        return result
+
+    @classmethod
+    def is_true(cls, value: str) -> bool:
+        """
+        Checks whether given configuration value is a true boolean.
+        :param value: The value.
+        :type value: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        value = (value or "").strip().lower()
+        return value in ["true", "yes", "on"] or (value.isdigit() and int(value) != 0)
+
+    @classmethod
+    def converts(cls, attributesFile: str) -> bool:
+        """
+        Checks whether given attributes file sets any attribute that changes
+        the contents git stores.
+        :param attributesFile: The attributes file.
+        :type attributesFile: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        try:
+            with open(attributesFile, encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return False
+        for line in lines:
+            tokens = line.split()
+            if len(tokens) == 0 or tokens[0].startswith("#"):
+                continue
+            for token in tokens[1:]:
+                if token.lstrip("-!").split("=")[0] in _CONVERSION_ATTRIBUTES:
+                    return True
+        return False
+
+    @classmethod
+    def normalize(cls, path: str) -> str:
+        """
+        Normalizes given path, relative to the repository folder, the way the index stores it.
+        :param path: The path.
+        :type path: str
+        :return: The normalized path, or None if it's outside the working tree.
+        :rtype: str
+        """
+        result = os.path.normpath(path)
+        parts = result.split(os.sep)
+        if os.path.isabs(result) or parts[0] in [".", "..", ".git"]:
+            return None
+        return "/".join(parts)
+
+    @classmethod
+    def unsupported(
+        cls, repoFolder: str, settings: Dict[str, str], paths: List[str]
+    ) -> str:
+        """
+        Checks whether writing the initial commit of given repository directly
+        could end up with anything other than what git commit would create.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :param settings: The settings, as retrieved by settings().
+        :type settings: Dict[str, str]
+        :param paths: The staged paths.
+        :type paths: List[str]
+        :return: Why it's not supported, or None if it is.
+        :rtype: str
+        """
+        git_dir = os.path.join(repoFolder, ".git")
+        for ident in ["GIT_AUTHOR_IDENT", "GIT_COMMITTER_IDENT"]:
+            name, _, email = settings.get(ident, "").partition(" <")
+            # git var -l is lenient, but git commit refuses auto-detected, bogus identities
+            if name.strip() == "" or email.split(">")[0].endswith("(none)"):
+                return f"{ident} is not set"
+        for key, value in settings.items():
+            if key == "extensions.objectformat" and value.lower() != "sha1":
+                return f"objects use {value}"
+            if key == "extensions.refstorage" and value.lower() != "files":
+                return f"refs are stored in {value}"
+            if key.startswith("extensions.") and key not in [
+                "extensions.objectformat",
+                "extensions.refstorage",
+            ]:
+                return f"{key} is set"
+        if cls.is_true(settings.get("commit.gpgsign", None)):
+            return "commits get signed"
+        if "core.hookspath" in settings:
+            return "core.hooksPath is set"
+        hooks = os.path.join(git_dir, "hooks")
+        if os.path.isdir(hooks) and any(
+            [not hook.endswith(".sample") for hook in os.listdir(hooks)]
+        ):
+            return "it has hooks"
+        if settings.get("core.autocrlf", "false").lower() not in ["false", "0", "no", "off"]:
+            return "core.autocrlf is set"
+        attributes_files = [
+            os.path.join(git_dir, "info", "attributes"),
+            settings.get(
+                "core.attributesfile",
+                os.path.join(
+                    os.environ.get(
+                        "XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config")
+                    ),
+                    "git",
+                    "attributes",
+                ),
+            ),
+        ]
+        for path in paths:
+            normalized = cls.normalize(path)
+            if normalized is None:
+                return f"{path} is outside the working tree"
+            try:
+                if not stat.S_ISREG(os.lstat(os.path.join(repoFolder, path)).st_mode):
+                    return f"{path} is not a regular file"
+            except OSError as e:
+                return str(e)
+            if os.path.basename(normalized) == ".gitattributes":
+                attributes_files.append(os.path.join(repoFolder, path))
+        for attributes_file in attributes_files:
+            if cls.converts(os.path.expanduser(attributes_file)):
+                return f"{attributes_file} sets conversion attributes"
+        return None
+
+    @classmethod
+    def write_object(cls, gitDir: str, kind: str, data: bytes) -> str:
+        """
+        Writes given object as a loose object, unless it exists already.
+        :param gitDir: The .git folder.
+        :type gitDir: str
+        :param kind: The type of the object: blob, tree, commit or tag.
+        :type kind: str
+        :param data: Its contents.
+        :type data: bytes
+        :return: Its id.
+        :rtype: str
+        """
+        contents = f"{kind} {len(data)}\0".encode("ascii") + data
+        result = hashlib.sha1(contents).hexdigest()
+        folder = os.path.join(gitDir, "objects", result[:2])
+        path = os.path.join(folder, result[2:])
+        if not os.path.exists(path):
+            os.makedirs(folder, exist_ok=True)
+            temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, "wb") as f:
+                # core.looseCompression defaults to the fastest level
+                f.write(zlib.compress(contents, 1))
+            os.chmod(temp_file, 0o444)
+            os.replace(temp_file, path)
+            with cls._lock:
+                cls._objects += 1
+        return result
+
+    @classmethod
+    def write_tree(cls, gitDir: str, entries: List[tuple]) -> str:
+        """
+        Writes the trees of given index entries.
+        :param gitDir: The .git folder.
+        :type gitDir: str
+        :param entries: The path, mode and blob id of each file.
+        :type entries: List[tuple]
+        :return: The id of the root tree.
+        :rtype: str
+        """
+        root = {}
+        for path, mode, blob in entries:
+            node = root
+            *folders, name = path.split("/")
+            for folder in folders:
+                node = node.setdefault(folder, {})
+            node[name] = (mode, blob)
+
+        def write(node: Dict) -> str:
+            items = []
+            for name, value in node.items():
+                if isinstance(value, dict):
+                    # trees sort as if their names ended with a slash
+                    items.append((f"{name}/", 0o40000, write(value), name))
+                else:
+                    items.append((name, value[0], value[1], name))
+            items.sort(key=lambda item: item[0].encode("utf-8"))
+            return cls.write_object(
+                gitDir,
+                "tree",
+                b"".join(
+                    [
+                        f"{mode:o} {name}\0".encode("utf-8") + bytes.fromhex(id)
+                        for _, mode, id, name in items
+                    ]
+                ),
+            )
+
+        return write(root)
+
+    @classmethod
+    def write_index(cls, gitDir: str, entries: List[tuple]):
+        """
+        Writes the index (version 2) matching given entries, so the working
+        tree shows no changes afterwards.
+        :param gitDir: The .git folder.
+        :type gitDir: str
+        :param entries: The path, mode, blob id and stat result of each file, sorted by path.
+        :type entries: List[tuple]
+        """
+        mask = 0xFFFFFFFF
+        data = b"DIRC" + struct.pack(">II", 2, len(entries))
+        for path, mode, blob, st in entries:
+            name = path.encode("utf-8")
+            entry = (
+                struct.pack(
+                    ">10I",
+                    (st.st_ctime_ns // 1000000000) & mask,
+                    st.st_ctime_ns % 1000000000,
+                    (st.st_mtime_ns // 1000000000) & mask,
+                    st.st_mtime_ns % 1000000000,
+                    st.st_dev & mask,
+                    st.st_ino & mask,
+                    mode,
+                    st.st_uid & mask,
+                    st.st_gid & mask,
+                    st.st_size & mask,
+                )
+                + bytes.fromhex(blob)
+                + struct.pack(">H", min(len(name), 0xFFF))
+                + name
+            )
+            # entries end with one to eight NULs
+            data += entry + b"\0" * (8 - len(entry) % 8)
+        cls.write_locked(
+            os.path.join(gitDir, "index"), data + hashlib.sha1(data).digest()
+        )
+
+    @classmethod
+    def write_locked(cls, path: str, data: bytes):
+        """
+        Writes given file the way git does, through a lock file.
+        :param path: The file.
+        :type path: str
+        :param data: Its contents.
+        :type data: bytes
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = f"{path}.lock"
+        # fails if git itself is writing the file
+        with open(lock_file, "xb") as f:
+            f.write(data)
+        os.replace(lock_file, path)
+
+    @classmethod
+    def ident_now(cls, ident: str, variable: str) -> str:
+        """
+        Updates the timestamp of given identity to the current time, unless
+        it comes from given environment variable.
+        :param ident: The identity, as printed by git var.
+        :type ident: str
+        :param variable: The environment variable with a fixed date.
+        :type variable: str
+        :return: The identity.
+        :rtype: str
+        """
+        if variable in os.environ:
+            return ident
+        now = int(time.time())
+        offset = time.localtime(now).tm_gmtoff
+        sign = "+" if offset >= 0 else "-"
+        offset = abs(offset) // 60
+        name = ident.rsplit(" ", 2)[0]
+        return f"{name} {now} {sign}{offset // 60:02d}{offset % 60:02d}"
+
+    @classmethod
+    def write_commit(
+        cls,
+        repoFolder: str,
+        branch: str,
+        paths: List[str],
+        message: str,
+        settings: Dict[str, str],
+    ) -> str:
+        """
+        Writes the commit of given files, along with the index and the branch.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :param branch: The ref of the unborn branch.
+        :type branch: str
+        :param paths: The files.
+        :type paths: List[str]
+        :param message: The commit message.
+        :type message: str
+        :param settings: The settings, as retrieved by settings().
+        :type settings: Dict[str, str]
+        :return: The id of the commit.
+        :rtype: str
+        """
+        git_dir = os.path.join(repoFolder, ".git")
+        file_mode = cls.is_true(settings.get("core.filemode", "true"))
+        entries = []
+        for path in sorted(
+            set([cls.normalize(path) for path in paths]),
+            key=lambda path: path.encode("utf-8"),
+        ):
+            file = os.path.join(repoFolder, path)
+            with open(file, "rb") as f:
+                contents = f.read()
+                st = os.fstat(f.fileno())
+            mode = 0o100755 if file_mode and st.st_mode & stat.S_IXUSR else 0o100644
+            entries.append(
+                (path, mode, cls.write_object(git_dir, "blob", contents), st)
+            )
+        tree = cls.write_tree(git_dir, [entry[:3] for entry in entries])
+        author = settings["GIT_AUTHOR_IDENT"]
+        committer = settings["GIT_COMMITTER_IDENT"]
+        result = cls.write_object(
+            git_dir,
+            "commit",
+            f"tree {tree}\nauthor {author}\ncommitter {committer}\n\n{message}\n".encode(
+                "utf-8"
+            ),
+        )
+        cls.write_index(git_dir, entries)
+        if cls.is_true(settings.get("core.logallrefupdates", "true")):
+            log = f"{'0' * 40} {result} {committer}\tcommit (initial): {message}\n"
+            for ref in ["HEAD", branch]:
+                path = os.path.join(git_dir, "logs", ref)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(log)
+        cls.write_locked(os.path.join(git_dir, branch), f"{result}\n".encode("ascii"))
+        return result
+
+    @classmethod
+    def write_tag(
+        cls, repoFolder: str, commit: str, name: str, message: str, tagger: str
+    ) -> str:
+        """
+        Writes an annotated tag of given commit, along with its ref.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :param commit: The id of the commit.
+        :type commit: str
+        :param name: The name of the tag.
+        :type name: str
+        :param message: The tag message.
+        :type message: str
+        :param tagger: The identity of the tagger.
+        :type tagger: str
+        :return: The id of the tag.
+        :rtype: str
+        """
+        git_dir = os.path.join(repoFolder, ".git")
+        result = cls.write_object(
+            git_dir,
+            "tag",
+            f"object {commit}\ntype commit\ntag {name}\ntagger {tagger}\n\n{message}\n".encode(
+                "utf-8"
+            ),
+        )
+        cls.write_locked(
+            os.path.join(git_dir, "refs", "tags", name), f"{result}\n".encode("ascii")
+        )
+        return result
+
+    @classmethod
+    async def commit(cls, stagingArea: StagingArea, message: str) -> bool:
+        """
+        Writes the initial commit of the staged files, if the repository is
+        unborn and nothing in it would make git commit behave differently.
+        :param stagingArea: The staging area of the repository.
+        :type stagingArea: pythoneda.tools.artifact.new_domain.StagingArea
+        :param message: The commit message.
+        :type message: str
+        :return: True if the commit was written; False if it's left to git.
+        :rtype: bool
+        """
+        repo_folder = stagingArea.repo_folder
+        paths = stagingArea.paths
+        if not cls.enabled() or len(paths) == 0:
+            return False
+        branch = cls.unborn_branch(os.path.join(repo_folder, ".git"))
+        if branch is None:
+            return False
+        try:
+            settings = await cls.settings(repo_folder)
+        except GitCommandFailed as e:
+            reason = str(e)
+        else:
+            reason = cls.unsupported(repo_folder, settings, paths)
+        if reason is None:
+            try:
+                commit = await TemplateExecutor.run(
+                    cls.write_commit, repo_folder, branch, paths, message, settings
+                )
+            except OSError as e:
+                reason = str(e)
+        if reason is not None:
+            with cls._lock:
+                cls._fallbacks += 1
+            cls.logger().debug(f"Leaving the initial commit of {repo_folder} to git: {reason}")
+            return False
+        stagingArea.drain()
+        with cls._lock:
+            cls._commits += 1
+            # git var instead of git add and git commit
+            cls._spawns_saved += 1
+            cls._pending[repo_folder] = {
+                "commit": commit,
+                "tagger": settings["GIT_COMMITTER_IDENT"],
+                "signed": cls.is_true(settings.get("tag.gpgsign", None))
+                or cls.is_true(settings.get("tag.forcesignannotated", None)),
+            }
+        return True
+
+    @classmethod
+    async def tag(cls, repoFolder: str, name: str, message: str) -> bool:
+        """
+        Writes an annotated tag of the initial commit written by commit().
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :param name: The name of the tag.
+        :type name: str
+        :param message: The tag message.
+        :type message: str
+        :return: True if the tag was written; False if it's left to git.
+        :rtype: bool
+        """
+        with cls._lock:
+            pending = cls._pending.pop(os.path.abspath(repoFolder), None)
+        if (
+            pending is None
+            or pending["signed"]
+            or _TAG_NAME.fullmatch(name) is None
+            or ".." in name
+            or name.endswith(".lock")
+            or os.path.exists(os.path.join(repoFolder, ".git", "refs", "tags", name))
+        ):
+            return False
+        tagger = cls.ident_now(pending["tagger"], "GIT_COMMITTER_DATE")
+        try:
+            await TemplateExecutor.run(
+                cls.write_tag, repoFolder, pending["commit"], name, message, tagger
+            )
+        except OSError as e:
+            with cls._lock:
+                cls._fallbacks += 1
+            cls.logger().debug(f"Leaving the tag {name} of {repoFolder} to git: {e}")
+            return False
+        with cls._lock:
+            cls._tags += 1
+            cls._spawns_saved += 1
+        return True
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the metrics of the initial commits.
+        :return: A dictionary with the number of commits, tags and objects written, the repositories left to git, and the git processes saved.
+        :rtype: Dict
+        """
+        with cls._lock:
+            return {
+                "commits": cls._commits,
+                "tags": cls._tags,
+                "objects": cls._objects,
+                "fallbacks": cls._fallbacks,
+                "spawns-saved": cls._spawns_saved,
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
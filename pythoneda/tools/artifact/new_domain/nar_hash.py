@@ -0,0 +1,227 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/nar_hash.py
+
+This file defines the NarHash class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import base64
+from .git_command import GitCommand
+import hashlib
+import io
+from pythoneda.shared import BaseObject
+import struct
+import tarfile
+from typing import Dict
+
+
+class NarHash(BaseObject):
+    """
+    Computes Nix hashes of source trees locally.
+
+    Class name: NarHash
+
+    Responsibilities:
+        - Serialize a file tree in Nix ARchive (NAR) format.
+        - Compute the sha256 Nix would compute when unpacking a tag tarball, from the local repository.
+        - Encode hashes the way Nix does.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GitCommand
+    """
+
+    _base32_chars = "0123456789abcdfghijklmnpqrsvwxyz"
+
+    @classmethod
+    def to_base32(cls, digest: bytes) -> str:
+        """
+        Encodes given digest in Nix's base-32 format.
+        :param digest: The digest.
+        :type digest: bytes
+        :return: The encoded digest.
+        :rtype: str
+        """
+        length = (len(digest) * 8 - 1) // 5 + 1
+        result = []
+        for n in range(length - 1, -1, -1):
+            bit = n * 5
+            i = bit // 8
+            j = bit % 8
+            c = digest[i] >> j
+            if i + 1 < len(digest):
+                c |= digest[i + 1] << (8 - j)
+            result.append(cls._base32_chars[c & 0x1F])
+        return "".join(result)
+
+    @classmethod
+    def to_sri(cls, digest: bytes) -> str:
+        """
+        Encodes given sha256 digest as a SRI hash.
+        :param digest: The digest.
+        :type digest: bytes
+        :return: The SRI hash.
+        :rtype: str
+        """
+        return f"sha256-{base64.b64encode(digest).decode('ascii')}"
+
+    @classmethod
+    def matches(cls, digest: bytes, hash: str) -> bool:
+        """
+        Checks whether given hash, in any of the formats Nix uses, represents given digest.
+        :param digest: The digest.
+        :type digest: bytes
+        :param hash: The hash, in base-32, hexadecimal or SRI format.
+        :type hash: str
+        :return: True in such case.
+        :rtype: bool
+        """
+        hash = hash.strip()
+        return hash in [cls.to_base32(digest), digest.hex(), cls.to_sri(digest)]
+
+    @classmethod
+    def tree_from_tar(cls, data: bytes) -> Dict:
+        """
+        Builds an in-memory file tree from given tar archive.
+        :param data: The tar archive.
+        :type data: bytes
+        :return: The root directory, as nested dictionaries.
+        :rtype: Dict
+        """
+        root = {"type": "directory", "entries": {}}
+
+        def parent_of(parts):
+            node = root
+            for part in parts:
+                node = node["entries"].setdefault(
+                    part, {"type": "directory", "entries": {}}
+                )
+            return node
+
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:") as archive:
+            for member in archive:
+                name = member.name
+                if name.startswith("./"):
+                    name = name[2:]
+                parts = [part for part in name.split("/") if part not in ["", "."]]
+                if len(parts) == 0:
+                    continue
+                parent = parent_of(parts[:-1])
+                if member.isdir():
+                    parent["entries"].setdefault(
+                        parts[-1], {"type": "directory", "entries": {}}
+                    )
+                elif member.issym():
+                    parent["entries"][parts[-1]] = {
+                        "type": "symlink",
+                        "target": member.linkname,
+                    }
+                elif member.isfile():
+                    parent["entries"][parts[-1]] = {
+                        "type": "regular",
+                        "executable": bool(member.mode & 0o100),
+                        "contents": archive.extractfile(member).read(),
+                    }
+        return root
+
+    @classmethod
+    def _write_string(cls, sink, value: bytes):
+        """
+        Writes a NAR string: its length, the bytes, and the padding.
+        :param sink: The hash being computed.
+        :type sink: hashlib._Hash
+        :param value: The string.
+        :type value: bytes
+        """
+        sink.update(struct.pack("<Q", len(value)))
+        sink.update(value)
+        padding = (8 - len(value) % 8) % 8
+        if padding:
+            sink.update(b"\0" * padding)
+
+    @classmethod
+    def _write_node(cls, sink, node: Dict):
+        """
+        Writes given node in NAR format.
+        :param sink: The hash being computed.
+        :type sink: hashlib._Hash
+        :param node: The node.
+        :type node: Dict
+        """
+        write = lambda value: cls._write_string(sink, value)
+        write(b"(")
+        write(b"type")
+        if node["type"] == "regular":
+            write(b"regular")
+            if node["executable"]:
+                write(b"executable")
+                write(b"")
+            write(b"contents")
+            write(node["contents"])
+        elif node["type"] == "symlink":
+            write(b"symlink")
+            write(b"target")
+            write(node["target"].encode("utf-8"))
+        else:
+            write(b"directory")
+            for name in sorted(node["entries"].keys(), key=lambda n: n.encode("utf-8")):
+                write(b"entry")
+                write(b"(")
+                write(b"name")
+                write(name.encode("utf-8"))
+                write(b"node")
+                cls._write_node(sink, node["entries"][name])
+                write(b")")
+        write(b")")
+
+    @classmethod
+    def of_tree(cls, tree: Dict) -> bytes:
+        """
+        Computes the sha256 of the NAR serialization of given tree.
+        :param tree: The tree.
+        :type tree: Dict
+        :return: The digest.
+        :rtype: bytes
+        """
+        sink = hashlib.sha256()
+        cls._write_string(sink, b"nix-archive-1")
+        cls._write_node(sink, tree)
+        return sink.digest()
+
+    @classmethod
+    async def of_git_ref(cls, repoFolder: str, ref: str) -> bytes:
+        """
+        Computes the hash Nix would compute for the tarball of given ref,
+        from a deterministic archive of the local repository.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :param ref: The ref (a tag, usually).
+        :type ref: str
+        :return: The digest.
+        :rtype: bytes
+        """
+        data = await GitCommand(repoFolder).run_binary("archive", "--format=tar", ref)
+        return cls.of_tree(cls.tree_from_tar(data))
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -19,7 +19,10 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import os
 from pythoneda.shared import EventListener, listen
+from .step_timer import StepTimer
+from .workspace_manager import WorkspaceManager
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryRequested,
     DomainRepositoryChangesCommitted,
@@ -40,8 +43,11 @@ from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryReadmeCreated,
     DomainRepositoryReadmeRequested,
     DomainRepositoryTagRequested,
+    NewDomainCreated,
     NewDomainRequested,
+    PipelineGraph,
 )
+from typing import Dict, List
 
 
 class NewDomain(EventListener):
@@ -58,6 +64,7 @@ class NewDomain(EventListener):
     """
 
     _token = None
+    _git_url = None
 
     def __init__(self):
         """
@@ -77,6 +84,29 @@ class NewDomain(EventListener):
 
         return cls._singleton
 
+    @classmethod
+    def configure(cls, gitUrl: str = None):
+        """
+        Configures the new domains.
+        :param gitUrl: The base url of the repositories (a local folder of bare repositories, for example).
+        :type gitUrl: str
+        """
+        if gitUrl is not None:
+            cls._git_url = gitUrl.rstrip("/")
+
+    @classmethod
+    def git_url(cls) -> str:
+        """
+        Retrieves the base url of the repositories.
+        :return: Such url.
+        :rtype: str
+        """
+        if cls._git_url is None:
+            cls._git_url = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_GIT_URL", "https://github.com"
+            ).rstrip("/")
+        return cls._git_url
+
     @classmethod
     def definition_repository_org_for(cls, org: str) -> str:
         """
@@ -99,59 +129,125 @@ class NewDomain(EventListener):
         """
         return f"{org}-artifact"
 
+    @classmethod
+    def context_for(cls, org: str, name: str) -> Dict:
+        """
+        Retrieves the organizations, urls and version of a new domain.
+        :param org: The organization of the domain repository.
+        :type org: str
+        :param name: The name of the domain.
+        :type name: str
+        :return: The context entries.
+        :rtype: Dict
+        """
+        def_org = cls.definition_repository_org_for(org)
+        artifact_org = cls.artifact_repository_org_for(org)
+        git_url = cls.git_url()
+        return {
+            "def-org": def_org,
+            "artifact-org": artifact_org,
+            "url": f"{git_url}/{org}/{name}",
+            "def-url": f"{git_url}/{def_org}/{name}",
+            "version": "0.0.0",
+            "artifact-url": f"{git_url}/{artifact_org}/{name}",
+        }
+
     @classmethod
     @listen(NewDomainRequested)
     async def listen_NewDomainRequested(
         cls, event: NewDomainRequested
-    ) -> DomainRepositoryRequested:
+    ) -> List:
         """
         Creates a new domain upon receiving a NewDomainRequested event.
+        Unless disabled, the definition repository is provisioned at the same
+        time as the domain one: only its sha256 needs the domain repository
+        to be pushed.
+        :param event: The trigger event.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainRequested
+        :return: The events requesting the repositories, unless they have been dispatched concurrently already.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        return await PipelineGraph.fan_out(await cls.repositories_for(event))
+
+    @classmethod
+    @StepTimer.step
+    async def repositories_for(cls, event: NewDomainRequested) -> List:
+        """
+        Builds the events requesting the repositories of a new domain.
         :param event: The trigger event.
         :type event: pythoneda.tools.artifact.new_domain.events.NewDomainRequested
-        :return: The event representing the new domain has been created, or None if the process failed.
-        :rtype: pythoneda.tools.artifact.new_domain.events.DomainRepositoryRequested
-        """
-        def_org = cls.definition_repository_org_for(event.org)
-        artifact_org = cls.artifact_repository_org_for(event.org)
-        event.context["def-org"] = def_org
-        event.context["artifact-org"] = artifact_org
-        event.context["url"] = f"https://github.com/{event.org}/{event.name}"
-        event.context["def-url"] = f"https://github.com/{def_org}/{event.name}"
-        event.context["version"] = "0.0.0"
-        event.context[
-            "artifact-url"
-        ] = f"https://github.com/{artifact_org}/{event.name}"
-        return DomainRepositoryRequested(
-            event.org,
-            event.name,
-            event.description,
-            event.package,
-            event.github_token,
-            event.gpg_key_id,
-            event.context,
-        )
+        :return: The events requesting the domain repository and, if speculative, the definition repository.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        event.context["run-id"] = StepTimer.run_id_of(event)
+        event.context.update(cls.context_for(event.org, event.name))
+        result = [
+            DomainRepositoryRequested(
+                event.org,
+                event.name,
+                event.description,
+                event.package,
+                event.github_token,
+                event.gpg_key_id,
+                event.context,
+            )
+        ]
+        if event.context.get("speculative-definition", True):
+            result.append(
+                DefinitionRepositoryRequested(
+                    event.org,
+                    event.name,
+                    event.description,
+                    event.package,
+                    event.github_token,
+                    event.gpg_key_id,
+                    event.context,
+                )
+            )
+        return result
 
     @classmethod
     @listen(DomainRepositoryChangesPushed)
+    @StepTimer.step
     async def listen_DomainRepositoryChangesPushed(
         cls, event: DomainRepositoryChangesPushed
-    ) -> DefinitionRepositoryRequested:
+    ) -> List:
         """
-        Pushes the changes in the domain repository.
+        Provisions the definition repository, now that the domain one has pushed its changes,
+        unless it's been provisioned at the same time.
+        The steps of the definition repository waiting for the push are triggered by the event itself.
         :param event: The trigger event.
-        :type event: pythoneda.tools.artifact.new_domain.events.DomainRepositoryChangesTagged
-        :return: The event representing a request to push the changes.
-        :rtype: pythoneda.tools.artifact.new_domain.events.DomainRepositoryPushRequested
-        """
-        return DefinitionRepositoryRequested(
-            event.org,
-            event.name,
-            event.description,
-            event.package,
-            event.github_token,
-            event.gpg_key_id,
-            event.context,
-        )
+        :type event: pythoneda.tools.artifact.new_domain.events.DomainRepositoryChangesPushed
+        :return: The event requesting the definition repository, if not provisioned yet.
+        :rtype: List[pythoneda.tools.artifact.new_domain.events.NewDomainEvent]
+        """
+        result = []
+        if not event.context.get("speculative-definition", True):
+            result.append(
+                DefinitionRepositoryRequested(
+                    event.org,
+                    event.name,
+                    event.description,
+                    event.package,
+                    event.github_token,
+                    event.gpg_key_id,
+                    event.context,
+                )
+            )
+        return result
+
+    @classmethod
+    @listen(NewDomainCreated)
+    @StepTimer.final_step
+    async def listen_NewDomainCreated(cls, event: NewDomainCreated):
+        """
+        Marks the pipeline as completed, and releases its workspaces.
+        :param event: The trigger event.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainCreated
+        """
+        event.context["new-domain-created"] = True
+        for workspace in event.context.pop("workspaces", []):
+            WorkspaceManager.release(workspace)
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,162 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/new_domain_batch.py
+
+This file defines the NewDomainBatch class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from .event_log import EventLog
+from pythoneda.shared import BaseObject
+from pythoneda.tools.artifact.new_domain.events import NewDomainRequested
+from .step_timer import StepTimer
+from .workspace_manager import WorkspaceManager
+import time
+from typing import Awaitable, Callable, Dict, List
+
+
+class NewDomainBatch(BaseObject):
+    """
+    Runs several new-domain pipelines at once, under a concurrency limit.
+
+    Class name: NewDomainBatch
+
+    Responsibilities:
+        - Drive many NewDomainRequested pipelines concurrently.
+        - Never run more pipelines at once than the configured limit.
+        - Keep track of the outcome and duration of each pipeline.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.events.NewDomainRequested
+        - pythoneda.tools.artifact.new_domain.NewDomain: Marks each pipeline as completed.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[NewDomainRequested], Awaitable],
+        concurrency: int = 4,
+    ):
+        """
+        Creates a new NewDomainBatch instance.
+        :param handler: The coroutine function that runs a whole pipeline.
+        :type handler: Callable[[pythoneda.tools.artifact.new_domain.events.NewDomainRequested], Awaitable]
+        :param concurrency: The maximum number of pipelines running at once.
+        :type concurrency: int
+        """
+        super().__init__()
+        self._handler = handler
+        self._concurrency = max(1, concurrency)
+
+    @property
+    def concurrency(self) -> int:
+        """
+        Retrieves the maximum number of pipelines running at once.
+        :return: Such limit.
+        :rtype: int
+        """
+        return self._concurrency
+
+    async def run(self, events: List[NewDomainRequested]) -> List[Dict]:
+        """
+        Runs the pipelines of given events.
+        :param events: The NewDomainRequested events.
+        :type events: List[pythoneda.tools.artifact.new_domain.events.NewDomainRequested]
+        :return: The outcome of each pipeline, in the same order.
+        :rtype: List[Dict]
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(event: NewDomainRequested) -> Dict:
+            async with semaphore:
+                return await self.run_pipeline(event)
+
+        return await asyncio.gather(*[run_one(event) for event in events])
+
+    async def run_pipeline(self, event: NewDomainRequested) -> Dict:
+        """
+        Runs the pipeline of given event.
+        :param event: The NewDomainRequested event.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainRequested
+        :return: The outcome of the pipeline.
+        :rtype: Dict
+        """
+        error = None
+        start = time.monotonic()
+        try:
+            await self._handler(event)
+        except Exception as e:
+            NewDomainBatch.logger().error(
+                f"Pipeline for {event.org}/{event.name} failed: {e}"
+            )
+            error = str(e)
+        finally:
+            # Failed pipelines never reach NewDomainCreated
+            workspaces = event.context.pop("workspaces", [])
+            if workspaces and EventLog.enabled():
+                NewDomainBatch.logger().info(
+                    f"Keeping {', '.join(workspaces)} to resume {event.context.get('run-id', event.id)}"
+                )
+                for workspace in workspaces:
+                    WorkspaceManager.keep(workspace)
+            else:
+                for workspace in workspaces:
+                    WorkspaceManager.release(workspace)
+            StepTimer.finish(event.context.get("run-id", event.id))
+        elapsed = time.monotonic() - start
+        succeeded = error is None and event.context.get("new-domain-created", False)
+        if not succeeded and error is None:
+            error = "the pipeline stopped before creating the domain"
+        return {
+            "org": event.org,
+            "name": event.name,
+            "succeeded": succeeded,
+            "elapsed": elapsed,
+            "error": error,
+        }
+
+    @classmethod
+    def summary(cls, results: List[Dict]) -> str:
+        """
+        Builds a human-readable summary of given results.
+        :param results: The outcome of each pipeline.
+        :type results: List[Dict]
+        :return: The summary.
+        :rtype: str
+        """
+        lines = []
+        for result in results:
+            status = "OK    " if result["succeeded"] else "FAILED"
+            line = f"{status} {result['org']}/{result['name']} ({result['elapsed']:.2f}s)"
+            if result["error"]:
+                line = f"{line}: {result['error']}"
+            lines.append(line)
+        succeeded = len([result for result in results if result["succeeded"]])
+        total = sum([result["elapsed"] for result in results])
+        lines.append(
+            f"{succeeded}/{len(results)} domains created ({total:.2f}s of pipeline time)"
+        )
+        return "\n".join(lines)
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,214 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/new_domain_daemon.py
+
+This file defines the NewDomainDaemon class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from .github_client import GithubClientPool
+from .github_rate_limiter import GithubRateLimiter
+from .initial_commit import InitialCommit
+from pythoneda.shared import BaseObject
+from pythoneda.tools.artifact.new_domain.events import NewDomainRequested
+from .new_domain_batch import NewDomainBatch
+from .skeleton_cache import SkeletonCache
+from .staging_area import StagingArea
+from .template_executor import TemplateExecutor
+from .workspace_manager import WorkspaceManager
+import time
+from typing import Awaitable, Callable, Dict
+
+
+class NewDomainDaemon(BaseObject):
+    """
+    Runs new-domain pipelines as they are requested, on a bounded pool of workers.
+
+    Class name: NewDomainDaemon
+
+    Responsibilities:
+        - Queue the NewDomainRequested events, up to a limit.
+        - Reject, or slow down, producers when the queue is full.
+        - Run the queued pipelines, never more at once than the number of workers.
+        - Report the queue depth, the pipelines in flight, and their outcome.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewDomainBatch: Runs each pipeline.
+        - pythoneda.tools.artifact.new_domain.application.NewDomainApp: Submits the events.
+    """
+
+    _backpressure_modes = ["wait", "reject"]
+
+    def __init__(
+        self,
+        handler: Callable[[NewDomainRequested], Awaitable],
+        workers: int = 4,
+        queueSize: int = 64,
+        backpressure: str = "wait",
+    ):
+        """
+        Creates a new NewDomainDaemon instance.
+        :param handler: The coroutine function that runs a whole pipeline.
+        :type handler: Callable[[pythoneda.tools.artifact.new_domain.events.NewDomainRequested], Awaitable]
+        :param workers: The number of pipelines running at once.
+        :type workers: int
+        :param queueSize: The maximum number of pipelines waiting for a worker.
+        :type queueSize: int
+        :param backpressure: What to do when the queue is full: "wait" blocks the producer until there's room, "reject" refuses the request.
+        :type backpressure: str
+        """
+        super().__init__()
+        if backpressure not in self.__class__._backpressure_modes:
+            raise ValueError(f"Unknown backpressure mode: {backpressure}")
+        self._batch = NewDomainBatch(handler, workers)
+        self._workers = max(1, workers)
+        self._queue_size = max(1, queueSize)
+        self._backpressure = backpressure
+        self._queue = None
+        self._tasks = []
+        self._in_flight = 0
+        self._accepted = 0
+        self._rejected = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._waited = 0.0
+        self._started = None
+
+    @property
+    def backpressure(self) -> str:
+        """
+        Retrieves what to do when the queue is full.
+        :return: Either "wait" or "reject".
+        :rtype: str
+        """
+        return self._backpressure
+
+    @property
+    def running(self) -> bool:
+        """
+        Checks whether the workers are running.
+        :return: True in such case.
+        :rtype: bool
+        """
+        return len(self._tasks) > 0
+
+    def start(self):
+        """
+        Starts the workers. It must be called from the event loop.
+        """
+        if self.running:
+            return
+        self._queue = asyncio.Queue(self._queue_size)
+        self._started = time.monotonic()
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"new-domain-worker-{index}")
+            for index in range(self._workers)
+        ]
+
+    async def submit(self, event: NewDomainRequested) -> bool:
+        """
+        Queues given event.
+        :param event: The NewDomainRequested event.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainRequested
+        :return: False if the queue was full and the event got rejected.
+        :rtype: bool
+        """
+        if not self.running:
+            raise RuntimeError("The daemon is not running")
+        if self._backpressure == "reject":
+            try:
+                self._queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._rejected += 1
+                return False
+        else:
+            start = time.monotonic()
+            await self._queue.put(event)
+            self._waited += time.monotonic() - start
+        self._accepted += 1
+        return True
+
+    async def _work(self):
+        """
+        Runs queued pipelines, one at a time, until cancelled.
+        """
+        while True:
+            event = await self._queue.get()
+            self._in_flight += 1
+            try:
+                result = await self._batch.run_pipeline(event)
+                if result["succeeded"]:
+                    self._succeeded += 1
+                else:
+                    self._failed += 1
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def stop(self, drain: bool = True):
+        """
+        Stops the workers.
+        :param drain: Whether to run the queued pipelines first.
+        :type drain: bool
+        """
+        if not self.running:
+            return
+        if drain:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict:
+        """
+        Retrieves the daemon metrics.
+        :return: A dictionary with the queue depth and limit, the pipelines in flight, the number of workers, the requests accepted and rejected, the pipelines succeeded and failed, the time producers spent waiting for room in the queue, the uptime, in seconds, the GitHub rate-limit metrics, the template rendering metrics, the files materialized from the skeleton cache, and the initial commits written directly.
+        :rtype: Dict
+        """
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue-size": self._queue_size,
+            "in-flight": self._in_flight,
+            "workers": self._workers,
+            "backpressure": self._backpressure,
+            "accepted": self._accepted,
+            "rejected": self._rejected,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "waited": self._waited,
+            "uptime": (
+                time.monotonic() - self._started if self._started is not None else 0.0
+            ),
+            "github": GithubRateLimiter.stats(),
+            "github-api": GithubClientPool.stats(),
+            "render": TemplateExecutor.stats(),
+            "skeletons": SkeletonCache.stats(),
+            "commits": InitialCommit.stats(),
+            "staging": StagingArea.stats(),
+            "workspaces": WorkspaceManager.stats(),
+        }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -19,11 +19,16 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import hashlib
 import os
 from pathlib import Path
 from pythoneda.shared import attribute, Entity, EventReference
-from stringtemplate3 import PathGroupLoader, StringTemplateGroup
-from typing import Dict
+import shutil
+from .skeleton_cache import SkeletonCache
+from .template_compiler import TemplateCompiler
+from .template_executor import TemplateExecutor
+import threading
+from typing import Dict, List
 
 
 class NewFileFromTemplate(Entity):
@@ -34,6 +39,7 @@ class NewFileFromTemplate(Entity):
 
     Responsibilities:
         - Know how to create a new file from a templates.
+        - Leave the file untouched if its contents wouldn't change.
 
     Collaborators:
         - None
@@ -72,6 +78,7 @@ class NewFileFromTemplate(Entity):
         self._output_file = outputFile
         self._root_template = rootTemplate
         self._template_subfolder = templateSubfolder
+        self._changed = None
         super().__init__(eventHistory=eventHistory)
 
     @property
@@ -152,6 +159,15 @@ class NewFileFromTemplate(Entity):
         """
         return self._output_file
 
+    @property
+    def changed(self) -> bool:
+        """
+        Checks whether the last generation wrote the file, or left it as it was.
+        :return: True if the file was written, None if it hasn't been generated yet.
+        :rtype: bool
+        """
+        return self._changed
+
     @property
     def root_template(self) -> str:
         """
@@ -161,6 +177,19 @@ class NewFileFromTemplate(Entity):
         """
         return self._root_template
 
+    def render(self) -> str:
+        """
+        Renders the contents of the file, without writing it.
+        :return: The contents.
+        :rtype: str
+        """
+        return self.render_template(
+            self.template_name,
+            self.template_group,
+            Path(self.__class__.templates_folder()) / self.template_subfolder,
+            self.root_template,
+        )
+
     async def generate(self, outputFolder: str) -> str:
         """
         Generates the file from a template.
@@ -169,7 +198,7 @@ class NewFileFromTemplate(Entity):
         :return: The generated file.
         :rtype: str
         """
-        await self.process_template(
+        self._changed = await self.process_template(
             outputFolder,
             self.template_name,
             self.template_group,
@@ -179,6 +208,31 @@ class NewFileFromTemplate(Entity):
         )
         return Path(outputFolder) / self.output_file
 
+    def render_template(
+        self,
+        templateName: str,
+        templateGroup: str,
+        templateFolder: str,
+        rootTemplate: str,
+    ) -> str:
+        """
+        Renders a template.
+        :param templateName: The name of the stringtemplate template.
+        :type templateName: str
+        :param templateGroup: The name of the stringtemplate group.
+        :type templateGroup: str
+        :param templateFolder: The subfolder with the templates.
+        :type templateFolder: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :return: The rendered contents.
+        :rtype: str
+        """
+        # The parsed group, and the compiled template if enabled, are shared process-wide
+        return TemplateCompiler.render(
+            templateFolder, templateName, templateGroup, rootTemplate, templateName, self
+        )
+
     async def process_template(
         self,
         outputFolder: str,
@@ -202,21 +256,93 @@ class NewFileFromTemplate(Entity):
         :type rootTemplate: str
         :param outputFileName: The name of the generated file.
         :type outputFileName: str
+        :return: True if the file was written; False if it already had such contents.
+        :rtype: bool
         """
-        # Manually read the .stg file
-        with open(
-            Path(templateFolder) / f"{templateName}.stg", "r", encoding="utf-8"
-        ) as f:
-            # Create a group from the string content
-            group = StringTemplateGroup(
-                name=templateGroup, file=f, rootDir=str(templateFolder)
-            )
+        # Rendering and writing would block every other pipeline on the event loop
+        return await TemplateExecutor.run(
+            self.render_to,
+            Path(outputFolder) / outputFileName,
+            templateName,
+            templateGroup,
+            templateFolder,
+            rootTemplate,
+        )
 
-            root = group.getInstanceOf(rootTemplate)
-            root[templateName] = self
+    def render_to(
+        self,
+        path: str,
+        templateName: str,
+        templateGroup: str,
+        templateFolder: str,
+        rootTemplate: str,
+    ) -> bool:
+        """
+        Renders a template into given file, synchronously.
+        :param path: The file.
+        :type path: str
+        :param templateName: The name of the stringtemplate template.
+        :type templateName: str
+        :param templateGroup: The name of the stringtemplate group.
+        :type templateGroup: str
+        :param templateFolder: The subfolder with the templates.
+        :type templateFolder: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :return: True if the file was written; False if it already had such contents.
+        :rtype: bool
+        """
+        # Files that are the same for every domain come from the store
+        result = SkeletonCache.materialize(
+            path, templateFolder, templateName, templateGroup, rootTemplate, self
+        )
+        if result is not None:
+            return result
+        contents = self.render_template(
+            templateName, templateGroup, templateFolder, rootTemplate
+        )
+        return self.__class__.write_if_changed(path, contents)
 
-        with open(Path(outputFolder) / outputFileName, "w") as output_file:
-            output_file.write(str(root))
+    @classmethod
+    def write_if_changed(cls, path: str, contents: str) -> bool:
+        """
+        Writes given contents, unless the file already has them, so its
+        modification time is preserved. The file is replaced atomically,
+        keeping its mode.
+        :param path: The file.
+        :type path: str
+        :param contents: The contents.
+        :type contents: str
+        :return: True if the file was written.
+        :rtype: bool
+        """
+        data = contents.encode("utf-8")
+        try:
+            if os.path.getsize(path) == len(data):
+                with open(path, "rb") as existing_file:
+                    if (
+                        hashlib.sha256(existing_file.read()).digest()
+                        == hashlib.sha256(data).digest()
+                    ):
+                        return False
+        except OSError:
+            pass
+        # Replace the file, rather than rewriting it, since it may be a hardlink
+        temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_file, "wb") as output_file:
+                output_file.write(data)
+            try:
+                shutil.copymode(path, temp_file)
+            except FileNotFoundError:
+                pass
+            os.replace(temp_file, path)
+        finally:
+            try:
+                os.unlink(temp_file)
+            except FileNotFoundError:
+                pass
+        return True
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .push_repository import PushRepository
 from pythoneda.shared import listen
+from .step_timer import StepTimer
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryChangesPushed,
     DefinitionRepositoryPushRequested,
@@ -63,6 +64,7 @@ class PushDefinitionRepository(PushRepository):
 
     @classmethod
     @listen(DefinitionRepositoryPushRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryPushRequested(
         cls, event: DefinitionRepositoryPushRequested
     ) -> DefinitionRepositoryChangesPushed:
@@ -73,7 +75,13 @@ class PushDefinitionRepository(PushRepository):
         :return: The event representing the changes have been pushed.
         :rtype: pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryChangesPushed
         """
-        await cls.push(event.context["def-repo-folder"], "main", "origin")
+        await cls.push(
+            event.context["def-repo-folder"],
+            "main",
+            "origin",
+            event.github_token,
+            event.context["version"],
+        )
         return DefinitionRepositoryChangesPushed(
             event.org,
             event.name,
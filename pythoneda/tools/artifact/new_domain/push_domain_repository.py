@@ -21,6 +21,7 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from .push_repository import PushRepository
 from pythoneda.shared import listen
+from .step_timer import StepTimer
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryChangesPushed,
     DomainRepositoryPushRequested,
@@ -63,6 +64,7 @@ class PushDomainRepository(PushRepository):
 
     @classmethod
     @listen(DomainRepositoryPushRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryPushRequested(
         cls, event: DomainRepositoryPushRequested
     ) -> DomainRepositoryChangesPushed:
@@ -73,7 +75,13 @@ class PushDomainRepository(PushRepository):
         :return: The event representing the changes have been pushed.
         :rtype: pythoneda.tools.artifact.new_domain.events.DomainRepositoryChangesPushed
         """
-        await cls.push(event.context["repo-folder"], "main", "origin")
+        await cls.push(
+            event.context["repo-folder"],
+            "main",
+            "origin",
+            event.github_token,
+            event.context["version"],
+        )
         return DomainRepositoryChangesPushed(
             event.org,
             event.name,
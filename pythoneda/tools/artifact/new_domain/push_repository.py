@@ -20,8 +20,11 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import abc
+from .git_command import GitCommand, GitCommandFailed
+from .github_rate_limiter import GithubRateLimiter
 from pythoneda.shared import EventListener
 from pythoneda.shared.git import GitPush
+from .step_timer import StepTimer
 
 
 class PushRepository(EventListener, abc.ABC):
@@ -32,12 +35,15 @@ class PushRepository(EventListener, abc.ABC):
 
     Responsibilities:
         - Know the steps required to do a git push in the domain repository.
+        - Push the branch and its tag atomically, in a single round-trip.
 
     Collaborators:
         - pythoneda.shared.EventListener
+        - pythoneda.tools.artifact.new_domain.GitCommand: Runs the atomic push.
     """
 
     _token = None
+    _atomic = True
 
     def __init__(self):
         """
@@ -46,19 +52,62 @@ class PushRepository(EventListener, abc.ABC):
         super().__init__()
 
     @classmethod
-    async def push(cls, repoFolder: str, branch: str = "main", remote: str = "origin"):
+    def configure(cls, atomic: bool = None):
         """
-        Pushes the changes in the domain repository.
+        Configures the pushes.
+        :param atomic: Whether the branch and the tag are pushed together, atomically.
+        :type atomic: bool
+        """
+        if atomic is not None:
+            cls._atomic = atomic
+
+    @classmethod
+    async def push(
+        cls,
+        repoFolder: str,
+        branch: str = "main",
+        remote: str = "origin",
+        githubToken: str = None,
+        tag: str = None,
+    ):
+        """
+        Pushes the changes in the domain repository, as GitHub's rate limits allow.
+        The branch and given tag are pushed at once, with --atomic, so the remote
+        never gets one without the other. Without a tag, or if the remote doesn't
+        support atomic pushes, the branch and all tags are pushed one after the other.
         :param repoFolder: The repository folder.
         :type repoFolder: str
         :param branch: The local branch.
         :type branch: str
         :param remote: The name of the remote.
         :type remote: str
+        :param githubToken: The github token the rate limits apply to.
+        :type githubToken: str
+        :param tag: The tag to push along with the branch.
+        :type tag: str
         """
-        git_push = GitPush(repoFolder)
-        await git_push.push_branch(branch, remote)
-        await git_push.push_tags()
+        async with StepTimer.span("network"):
+            if cls._atomic and tag is not None:
+                git = GitCommand(repoFolder)
+                try:
+                    await GithubRateLimiter.run(
+                        githubToken,
+                        lambda: git.run(
+                            "push", "--atomic", remote, branch, f"refs/tags/{tag}"
+                        ),
+                    )
+                    return
+                except GitCommandFailed as e:
+                    if "does not support --atomic" not in e.stderr:
+                        raise
+                    cls.logger().info(
+                        f"{remote} doesn't support atomic pushes; pushing {branch} and {tag} separately"
+                    )
+            git_push = GitPush(repoFolder)
+            await GithubRateLimiter.run(
+                githubToken, lambda: git_push.push_branch(branch, remote)
+            )
+            await GithubRateLimiter.run(githubToken, git_push.push_tags)
 
 
 # vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
@@ -0,0 +1,185 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/scaffold_preview.py
+
+This file defines the ScaffoldPreview class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import datetime
+from .definition_nix_flake import DefinitionNixFlake
+from .definition_readme import DefinitionReadme
+from .domain_readme import DomainReadme
+from .gitattributes import Gitattributes
+from .gitignore import Gitignore
+from .init import Init
+from .new_domain import NewDomain
+from pythoneda.shared import BaseObject
+from .pyprojecttoml_template import PyprojecttomlTemplate
+from typing import Dict, TextIO
+
+
+class ScaffoldPreview(BaseObject):
+    """
+    Renders the files of a new domain in memory, without touching GitHub, git or nix.
+
+    Class name: ScaffoldPreview
+
+    Responsibilities:
+        - Render every generated file of the domain and definition repositories.
+        - Stream the rendered files.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewDomain: Provides the urls of the repositories.
+        - pythoneda.tools.artifact.new_domain.NewFileFromTemplate: Renders each file.
+        - pythoneda.tools.artifact.new_domain.DefinitionNixFlake: Renders flake.nix.
+    """
+
+    @classmethod
+    def domain_files(
+        cls, org: str, name: str, description: str, package: str, context: Dict
+    ) -> Dict[str, str]:
+        """
+        Renders the files of the domain repository.
+        :param org: The organization.
+        :type org: str
+        :param name: The name of the domain.
+        :type name: str
+        :param description: A brief description of the domain.
+        :type description: str
+        :param package: The Python package.
+        :type package: str
+        :param context: The organizations and urls of the repositories.
+        :type context: Dict
+        :return: The contents of each file, by path.
+        :rtype: Dict[str, str]
+        """
+        result = {
+            ".gitignore": Gitignore().render(),
+            ".gitattributes": Gitattributes(
+                context["def-url"], context["artifact-url"]
+            ).render(),
+            "README.md": DomainReadme(
+                org,
+                name,
+                description,
+                package,
+                context["def-org"],
+                context["url"],
+                context["def-url"],
+            ).render(),
+        }
+        year = datetime.datetime.now().year
+        subfolders = package.split(".")
+        for index in range(len(subfolders)):
+            relative_folder = "/".join(subfolders[: index + 1])
+            result[f"{relative_folder}/__init__.py"] = Init(
+                org,
+                name,
+                ".".join(subfolders[: index + 1]),
+                relative_folder,
+                year,
+            ).render()
+        return result
+
+    @classmethod
+    def definition_files(
+        cls, org: str, name: str, description: str, package: str, context: Dict
+    ) -> Dict[str, str]:
+        """
+        Renders the files of the definition repository.
+        flake.lock is not included, since resolving it requires nix.
+        :param org: The organization.
+        :type org: str
+        :param name: The name of the domain.
+        :type name: str
+        :param description: A brief description of the domain.
+        :type description: str
+        :param package: The Python package.
+        :type package: str
+        :param context: The organizations, urls and version of the repositories.
+        :type context: Dict
+        :return: The contents of each file, by path.
+        :rtype: Dict[str, str]
+        """
+        flake = DefinitionNixFlake(
+            org, name, description, package, context["url"], context["version"]
+        )
+        return {
+            "README.md": DefinitionReadme(
+                org,
+                name,
+                description,
+                package,
+                context["def-org"],
+                context["url"],
+                context["def-url"],
+            ).render(),
+            "flake.nix": flake.render(),
+            "pyprojecttoml.template": PyprojecttomlTemplate(flake).render(),
+        }
+
+    @classmethod
+    def render(
+        cls, org: str, name: str, description: str, package: str
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Renders the files of both repositories of a new domain.
+        :param org: The organization.
+        :type org: str
+        :param name: The name of the domain.
+        :type name: str
+        :param description: A brief description of the domain.
+        :type description: str
+        :param package: The Python package.
+        :type package: str
+        :return: The files of the "domain" and "definition" repositories, by path.
+        :rtype: Dict[str, Dict[str, str]]
+        """
+        context = NewDomain.context_for(org, name)
+        return {
+            "domain": cls.domain_files(org, name, description, package, context),
+            "definition": cls.definition_files(
+                org, name, description, package, context
+            ),
+        }
+
+    @classmethod
+    def stream(cls, files: Dict[str, Dict[str, str]], output: TextIO, prefix: str = ""):
+        """
+        Writes rendered files to given stream, each one preceded by its path.
+        :param files: The files of each repository, by path.
+        :type files: Dict[str, Dict[str, str]]
+        :param output: The stream.
+        :type output: TextIO
+        :param prefix: A prefix for the paths.
+        :type prefix: str
+        """
+        for repository, contents in files.items():
+            for path, content in contents.items():
+                output.write(f"==> {prefix}{repository}/{path} <==\n")
+                output.write(content)
+                if not content.endswith("\n"):
+                    output.write("\n")
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
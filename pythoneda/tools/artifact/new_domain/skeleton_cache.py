@@ -0,0 +1,282 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/skeleton_cache.py
+
+This file defines the SkeletonCache class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import errno
+import fcntl
+import hashlib
+import os
+from pythoneda.shared import BaseObject
+import shutil
+from .template_compiler import TemplateCompiler
+import threading
+from typing import Any, Dict
+from .workspace_manager import WorkspaceManager
+
+# ioctl request to share the extents of a file (Btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+
+
+class SkeletonCache(BaseObject):
+    """
+    Content-addressed store of the files whose contents don't depend on the domain.
+
+    Class name: SkeletonCache
+
+    Responsibilities:
+        - Render templates whose output doesn't depend on their values only once.
+        - Store their output by its sha256, read-only.
+        - Materialize stored files into workspaces by reflink or copy, or by hardlink if asked to.
+        - Keep track of the time saved by not rendering them.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.TemplateCompiler: Tells which templates are static.
+        - pythoneda.tools.artifact.new_domain.NewFileFromTemplate: Generates its files through it.
+        - pythoneda.tools.artifact.new_domain.WorkspaceManager: Its root is the default location of the store, which it evicts.
+    """
+
+    _folder = None
+    _enabled = True
+    _hardlinks = False
+    _lock = threading.Lock()
+    _hits = 0
+    _unchanged = 0
+    _links = 0
+    _reflinks = 0
+    _copies = 0
+    _saved_time = 0.0
+
+    @classmethod
+    def configure(
+        cls, folder: str = None, enabled: bool = None, hardlinks: bool = None
+    ):
+        """
+        Configures the store.
+        :param folder: The folder of the stored files.
+        :type folder: str
+        :param enabled: Whether static files are materialized from the store.
+        :type enabled: bool
+        :param hardlinks: Whether stored files are hardlinked into workspaces, sharing their read-only inode.
+        :type hardlinks: bool
+        """
+        if folder is not None:
+            cls._folder = folder
+        if enabled is not None:
+            cls._enabled = enabled
+        if hardlinks is not None:
+            cls._hardlinks = hardlinks
+
+    @classmethod
+    def folder(cls) -> str:
+        """
+        Retrieves the folder of the stored files. By default, it lives next to
+        the workspaces, so files can be hardlinked or reflinked into them.
+        :return: Such folder.
+        :rtype: str
+        """
+        if cls._folder is None:
+            cls._folder = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_SKELETONS",
+                os.path.join(WorkspaceManager.root(), ".skeletons"),
+            )
+            WorkspaceManager.add_store(cls._folder)
+        return cls._folder
+
+    @classmethod
+    def store(cls, contents: bytes) -> str:
+        """
+        Stores given contents, unless they are stored already.
+        :param contents: The contents.
+        :type contents: bytes
+        :return: The stored file.
+        :rtype: str
+        """
+        result = os.path.join(cls.folder(), hashlib.sha256(contents).hexdigest())
+        try:
+            if os.path.getsize(result) == len(contents):
+                # files not used for a while get evicted
+                os.utime(result)
+                return result
+        except OSError:
+            pass
+        os.makedirs(cls.folder(), exist_ok=True)
+        temp_file = f"{result}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file, "wb") as f:
+            f.write(contents)
+        # hardlinked copies must never be modified in place
+        os.chmod(temp_file, 0o444)
+        os.replace(temp_file, result)
+        return result
+
+    @classmethod
+    def reflink(cls, source: str, target: str):
+        """
+        Creates a copy of given file sharing its extents, if the file system supports it.
+        :param source: The file.
+        :type source: str
+        :param target: The copy.
+        :type target: str
+        """
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.remove(target)
+                raise
+
+    @classmethod
+    def link(cls, source: str, target: str):
+        """
+        Replaces given target with a hardlink (if enabled), a reflink or a
+        copy of given file, trying them in this order. Reflinks and copies
+        are writable, and never change the stored file.
+        :param source: The stored file.
+        :type source: str
+        :param target: The file in the workspace.
+        :type target: str
+        """
+        temp_file = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        method = None
+        if cls._hardlinks:
+            try:
+                os.link(source, temp_file)
+                method = "_links"
+            except OSError as e:
+                if e.errno not in [
+                    errno.EXDEV,
+                    errno.EPERM,
+                    errno.EMLINK,
+                    errno.ENOTSUP,
+                ]:
+                    raise
+        if method is None:
+            try:
+                cls.reflink(source, temp_file)
+                method = "_reflinks"
+            except OSError:
+                shutil.copyfile(source, temp_file)
+                method = "_copies"
+            os.chmod(temp_file, 0o644)
+        os.replace(temp_file, target)
+        with cls._lock:
+            setattr(cls, method, getattr(cls, method) + 1)
+
+    @classmethod
+    def has_contents(cls, path: str, stored: str, contents: bytes) -> bool:
+        """
+        Checks whether given file already has given contents.
+        :param path: The file.
+        :type path: str
+        :param stored: The stored file with such contents.
+        :type stored: str
+        :param contents: The contents.
+        :type contents: bytes
+        :return: True in such case.
+        :rtype: bool
+        """
+        if not os.path.exists(path):
+            return False
+        if os.path.samefile(stored, path):
+            return True
+        if os.path.getsize(path) != len(contents):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == contents
+
+    @classmethod
+    def materialize(
+        cls,
+        path: str,
+        templateFolder: str,
+        templateName: str,
+        templateGroup: str,
+        rootTemplate: str,
+        value: Any,
+    ) -> bool:
+        """
+        Creates given file from the store, if its template is static.
+        :param path: The file.
+        :type path: str
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :param value: The value the template is rendered with.
+        :type value: Any
+        :return: True if the file was written, False if it already had such contents, or None if the template is not static.
+        :rtype: bool
+        """
+        if not cls._enabled:
+            return None
+        static = TemplateCompiler.static_output(
+            templateFolder, templateName, templateGroup, rootTemplate, templateName, value
+        )
+        if static is None:
+            return None
+        output, render_time = static
+        contents = output.encode("utf-8")
+        try:
+            stored = cls.store(contents)
+            result = not cls.has_contents(path, stored, contents)
+            if result:
+                cls.link(stored, path)
+        except OSError as e:
+            cls.logger().warning(f"Could not materialize {path}: {e}")
+            return None
+        with cls._lock:
+            cls._hits += 1
+            if not result:
+                cls._unchanged += 1
+            cls._saved_time += render_time
+        return result
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the store statistics.
+        :return: A dictionary with the files materialized from the store (and how: hardlinked, reflinked or copied, or left unchanged), the rendering time they saved, in seconds, and the size of the store, in bytes.
+        :rtype: Dict
+        """
+        size = WorkspaceManager.disk_usage(cls.folder())
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "unchanged": cls._unchanged,
+                "hardlinked": cls._links,
+                "reflinked": cls._reflinks,
+                "copied": cls._copies,
+                "saved-time": cls._saved_time,
+                "bytes": size,
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,176 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/staging_area.py
+
+This file defines the StagingArea class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from .git_command import GitCommand
+import os
+from pythoneda.shared import BaseObject
+from typing import Dict, List
+
+
+class StagingArea(BaseObject):
+    """
+    Collects the files to add to the git index of a repository workspace.
+
+    Class name: StagingArea
+
+    Responsibilities:
+        - Accumulate the paths generated in a repository workspace.
+        - Add them all to the index in a single git invocation.
+        - Keep track of the git processes saved.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GitCommand
+    """
+
+    _areas = {}
+    _flushes = 0
+    _staged = 0
+    _spawns_saved = 0
+
+    def __init__(self, repoFolder: str):
+        """
+        Creates a new StagingArea instance.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        """
+        super().__init__()
+        self._repo_folder = repoFolder
+        self._paths = []
+
+    @classmethod
+    def for_repository(cls, repoFolder: str):
+        """
+        Retrieves the staging area of given repository workspace.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :return: The staging area.
+        :rtype: pythoneda.tools.artifact.new_domain.StagingArea
+        """
+        key = os.path.abspath(repoFolder)
+        result = cls._areas.get(key, None)
+        if result is None:
+            result = cls(key)
+            cls._areas[key] = result
+        return result
+
+    @classmethod
+    def pending(cls, repoFolder: str) -> List[str]:
+        """
+        Retrieves the pending paths of given repository workspace, if any.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        :return: Such paths, relative to the repository folder.
+        :rtype: List[str]
+        """
+        area = cls._areas.get(os.path.abspath(repoFolder), None)
+        if area is None:
+            return []
+        return area.paths
+
+    @classmethod
+    def discard(cls, repoFolder: str):
+        """
+        Forgets the pending paths of given repository workspace.
+        :param repoFolder: The repository folder.
+        :type repoFolder: str
+        """
+        cls._areas.pop(os.path.abspath(repoFolder), None)
+
+    @property
+    def repo_folder(self) -> str:
+        """
+        Retrieves the repository folder.
+        :return: Such folder.
+        :rtype: str
+        """
+        return self._repo_folder
+
+    @property
+    def paths(self) -> List[str]:
+        """
+        Retrieves the pending paths, relative to the repository folder.
+        :return: Such paths.
+        :rtype: List[str]
+        """
+        return list(self._paths)
+
+    def stage(self, path: str):
+        """
+        Adds given path to the pending ones.
+        :param path: The path, either absolute or relative to the repository folder.
+        :type path: str
+        """
+        path = str(path)
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.repo_folder)
+        if path not in self._paths:
+            self._paths.append(path)
+
+    def drain(self) -> List[str]:
+        """
+        Forgets the pending paths, once they have been dealt with.
+        :return: Such paths, relative to the repository folder.
+        :rtype: List[str]
+        """
+        result = self._paths
+        self._paths = []
+        StagingArea.discard(self.repo_folder)
+        return result
+
+    async def flush(self) -> int:
+        """
+        Adds all pending paths to the index, in a single git invocation.
+        :return: The number of paths added.
+        :rtype: int
+        """
+        paths = self.drain()
+        if len(paths) > 0:
+            await GitCommand(self.repo_folder).run("add", "--", *paths)
+            StagingArea._flushes += 1
+            StagingArea._staged += len(paths)
+            StagingArea._spawns_saved += len(paths) - 1
+            StagingArea.logger().debug(
+                f"Staged {len(paths)} file(s) in {self.repo_folder} with a single git add"
+            )
+        return len(paths)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the staging statistics.
+        :return: A dictionary with the number of flushes, staged paths and git processes saved.
+        :rtype: Dict
+        """
+        return {
+            "flushes": cls._flushes,
+            "staged": cls._staged,
+            "spawns-saved": cls._spawns_saved,
+        }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
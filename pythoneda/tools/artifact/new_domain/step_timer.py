@@ -0,0 +1,242 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/step_timer.py
+
+This file defines the StepTimer class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from contextlib import asynccontextmanager
+import contextvars
+from .event_log import EventLog
+import functools
+import json
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Callable, Dict
+
+
+class StepTimer(BaseObject):
+    """
+    Measures how long each step of a new-domain pipeline takes.
+
+    Class name: StepTimer
+
+    Responsibilities:
+        - Wrap listeners to record when each step starts and ends.
+        - Attribute the time spent in subprocesses and network calls to the running step.
+        - Correlate steps with the NewDomainRequested event that started the pipeline.
+        - Emit a timing report per pipeline.
+        - Hand the events of each step to the event log.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewDomain: Finishes the report when the domain is created.
+        - pythoneda.tools.artifact.new_domain.NewDomainBatch: Finishes the report of failed pipelines.
+        - pythoneda.tools.artifact.new_domain.EventLog: Persists the events.
+    """
+
+    _kinds = ["subprocess", "network"]
+    _current = contextvars.ContextVar("new_domain_step", default=None)
+    _in_span = contextvars.ContextVar("new_domain_span", default=False)
+    _runs = {}
+    _lock = threading.Lock()
+    _report_file = None
+
+    @classmethod
+    def configure(cls, reportFile: str = None):
+        """
+        Configures the timing reports.
+        :param reportFile: A file to append each report to, as a JSON line.
+        :type reportFile: str
+        """
+        if reportFile is not None:
+            cls._report_file = reportFile
+
+    @classmethod
+    def run_id_of(cls, event) -> str:
+        """
+        Retrieves the id of the pipeline given event belongs to.
+        :param event: The event.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :return: The id of the NewDomainRequested event starting the pipeline.
+        :rtype: str
+        """
+        context = event.context or {}
+        result = context.get("run-id", None)
+        if result is None and event.previous_event_ids:
+            result = event.previous_event_ids[-1]
+        if result is None:
+            result = event.id
+        return result
+
+    @classmethod
+    def step(cls, handler: Callable) -> Callable:
+        """
+        Decorates a listener so its execution gets timed.
+        It must be placed under @listen.
+        :param handler: The listener.
+        :type handler: Callable
+        :return: The decorated listener.
+        :rtype: Callable
+        """
+        return cls._wrap(handler, False)
+
+    @classmethod
+    def final_step(cls, handler: Callable) -> Callable:
+        """
+        Decorates the listener of the last step of a pipeline, so its execution
+        gets timed and the timing report is emitted afterwards.
+        It must be placed under @listen.
+        :param handler: The listener.
+        :type handler: Callable
+        :return: The decorated listener.
+        :rtype: Callable
+        """
+        return cls._wrap(handler, True)
+
+    @classmethod
+    def _wrap(cls, handler: Callable, final: bool) -> Callable:
+        """
+        Decorates a listener so its execution gets timed.
+        :param handler: The listener.
+        :type handler: Callable
+        :param final: Whether to emit the timing report once the listener finishes.
+        :type final: bool
+        :return: The decorated listener.
+        :rtype: Callable
+        """
+
+        @functools.wraps(handler)
+        async def wrapper(listener, event):
+            run_id = cls.run_id_of(event)
+            record = {
+                "step": listener.__name__,
+                "event": event.__class__.__name__,
+                "event-id": event.id,
+                "started": time.time(),
+                "subprocess": 0.0,
+                "network": 0.0,
+            }
+            if "run-id" not in (event.context or {}):
+                # the event starting the pipeline
+                EventLog.record(run_id, "received", event)
+            token = cls._current.set(record)
+            start = time.perf_counter()
+            try:
+                result = await handler(listener, event)
+                EventLog.record(run_id, "emitted", result)
+                return result
+            except Exception as e:
+                record["error"] = str(e)
+                raise
+            finally:
+                record["elapsed"] = time.perf_counter() - start
+                cls._current.reset(token)
+                cls.add(run_id, event, record)
+                if final:
+                    cls.finish(run_id)
+
+        return wrapper
+
+    @classmethod
+    @asynccontextmanager
+    async def span(cls, kind: str):
+        """
+        Attributes the time spent in the block to the running step.
+        Nested spans are only accounted once, in the outermost one.
+        :param kind: Either "subprocess" or "network".
+        :type kind: str
+        """
+        record = cls._current.get()
+        if record is None or cls._in_span.get():
+            yield
+            return
+        token = cls._in_span.set(True)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record[kind] += time.perf_counter() - start
+            cls._in_span.reset(token)
+
+    @classmethod
+    def add(cls, runId: str, event, record: Dict):
+        """
+        Adds the timing of a step to its pipeline.
+        :param runId: The id of the pipeline.
+        :type runId: str
+        :param event: The event the step processed.
+        :type event: pythoneda.tools.artifact.new_domain.events.NewDomainEvent
+        :param record: The timing of the step.
+        :type record: Dict
+        """
+        with cls._lock:
+            run = cls._runs.get(runId, None)
+            if run is None:
+                run = {
+                    "run-id": runId,
+                    "org": event.org,
+                    "name": event.name,
+                    "steps": [],
+                }
+                cls._runs[runId] = run
+            run["steps"].append(record)
+
+    @classmethod
+    def finish(cls, runId: str) -> Dict:
+        """
+        Builds and emits the timing report of given pipeline.
+        :param runId: The id of the pipeline.
+        :type runId: str
+        :return: The report, or None if no step of the pipeline was timed.
+        :rtype: Dict
+        """
+        with cls._lock:
+            result = cls._runs.pop(runId, None)
+        if result is None:
+            return None
+        steps = sorted(result["steps"], key=lambda step: step["started"])
+        result["steps"] = steps
+        result["started"] = steps[0]["started"]
+        result["ended"] = max(
+            [step["started"] + step["elapsed"] for step in steps]
+        )
+        result["elapsed"] = result["ended"] - result["started"]
+        result["step-time"] = sum([step["elapsed"] for step in steps])
+        for kind in cls._kinds:
+            result[kind] = sum([step[kind] for step in steps])
+        result["failed"] = any(["error" in step for step in steps])
+        report = json.dumps(result)
+        cls.logger().info(f"Timing report: {report}")
+        if cls._report_file is not None:
+            try:
+                with open(cls._report_file, "a") as file:
+                    file.write(f"{report}\n")
+            except OSError as e:
+                cls.logger().warning(
+                    f"Could not write the timing report to {cls._report_file}: {e}"
+                )
+        return result
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,210 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/string_template_group_cache.py
+
+This file defines the StringTemplateGroupCache class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+from pathlib import Path
+from pythoneda.shared import BaseObject
+import re
+from stringtemplate3 import StringTemplateGroup
+import threading
+import time
+from typing import Dict, Tuple
+
+
+class StringTemplateGroupCache(BaseObject):
+    """
+    Process-wide cache of parsed StringTemplate groups.
+
+    Class name: StringTemplateGroupCache
+
+    Responsibilities:
+        - Parse each .stg file once, and reuse the parsed group afterwards.
+        - Detect changes in the .stg files, based on their mtime and size.
+        - Keep track of hits, misses and time spent parsing.
+        - Provide a lock per group, so each group is rendered by one thread at a time.
+
+    Collaborators:
+        - stringtemplate3.StringTemplateGroup
+    """
+
+    _groups = {}
+    _group_locks = {}
+    _lock = threading.Lock()
+    _group_declaration = re.compile(r"^group\s+(\w+)\s*;", re.MULTILINE)
+    _hits = 0
+    _misses = 0
+    _parse_time = 0.0
+
+    @classmethod
+    def template_file(cls, templateFolder: str, templateName: str) -> Path:
+        """
+        Retrieves the .stg file of given template.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :return: The path of the .stg file.
+        :rtype: pathlib.Path
+        """
+        return Path(templateFolder) / f"{templateName}.stg"
+
+    @classmethod
+    def fingerprint(cls, templateFile: Path) -> Tuple[int, int]:
+        """
+        Retrieves the fingerprint of given .stg file.
+        :param templateFile: The .stg file.
+        :type templateFile: pathlib.Path
+        :return: A tuple with the modification time (ns) and the size.
+        :rtype: Tuple[int, int]
+        """
+        stat = os.stat(templateFile)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @classmethod
+    def get(
+        cls, templateFolder: str, templateName: str, templateGroup: str
+    ) -> StringTemplateGroup:
+        """
+        Retrieves the parsed group for given template, parsing it only if
+        it's not cached yet or the .stg file has changed.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :return: The parsed group.
+        :rtype: stringtemplate3.StringTemplateGroup
+        """
+        template_file = cls.template_file(templateFolder, templateName)
+        key = (str(templateFolder), templateName, templateGroup)
+        fingerprint = cls.fingerprint(template_file)
+        with cls._lock:
+            entry = cls._groups.get(key, None)
+            if entry is not None and entry[0] == fingerprint:
+                cls._hits += 1
+                return entry[1]
+            cls._misses += 1
+            start = time.perf_counter()
+            with open(template_file, "r", encoding="utf-8") as f:
+                group = StringTemplateGroup(
+                    name=templateGroup, file=f, rootDir=str(templateFolder)
+                )
+            cls._parse_time += time.perf_counter() - start
+            cls._groups[key] = (fingerprint, group)
+            return group
+
+    @classmethod
+    def lock_of(
+        cls, templateFolder: str, templateName: str, templateGroup: str
+    ) -> threading.RLock:
+        """
+        Retrieves the lock to hold while rendering templates of given group,
+        since StringTemplate groups are not meant to be used by several threads at once.
+        The lock outlives reparsing the .stg file and invalidating the group, so it's the same for any version of it.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :return: The lock.
+        :rtype: threading.RLock
+        """
+        key = (str(templateFolder), templateName, templateGroup)
+        with cls._lock:
+            return cls._group_locks.setdefault(key, threading.RLock())
+
+    @classmethod
+    def preload(cls, templateFolder: str) -> int:
+        """
+        Parses every .stg file in given folder, under the group name it declares.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :return: The number of parsed groups.
+        :rtype: int
+        """
+        result = 0
+        for template_file in sorted(Path(templateFolder).glob("*.stg")):
+            with open(template_file, "r", encoding="utf-8") as f:
+                match = cls._group_declaration.search(f.read())
+            if match is not None:
+                cls.get(templateFolder, template_file.stem, match.group(1))
+                result += 1
+        return result
+
+    @classmethod
+    def invalidate(cls, templateFolder: str = None, templateName: str = None) -> int:
+        """
+        Discards cached groups.
+        :param templateFolder: The folder whose groups should be discarded. If None, any folder matches.
+        :type templateFolder: str
+        :param templateName: The template whose groups should be discarded. If None, any template matches.
+        :type templateName: str
+        :return: The number of discarded groups.
+        :rtype: int
+        """
+        with cls._lock:
+            keys = [
+                key
+                for key in cls._groups.keys()
+                if (templateFolder is None or key[0] == str(templateFolder))
+                and (templateName is None or key[1] == templateName)
+            ]
+            for key in keys:
+                # the lock is kept: a render of the discarded group may still hold it
+                del cls._groups[key]
+            return len(keys)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the cache statistics.
+        :return: A dictionary with the hits, misses, parse time (in seconds) and cached groups.
+        :rtype: Dict
+        """
+        with cls._lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "parse-time": cls._parse_time,
+                "groups": len(cls._groups),
+            }
+
+    @classmethod
+    def reset_stats(cls):
+        """
+        Resets the counters.
+        """
+        with cls._lock:
+            cls._hits = 0
+            cls._misses = 0
+            cls._parse_time = 0.0
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -19,7 +19,9 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .initial_commit import InitialCommit
 from pythoneda.shared import EventListener, listen
+from .step_timer import StepTimer
 from pythoneda.shared.git import GitTag
 from pythoneda.tools.artifact.new_domain.events import (
     DefinitionRepositoryChangesTagged,
@@ -38,6 +40,7 @@ class TagDefinitionRepository(EventListener):
         - Know the steps required to create the tag in the definition repository.
 
     Collaborators:
+        - pythoneda.tools.artifact.new_domain.InitialCommit: Writes the tag directly, when possible.
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryChangesTagged
         - pythoneda.tools.artifact.new_domain.events.DefinitionRepositoryTagRequested
     """
@@ -64,6 +67,7 @@ class TagDefinitionRepository(EventListener):
 
     @classmethod
     @listen(DefinitionRepositoryTagRequested)
+    @StepTimer.step
     async def listen_DefinitionRepositoryTagRequested(
         cls, event: DefinitionRepositoryTagRequested
     ) -> DefinitionRepositoryChangesTagged:
@@ -76,7 +80,9 @@ class TagDefinitionRepository(EventListener):
         """
         repo_folder = event.context["def-repo-folder"]
         version = event.context["version"]
-        await GitTag(repo_folder).tag(version, f"tag for {version}")
+        if not await InitialCommit.tag(repo_folder, version, f"tag for {version}"):
+            async with StepTimer.span("subprocess"):
+                await GitTag(repo_folder).tag(version, f"tag for {version}")
         return DefinitionRepositoryChangesTagged(
             event.org,
             event.name,
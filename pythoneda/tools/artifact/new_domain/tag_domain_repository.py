@@ -19,7 +19,9 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from .initial_commit import InitialCommit
 from pythoneda.shared import EventListener, listen
+from .step_timer import StepTimer
 from pythoneda.shared.git import GitTag
 from pythoneda.tools.artifact.new_domain.events import (
     DomainRepositoryChangesTagged,
@@ -38,6 +40,7 @@ class TagDomainRepository(EventListener):
         - Know the steps required to create the tag in the domain repository.
 
     Collaborators:
+        - pythoneda.tools.artifact.new_domain.InitialCommit: Writes the tag directly, when possible.
         - pythoneda.tools.artifact.new_domain.events.DomainRepositoryChangesTagged
         - pythoneda.tools.artifact.new_domain.events.DomainRepositoryTagRequested
     """
@@ -64,6 +67,7 @@ class TagDomainRepository(EventListener):
 
     @classmethod
     @listen(DomainRepositoryTagRequested)
+    @StepTimer.step
     async def listen_DomainRepositoryTagRequested(
         cls, event: DomainRepositoryTagRequested
     ) -> DomainRepositoryChangesTagged:
@@ -76,7 +80,9 @@ class TagDomainRepository(EventListener):
         """
         repo_folder = event.context["repo-folder"]
         version = event.context["version"]
-        await GitTag(repo_folder).tag(version, "Initial tag")
+        if not await InitialCommit.tag(repo_folder, version, "Initial tag"):
+            async with StepTimer.span("subprocess"):
+                await GitTag(repo_folder).tag(version, "Initial tag")
         return DomainRepositoryChangesTagged(
             event.org,
             event.name,
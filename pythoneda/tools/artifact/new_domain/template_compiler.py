@@ -0,0 +1,627 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/template_compiler.py
+
+This file defines the TemplateCompiler class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import hashlib
+import os
+from pathlib import Path
+from pythoneda.shared import BaseObject
+import re
+from .string_template_group_cache import StringTemplateGroupCache
+from stringtemplate3 import StringTemplate
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# Private-use characters delimiting the slots in the recorded output
+_SLOT_START = "\ue000"
+_SLOT_END = "\ue001"
+
+
+class _Uncompilable(Exception):
+    """
+    The values given to a template can't be replaced by slots.
+
+    Class name: _Uncompilable
+
+    Responsibilities:
+        - Represent values the compiler doesn't know how to record.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.TemplateCompiler
+    """
+
+    pass
+
+
+class _Slot(str):
+    """
+    A placeholder written by StringTemplate instead of a scalar value.
+
+    Class name: _Slot
+
+    Responsibilities:
+        - Mark where a value is written, in the recorded output.
+        - Behave as the value in conditions.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.TemplateCompiler
+    """
+
+    def __new__(cls, index: int, truth: bool):
+        """
+        Creates a new _Slot instance.
+        :param index: The index of the value.
+        :type index: int
+        :param truth: The truth value of the value.
+        :type truth: bool
+        """
+        result = super().__new__(cls, f"{_SLOT_START}{index}{_SLOT_END}")
+        result._truth = truth
+        return result
+
+    def __bool__(self) -> bool:
+        """
+        Retrieves the truth value of the value.
+        :return: Such value.
+        :rtype: bool
+        """
+        return self._truth
+
+
+class _Proxy:
+    """
+    Stands for an object given to a template, recording what the template reads from it.
+
+    Class name: _Proxy
+
+    Responsibilities:
+        - Forward attribute lookups to the object, recording them.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.TemplateCompiler
+    """
+
+    __slots__ = ("__recorder", "__index", "__target")
+
+    def __init__(self, recorder: "_Recorder", index: int, target: Any):
+        """
+        Creates a new _Proxy instance.
+        :param recorder: The recorder.
+        :type recorder: pythoneda.tools.artifact.new_domain.template_compiler._Recorder
+        :param index: The index of the object.
+        :type index: int
+        :param target: The object.
+        :type target: Any
+        """
+        self.__recorder = recorder
+        self.__index = index
+        self.__target = target
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Retrieves an attribute of the object, recording it.
+        :param name: The name of the attribute.
+        :type name: str
+        :return: The recorded value.
+        :rtype: Any
+        """
+        value = getattr(self.__target, name)
+        if callable(value):
+            if not name.startswith("get") and not name.startswith("is"):
+                raise _Uncompilable(f"{name} is callable")
+            return lambda: self.__recorder.record(value(), self.__index, "call", name)
+        return self.__recorder.record(value, self.__index, "attr", name)
+
+    def __str__(self) -> str:
+        """
+        Writes the object itself.
+        :return: A slot for it.
+        :rtype: str
+        """
+        return _Slot(self.__index, True)
+
+
+class _Recorder:
+    """
+    Records the values a template reads while rendering.
+
+    Class name: _Recorder
+
+    Responsibilities:
+        - Replace each value with a stand-in: a slot, a proxy, or the value itself.
+        - Keep the path to each value, and the guard the value must satisfy.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.TemplateCompiler
+    """
+
+    def __init__(self):
+        """
+        Creates a new _Recorder instance.
+        """
+        self.accesses = []
+        self.guards = []
+        self._stand_ins = {}
+
+    def record(self, value: Any, parent: int, step: str, key: Any) -> Any:
+        """
+        Records a value.
+        :param value: The value.
+        :type value: Any
+        :param parent: The index of the value it's read from.
+        :type parent: int
+        :param step: How it's read: "attr", "call" or "item".
+        :type step: str
+        :param key: The attribute, method or index.
+        :type key: Any
+        :return: The stand-in.
+        :rtype: Any
+        """
+        access = (parent, step, key)
+        if access in self._stand_ins:
+            return self._stand_ins[access]
+        index = len(self.accesses)
+        guard = TemplateCompiler.guard_of(value)
+        self.accesses.append(access)
+        self.guards.append(guard)
+        kind = guard[0]
+        if kind in ["none", "eq"]:
+            result = value
+        elif kind in ["str", "number"]:
+            result = _Slot(index, bool(value))
+        elif kind == "seq":
+            result = guard[1](
+                [self.record(item, index, "item", i) for i, item in enumerate(value)]
+            )
+        else:
+            result = _Proxy(self, index, value)
+        self._stand_ins[access] = result
+        return result
+
+
+class TemplateCompiler(BaseObject):
+    """
+    Compiles StringTemplate templates into Python render functions.
+
+    Class name: TemplateCompiler
+
+    Responsibilities:
+        - Render each template once with stand-ins, and turn the output into a
+          function joining literal text and the values.
+        - Keep one function per shape of the values (types, emptiness, list
+          lengths), guarded by it.
+        - Check the function against the interpreted output before using it.
+        - Discard the functions of a template when its source changes.
+        - Fall back to interpreting templates that can't be compiled.
+        - Tell which templates render the same output whatever their values.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.StringTemplateGroupCache: Provides the parsed groups.
+        - pythoneda.tools.artifact.new_domain.NewFileFromTemplate: Renders its files through it.
+    """
+
+    _enabled = None
+    _max_variants = 8
+    _templates = {}
+    _lock = threading.Lock()
+    _slot_pattern = re.compile(f"{_SLOT_START}(\\d+){_SLOT_END}")
+    _compiled = 0
+    _interpreted = 0
+    _compilations = 0
+    _compile_time = 0.0
+    _invalidations = 0
+
+    @classmethod
+    def configure(cls, enabled: bool = None, maxVariants: int = None):
+        """
+        Configures the compiler.
+        :param enabled: Whether templates get compiled.
+        :type enabled: bool
+        :param maxVariants: The maximum number of functions per template.
+        :type maxVariants: int
+        """
+        if enabled is not None:
+            cls._enabled = enabled
+        if maxVariants is not None:
+            cls._max_variants = maxVariants
+
+    @classmethod
+    def enabled(cls) -> bool:
+        """
+        Checks whether templates get compiled.
+        :return: True in such case.
+        :rtype: bool
+        """
+        if cls._enabled is None:
+            cls._enabled = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_COMPILE_TEMPLATES", ""
+            ).lower() in ["1", "true", "yes"]
+        return cls._enabled
+
+    @classmethod
+    def source_hash(cls, templateFile: Path) -> str:
+        """
+        Retrieves the hash of given .stg file.
+        :param templateFile: The .stg file.
+        :type templateFile: pathlib.Path
+        :return: Its sha256, in hexadecimal.
+        :rtype: str
+        """
+        with open(templateFile, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @classmethod
+    def guard_of(cls, value: Any) -> Tuple:
+        """
+        Retrieves the guard a value must satisfy to be rendered by the same function.
+        :param value: The value.
+        :type value: Any
+        :return: The guard.
+        :rtype: Tuple
+        """
+        if value is None:
+            return ("none",)
+        if isinstance(value, StringTemplate) or isinstance(value, dict):
+            raise _Uncompilable(f"{type(value).__name__} values are not supported")
+        if type(value) is str:
+            # empty values can remove whole lines, and multi-line ones get indented
+            if not value or "\n" in value or _SLOT_START in value or _SLOT_END in value:
+                return ("eq", str, value)
+            return ("str",)
+        if isinstance(value, (bool, str, bytes)):
+            return ("eq", type(value), value)
+        if type(value) in [int, float]:
+            return ("number", type(value), bool(value))
+        if type(value) in [list, tuple]:
+            return ("seq", type(value), len(value))
+        kind = type(value)
+        if hasattr(kind, "__iter__") or hasattr(kind, "__getitem__"):
+            raise _Uncompilable(f"{kind.__name__} values are not supported")
+        if hasattr(kind, "__bool__") or hasattr(kind, "__len__"):
+            raise _Uncompilable(f"{kind.__name__} values are not supported")
+        return ("object", kind)
+
+    @classmethod
+    def matches(cls, guard: Tuple, value: Any) -> bool:
+        """
+        Checks whether given value satisfies given guard.
+        :param guard: The guard.
+        :type guard: Tuple
+        :param value: The value.
+        :type value: Any
+        :return: True in such case.
+        :rtype: bool
+        """
+        kind = guard[0]
+        if kind == "none":
+            return value is None
+        if kind == "str":
+            return (
+                type(value) is str
+                and value != ""
+                and "\n" not in value
+                and _SLOT_START not in value
+                and _SLOT_END not in value
+            )
+        if kind == "eq":
+            return type(value) is guard[1] and value == guard[2]
+        if kind == "number":
+            return type(value) is guard[1] and bool(value) == guard[2]
+        if kind == "seq":
+            return type(value) is guard[1] and len(value) == guard[2]
+        return type(value) is guard[1]
+
+    @classmethod
+    def values_of(cls, value: Any, accesses: List, guards: List) -> List:
+        """
+        Reads the values a compiled function needs, checking their guards.
+        :param value: The object given to the template.
+        :type value: Any
+        :param accesses: The path to each value.
+        :type accesses: List
+        :param guards: The guard of each value.
+        :type guards: List
+        :return: The values, or None if any guard is not satisfied.
+        :rtype: List
+        """
+        if not cls.matches(guards[0], value):
+            return None
+        result = [value]
+        for index in range(1, len(accesses)):
+            parent, step, key = accesses[index]
+            try:
+                if step == "attr":
+                    item = getattr(result[parent], key)
+                elif step == "call":
+                    item = getattr(result[parent], key)()
+                else:
+                    item = result[parent][key]
+            except Exception:
+                return None
+            if not cls.matches(guards[index], item):
+                return None
+            result.append(item)
+        return result
+
+    @classmethod
+    def interpret(
+        cls,
+        templateFolder: str,
+        templateName: str,
+        templateGroup: str,
+        rootTemplate: str,
+        attribute: str,
+        value: Any,
+    ) -> str:
+        """
+        Renders a template with StringTemplate.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :param attribute: The attribute of the root template.
+        :type attribute: str
+        :param value: The value of such attribute.
+        :type value: Any
+        :return: The rendered contents.
+        :rtype: str
+        """
+        group = StringTemplateGroupCache.get(templateFolder, templateName, templateGroup)
+        with StringTemplateGroupCache.lock_of(templateFolder, templateName, templateGroup):
+            root = group.getInstanceOf(rootTemplate)
+            root[attribute] = value
+            return str(root)
+
+    @classmethod
+    def compile(
+        cls,
+        templateFolder: str,
+        templateName: str,
+        templateGroup: str,
+        rootTemplate: str,
+        attribute: str,
+        value: Any,
+    ) -> Tuple[List, List, Callable[[List], str]]:
+        """
+        Compiles a template for the shape of given value.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :param attribute: The attribute of the root template.
+        :type attribute: str
+        :param value: The value of such attribute.
+        :type value: Any
+        :return: The path to each value, their guards, and the render function.
+        :rtype: Tuple[List, List, Callable[[List], str]]
+        """
+        recorder = _Recorder()
+        output = cls.interpret(
+            templateFolder,
+            templateName,
+            templateGroup,
+            rootTemplate,
+            attribute,
+            recorder.record(value, None, "root", None),
+        )
+        parts = cls._slot_pattern.split(output)
+        pieces = []
+        for position, part in enumerate(parts):
+            if position % 2 == 1:
+                pieces.append(f"s(v[{int(part)}])")
+            elif part:
+                pieces.append(repr(part))
+        source = f"def render(v):\n    return ''.join(({', '.join(pieces)},))\n"
+        namespace = {"s": str}
+        exec(compile(source, f"<{templateName}.stg>", "exec"), namespace)
+        return (recorder.accesses, recorder.guards, namespace["render"])
+
+    @classmethod
+    def entry_for(
+        cls, templateFolder: str, templateName: str, templateGroup: str, rootTemplate: str
+    ) -> Dict:
+        """
+        Retrieves the compiled functions of a template, discarding them if its source has changed.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :return: A dictionary with the source hash, the functions, and whether the template can't be compiled.
+        :rtype: Dict
+        """
+        template_file = StringTemplateGroupCache.template_file(
+            templateFolder, templateName
+        )
+        key = (str(templateFolder), templateName, templateGroup, rootTemplate)
+        fingerprint = StringTemplateGroupCache.fingerprint(template_file)
+        with cls._lock:
+            entry = cls._templates.get(key, None)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                return entry
+        source_hash = cls.source_hash(template_file)
+        with cls._lock:
+            entry = cls._templates.get(key, None)
+            if entry is None or entry["source-hash"] != source_hash:
+                if entry is not None:
+                    cls._invalidations += 1
+                entry = {"source-hash": source_hash, "variants": [], "interpret": False}
+                cls._templates[key] = entry
+            entry["fingerprint"] = fingerprint
+            return entry
+
+    @classmethod
+    def render(
+        cls,
+        templateFolder: str,
+        templateName: str,
+        templateGroup: str,
+        rootTemplate: str,
+        attribute: str,
+        value: Any,
+    ) -> str:
+        """
+        Renders a template, with its compiled function if it's enabled and
+        available, compiling it otherwise.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :param attribute: The attribute of the root template.
+        :type attribute: str
+        :param value: The value of such attribute.
+        :type value: Any
+        :return: The rendered contents.
+        :rtype: str
+        """
+        if not cls.enabled():
+            return cls.interpret(
+                templateFolder, templateName, templateGroup, rootTemplate, attribute, value
+            )
+        entry = cls.entry_for(templateFolder, templateName, templateGroup, rootTemplate)
+        for accesses, guards, function in tuple(entry["variants"]):
+            values = cls.values_of(value, accesses, guards)
+            if values is not None:
+                with cls._lock:
+                    cls._compiled += 1
+                return function(values)
+        if entry["interpret"] or len(entry["variants"]) >= cls._max_variants:
+            with cls._lock:
+                cls._interpreted += 1
+            return cls.interpret(
+                templateFolder, templateName, templateGroup, rootTemplate, attribute, value
+            )
+        start = time.perf_counter()
+        result = cls.interpret(
+            templateFolder, templateName, templateGroup, rootTemplate, attribute, value
+        )
+        try:
+            accesses, guards, function = cls.compile(
+                templateFolder, templateName, templateGroup, rootTemplate, attribute, value
+            )
+            values = cls.values_of(value, accesses, guards)
+            if values is None or function(values) != result:
+                raise _Uncompilable("the compiled output differs")
+            with cls._lock:
+                # another thread may have compiled the same shape meanwhile
+                if guards not in [variant[1] for variant in entry["variants"]]:
+                    entry["variants"].append((accesses, guards, function))
+        except _Uncompilable as e:
+            cls.logger().info(f"Interpreting {templateName}.stg: {e}")
+            entry["interpret"] = True
+        with cls._lock:
+            cls._compilations += 1
+            cls._compile_time += time.perf_counter() - start
+            cls._interpreted += 1
+        return result
+
+    @classmethod
+    def static_output(
+        cls,
+        templateFolder: str,
+        templateName: str,
+        templateGroup: str,
+        rootTemplate: str,
+        attribute: str,
+        value: Any,
+    ) -> Tuple[str, float]:
+        """
+        Retrieves the output of a template that reads nothing from the value
+        it's given, and so renders the same for every value.
+        :param templateFolder: The folder with the templates.
+        :type templateFolder: str
+        :param templateName: The name of the template.
+        :type templateName: str
+        :param templateGroup: The name of the template group.
+        :type templateGroup: str
+        :param rootTemplate: The root template.
+        :type rootTemplate: str
+        :param attribute: The attribute of the root template.
+        :type attribute: str
+        :param value: A value to render it with, the first time.
+        :type value: Any
+        :return: The output and the time, in seconds, interpreting the template takes; or None if the output depends on the value.
+        :rtype: Tuple[str, float]
+        """
+        entry = cls.entry_for(templateFolder, templateName, templateGroup, rootTemplate)
+        if "static" in entry:
+            return entry["static"]
+        start = time.perf_counter()
+        output = cls.interpret(
+            templateFolder, templateName, templateGroup, rootTemplate, attribute, value
+        )
+        elapsed = time.perf_counter() - start
+        result = None
+        try:
+            accesses, _, function = cls.compile(
+                templateFolder, templateName, templateGroup, rootTemplate, attribute, value
+            )
+            # the only access is the value itself: no slots, no guards
+            if len(accesses) == 1 and function([value]) == output:
+                result = (output, elapsed)
+        except _Uncompilable:
+            pass
+        with cls._lock:
+            entry["static"] = result
+        return result
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the compiler statistics.
+        :return: A dictionary with the renders done by compiled functions and by StringTemplate, the compilations, the time spent compiling (in seconds), the functions, and the templates discarded because their source changed.
+        :rtype: Dict
+        """
+        with cls._lock:
+            return {
+                "compiled": cls._compiled,
+                "interpreted": cls._interpreted,
+                "compilations": cls._compilations,
+                "compile-time": cls._compile_time,
+                "functions": sum(
+                    [len(entry["variants"]) for entry in cls._templates.values()]
+                ),
+                "invalidations": cls._invalidations,
+            }
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
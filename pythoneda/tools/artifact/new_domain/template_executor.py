@@ -0,0 +1,180 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/template_executor.py
+
+This file defines the TemplateExecutor class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import functools
+import os
+from pythoneda.shared import BaseObject
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict
+
+
+class TemplateExecutor(BaseObject):
+    """
+    Runs the rendering and writing of generated files off the event loop.
+
+    Class name: TemplateExecutor
+
+    Responsibilities:
+        - Keep a pool of threads, of a configurable size, to render templates and write files in.
+        - Run everything inline when the pool size is 0.
+        - Keep track of the renders, the time spent in them, and the time waiting for a thread.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewFileFromTemplate: Renders and writes its files through it.
+        - pythoneda.tools.artifact.new_domain.CreateDefinitionRepositoryNixFlake: Generates flake.nix through it.
+        - pythoneda.tools.artifact.new_domain.InitialCommit: Writes git objects through it.
+    """
+
+    _workers = None
+    _executor = None
+    _lock = threading.Lock()
+    _runs = 0
+    _run_time = 0.0
+    _wait_time = 0.0
+    _max_wait = 0.0
+
+    @classmethod
+    def configure(cls, workers: int = None):
+        """
+        Configures the pool.
+        :param workers: The number of threads, or 0 to render on the event loop.
+        :type workers: int
+        """
+        if workers is None:
+            return
+        with cls._lock:
+            if workers != cls._workers and cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+            cls._workers = max(0, workers)
+
+    @classmethod
+    def workers(cls) -> int:
+        """
+        Retrieves the number of threads.
+        :return: Such number.
+        :rtype: int
+        """
+        if cls._workers is None:
+            cls._workers = int(
+                os.environ.get(
+                    "PYTHONEDA_NEW_DOMAIN_RENDER_WORKERS",
+                    min(4, os.cpu_count() or 1),
+                )
+            )
+        return cls._workers
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """
+        Retrieves the pool, creating it if needed.
+        :return: Such pool, or None if rendering happens on the event loop.
+        :rtype: concurrent.futures.ThreadPoolExecutor
+        """
+        workers = cls.workers()
+        if workers == 0:
+            return None
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="new-domain-render"
+                )
+            return cls._executor
+
+    @classmethod
+    async def run(cls, function: Callable, *args) -> Any:
+        """
+        Runs given function in the pool.
+        :param function: The function.
+        :type function: Callable
+        :param args: Its arguments.
+        :type args: tuple
+        :return: What the function returns.
+        :rtype: Any
+        """
+        submitted = time.perf_counter()
+        started = []
+
+        def timed():
+            started.append(time.perf_counter())
+            return function(*args)
+
+        executor = cls.executor()
+        try:
+            if executor is None:
+                return timed()
+            # keep the current step, so the timing report stays accurate
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, functools.partial(context.run, timed)
+            )
+        finally:
+            if started:
+                finished = time.perf_counter()
+                wait = started[0] - submitted
+                with cls._lock:
+                    cls._runs += 1
+                    cls._run_time += finished - started[0]
+                    cls._wait_time += wait
+                    cls._max_wait = max(cls._max_wait, wait)
+
+    @classmethod
+    async def run_coroutine(cls, coroutine: Coroutine) -> Any:
+        """
+        Runs given coroutine in the pool, in an event loop of its own.
+        Meant for coroutines that render or write synchronously.
+        :param coroutine: The coroutine.
+        :type coroutine: Coroutine
+        :return: What the coroutine returns.
+        :rtype: Any
+        """
+        if cls.workers() == 0:
+            return await coroutine
+        return await cls.run(asyncio.run, coroutine)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the pool statistics.
+        :return: A dictionary with the number of threads, the renders, and the time spent rendering and waiting for a thread (in seconds).
+        :rtype: Dict
+        """
+        with cls._lock:
+            return {
+                "workers": cls._workers,
+                "runs": cls._runs,
+                "run-time": cls._run_time,
+                "wait-time": cls._wait_time,
+                "max-wait": cls._max_wait,
+            }
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
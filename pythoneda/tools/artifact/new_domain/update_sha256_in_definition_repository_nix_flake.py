@@ -20,13 +20,15 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from pythoneda.shared import EventListener, listen
-from pythoneda.shared.git import GitAdd
+from .step_timer import StepTimer
+from .staging_area import StagingArea
 from pythoneda.shared.nix.flake import NixFlake
 from pythoneda.tools.artifact.new_domain.events import (
     Sha256InDefinitionRepositoryNixFlakeUpdated,
     UpdateSha256InDefinitionRepositoryNixFlakeRequested,
 )
 from .definition_nix_flake import DefinitionNixFlake
+from .nar_hash import NarHash
 from typing import List
 
 
@@ -64,8 +66,34 @@ class UpdateSha256InDefinitionRepositoryNixFlake(EventListener):
 
         return cls._singleton
 
+    @classmethod
+    async def local_sha256(
+        cls, event: UpdateSha256InDefinitionRepositoryNixFlakeRequested
+    ) -> str:
+        """
+        Computes the sha256 of the domain repository tag from the local workspace,
+        without downloading the tarball from GitHub.
+        :param event: The trigger event.
+        :type event: pythoneda.tools.artifact.new_domain.events.UpdateSha256InDefinitionRepositoryNixFlakeRequested
+        :return: The sha256, in Nix's base-32 format.
+        :rtype: str
+        """
+        version = event.context["version"]
+        digest = await NarHash.of_git_ref(event.context["repo-folder"], version)
+        result = NarHash.to_base32(digest)
+        if event.context.get("verify-sha256", False):
+            async with StepTimer.span("network"):
+                remote = await NixFlake.fetch_sha256(event.context["url"], version)
+            if not NarHash.matches(digest, remote):
+                cls.logger().warning(
+                    f"Local sha256 {result} of {event.context['url']}/{version} differs from the remote one ({remote}). Using the latter"
+                )
+                result = remote
+        return result
+
     @classmethod
     @listen(UpdateSha256InDefinitionRepositoryNixFlakeRequested)
+    @StepTimer.step
     async def listen_UpdateSha256InDefinitionRepositoryNixFlakeRequested(
         cls, event: UpdateSha256InDefinitionRepositoryNixFlakeRequested
     ) -> Sha256InDefinitionRepositoryNixFlakeUpdated:
@@ -79,9 +107,13 @@ class UpdateSha256InDefinitionRepositoryNixFlake(EventListener):
         url = event.context["url"]
         version = event.context["version"]
         repo_folder = event.context["def-repo-folder"]
-        sha256 = await NixFlake.fetch_sha256(url, version)
+        if event.context.get("sha256-mode", "remote") == "local":
+            sha256 = await cls.local_sha256(event)
+        else:
+            async with StepTimer.span("network"):
+                sha256 = await NixFlake.fetch_sha256(url, version)
         await NixFlake.update_sha256(sha256, repo_folder)
-        await GitAdd(repo_folder).add("flake.nix")
+        StagingArea.for_repository(repo_folder).stage("flake.nix")
         return Sha256InDefinitionRepositoryNixFlakeUpdated(
             event.org,
             event.name,
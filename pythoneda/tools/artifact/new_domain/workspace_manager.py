@@ -0,0 +1,512 @@
+# vim: set fileencoding=utf-8
+"""
+pythoneda/tools/artifact/new_domain/workspace_manager.py
+
+This file defines the WorkspaceManager class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import atexit
+import fcntl
+import os
+from pythoneda.shared import BaseObject
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+
+class WorkspaceManager(BaseObject):
+    """
+    Manages the temporary folders where repositories are checked out.
+
+    Class name: WorkspaceManager
+
+    Responsibilities:
+        - Lease workspaces under a configurable root folder.
+        - Delete workspaces once the pipeline using them has finished.
+        - Keep the workspaces of unfinished pipelines, so they can be resumed until they get evicted.
+        - Hold a lock on each leased workspace, so other processes never evict it.
+        - Evict stale workspaces, based on their age and the overall disk usage, in the background.
+        - Evict the files of the stores next to the workspaces that haven't been used for a while.
+        - Report disk usage metrics.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.CloneRepositoryLocally: Leases workspaces.
+        - pythoneda.tools.artifact.new_domain.NewDomain: Releases them.
+        - pythoneda.tools.artifact.new_domain.EventLog: Retains and adopts them.
+        - pythoneda.tools.artifact.new_domain.SkeletonCache: Its store is evicted along with the workspaces.
+    """
+
+    _prefix = "new-domain-"
+    _root = None
+    _max_bytes = None
+    _max_age = 24 * 60 * 60
+    _grace_period = 10 * 60
+    _lease_file = ".lease"
+    _eviction_interval = 60
+    _leases = {}
+    _lease_fds = {}
+    _retained = set()
+    _stores = set()
+    _sizes = {}
+    _lock = threading.RLock()
+    _eviction_lock = threading.Lock()
+    _last_eviction = 0
+    _released = 0
+    _evicted = 0
+    _evicted_files = 0
+    _exit_hook_registered = False
+
+    @classmethod
+    def configure(
+        cls,
+        root: str = None,
+        maxBytes: int = None,
+        maxAge: float = None,
+        gracePeriod: float = None,
+        evictionInterval: float = None,
+    ):
+        """
+        Configures the workspaces.
+        :param root: The folder where workspaces are created (a tmpfs mount, for example).
+        :type root: str
+        :param maxBytes: The maximum disk usage of all workspaces, or None for no limit.
+        :type maxBytes: int
+        :param maxAge: The age, in seconds, after which a workspace is considered stale.
+        :type maxAge: float
+        :param gracePeriod: The minimum age, in seconds, of a workspace before it can be evicted to reclaim space.
+        :type gracePeriod: float
+        :param evictionInterval: The minimum time, in seconds, between background evictions.
+        :type evictionInterval: float
+        """
+        with cls._lock:
+            if root is not None:
+                cls._root = root
+            if maxBytes is not None:
+                cls._max_bytes = maxBytes
+            if maxAge is not None:
+                cls._max_age = maxAge
+            if gracePeriod is not None:
+                cls._grace_period = gracePeriod
+            if evictionInterval is not None:
+                cls._eviction_interval = evictionInterval
+
+    @classmethod
+    def root(cls) -> str:
+        """
+        Retrieves the folder where workspaces are created.
+        :return: Such folder.
+        :rtype: str
+        """
+        if cls._root is None:
+            cls._root = os.environ.get(
+                "PYTHONEDA_NEW_DOMAIN_WORKSPACES",
+                os.path.join(tempfile.gettempdir(), "pythoneda-new-domain"),
+            )
+        return cls._root
+
+    @classmethod
+    def add_store(cls, folder: str):
+        """
+        Manages the eviction of the files of given store, whose modification
+        time tells when they were last used.
+        :param folder: The folder of the store.
+        :type folder: str
+        """
+        with cls._lock:
+            cls._stores.add(folder)
+
+    @classmethod
+    def _try_lock(cls, workspace: str) -> int:
+        """
+        Tries to lock given workspace, without waiting.
+        The lock is released when its file descriptor is closed, including when
+        the process dies.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        :return: The file descriptor holding the lock, or None if the workspace is locked already.
+        :rtype: int
+        """
+        try:
+            fd = os.open(
+                os.path.join(workspace, cls._lease_file), os.O_RDWR | os.O_CREAT, 0o600
+            )
+        except OSError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    @classmethod
+    def _hold(cls, workspace: str, fd: int):
+        """
+        Registers given workspace as leased by this process.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        :param fd: The file descriptor holding its lock.
+        :type fd: int
+        """
+        with cls._lock:
+            cls._leases[workspace] = time.time()
+            cls._lease_fds[workspace] = fd
+            cls._sizes.pop(workspace, None)
+            if not cls._exit_hook_registered:
+                atexit.register(cls.release_all)
+                cls._exit_hook_registered = True
+
+    @classmethod
+    def lease(cls) -> str:
+        """
+        Creates a new workspace.
+        :return: The workspace folder.
+        :rtype: str
+        """
+        os.makedirs(cls.root(), exist_ok=True)
+        result = tempfile.mkdtemp(prefix=cls._prefix, dir=cls.root())
+        cls._hold(result, cls._try_lock(result))
+        cls.evict_in_background()
+        return result
+
+    @classmethod
+    def adopt(cls, workspace: str):
+        """
+        Leases an existing workspace, left behind by a previous process.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        """
+        if not os.path.isdir(workspace):
+            raise ValueError(f"The workspace {workspace} no longer exists")
+        fd = cls._try_lock(workspace)
+        if fd is None:
+            raise ValueError(f"The workspace {workspace} is in use by another process")
+        cls._hold(workspace, fd)
+
+    @classmethod
+    def retain(cls, workspace: str):
+        """
+        Keeps given workspace when the process exits, unless it gets released before.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        """
+        with cls._lock:
+            cls._retained.add(workspace)
+
+    @classmethod
+    def keep(cls, workspace: str):
+        """
+        Stops using given workspace, but keeps it until it gets evicted.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        """
+        with cls._lock:
+            cls._leases.pop(workspace, None)
+            cls._retained.discard(workspace)
+            fd = cls._lease_fds.pop(workspace, None)
+        if fd is not None:
+            os.close(fd)
+
+    @classmethod
+    def workspace_of(cls, path: str) -> str:
+        """
+        Retrieves the leased workspace containing given path.
+        :param path: The path.
+        :type path: str
+        :return: The workspace, or None if the path is not inside a leased workspace.
+        :rtype: str
+        """
+        path = os.path.abspath(path)
+        with cls._lock:
+            for workspace in cls._leases.keys():
+                if path == workspace or path.startswith(workspace + os.sep):
+                    return workspace
+        return None
+
+    @classmethod
+    def release(cls, workspace: str):
+        """
+        Deletes given workspace.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        """
+        with cls._lock:
+            if cls._leases.pop(workspace, None) is not None:
+                cls._released += 1
+            fd = cls._lease_fds.pop(workspace, None)
+            cls._retained.discard(workspace)
+            cls._sizes.pop(workspace, None)
+        shutil.rmtree(workspace, ignore_errors=True)
+        if fd is not None:
+            os.close(fd)
+
+    @classmethod
+    def release_all(cls):
+        """
+        Deletes all leased workspaces, but the retained ones, which are kept
+        until they get evicted.
+        """
+        with cls._lock:
+            workspaces = list(cls._leases.keys())
+            retained = set(cls._retained)
+        for workspace in workspaces:
+            if workspace in retained:
+                cls.keep(workspace)
+            else:
+                cls.release(workspace)
+
+    @classmethod
+    def disk_usage(cls, folder: str) -> int:
+        """
+        Retrieves the disk usage of given folder.
+        :param folder: The folder.
+        :type folder: str
+        :return: The size, in bytes.
+        :rtype: int
+        """
+        result = 0
+        for parent, _, files in os.walk(folder):
+            for file in files:
+                try:
+                    result += os.lstat(os.path.join(parent, file)).st_size
+                except OSError:
+                    pass
+        return result
+
+    @classmethod
+    def size_of(cls, workspace: str, inUse: bool) -> int:
+        """
+        Retrieves the disk usage of given workspace.
+        Workspaces nobody uses don't change, so their sizes are cached.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        :param inUse: Whether the workspace is in use.
+        :type inUse: bool
+        :return: The size, in bytes.
+        :rtype: int
+        """
+        if inUse:
+            return cls.disk_usage(workspace)
+        with cls._lock:
+            result = cls._sizes.get(workspace, None)
+        if result is None:
+            result = cls.disk_usage(workspace)
+            with cls._lock:
+                cls._sizes[workspace] = result
+        return result
+
+    @classmethod
+    def workspaces(cls) -> List[Dict]:
+        """
+        Retrieves the workspaces under the root folder, including the ones
+        left behind by other processes.
+        :return: For each workspace, its path, creation time and whether it's leased by this process.
+        :rtype: List[Dict]
+        """
+        result = []
+        root = cls.root()
+        if not os.path.isdir(root):
+            return result
+        with cls._lock:
+            leases = dict(cls._leases)
+        for entry in os.scandir(root):
+            if not entry.is_dir(follow_symlinks=False) or not entry.name.startswith(
+                cls._prefix
+            ):
+                continue
+            leased = leases.get(entry.path, None)
+            result.append(
+                {
+                    "path": entry.path,
+                    "created": leased if leased is not None else entry.stat().st_mtime,
+                    "leased": leased is not None,
+                }
+            )
+        return sorted(result, key=lambda workspace: workspace["created"])
+
+    @classmethod
+    def evict_in_background(cls):
+        """
+        Evicts workspaces in a background thread, unless an eviction is running
+        or has run recently.
+        """
+        now = time.time()
+        with cls._lock:
+            if now - cls._last_eviction < cls._eviction_interval:
+                return
+            cls._last_eviction = now
+        threading.Thread(
+            target=cls.evict, name="workspace-eviction", daemon=True
+        ).start()
+
+    @classmethod
+    def evict(cls) -> int:
+        """
+        Deletes stale workspaces, and the oldest ones if the disk usage is over the limit.
+        Workspaces leased by this process, or locked by any other, are never evicted.
+        :return: The number of evicted workspaces.
+        :rtype: int
+        """
+        if not cls._eviction_lock.acquire(blocking=False):
+            return 0
+        try:
+            return cls._evict_unused()
+        finally:
+            cls._eviction_lock.release()
+
+    @classmethod
+    def _evict_unused(cls) -> int:
+        """
+        Deletes the stale or oldest workspaces nobody uses.
+        :return: The number of evicted workspaces.
+        :rtype: int
+        """
+        result = 0
+        now = time.time()
+        cls._evict_stored(now)
+        candidates = []
+        in_use = []
+        for workspace in cls.workspaces():
+            if workspace["leased"]:
+                in_use.append(workspace)
+                continue
+            fd = cls._try_lock(workspace["path"])
+            if fd is None:
+                in_use.append(workspace)
+            elif now - workspace["created"] > cls._max_age:
+                cls.logger().info(f"Evicting stale workspace {workspace['path']}")
+                cls._evict(workspace["path"], fd)
+                result += 1
+            else:
+                candidates.append((workspace, fd))
+        try:
+            if cls._max_bytes is None:
+                return result
+            usage = sum(
+                [cls.size_of(workspace["path"], True) for workspace in in_use]
+                + [cls.size_of(workspace["path"], False) for workspace, _ in candidates]
+                + [cls.disk_usage(store) for store in cls.stores()]
+            )
+            for workspace, fd in list(candidates):
+                if usage <= cls._max_bytes:
+                    break
+                if now - workspace["created"] < cls._grace_period:
+                    continue
+                size = cls.size_of(workspace["path"], False)
+                cls.logger().info(
+                    f"Evicting workspace {workspace['path']} to reclaim {size} bytes"
+                )
+                candidates.remove((workspace, fd))
+                cls._evict(workspace["path"], fd)
+                usage -= size
+                result += 1
+            return result
+        finally:
+            for _, fd in candidates:
+                os.close(fd)
+
+    @classmethod
+    def stores(cls) -> List[str]:
+        """
+        Retrieves the stores whose files get evicted.
+        :return: Their folders.
+        :rtype: List[str]
+        """
+        with cls._lock:
+            return list(cls._stores)
+
+    @classmethod
+    def _evict_stored(cls, now: float) -> int:
+        """
+        Deletes the stored files that haven't been used for longer than the maximum age.
+        :param now: The current time.
+        :type now: float
+        :return: The number of evicted files.
+        :rtype: int
+        """
+        result = 0
+        for store in cls.stores():
+            try:
+                entries = list(os.scandir(store))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if (
+                        entry.is_file(follow_symlinks=False)
+                        and now - entry.stat(follow_symlinks=False).st_mtime
+                        > cls._max_age
+                    ):
+                        os.unlink(entry.path)
+                        result += 1
+                except OSError:
+                    pass
+        with cls._lock:
+            cls._evicted_files += result
+        return result
+
+    @classmethod
+    def _evict(cls, workspace: str, fd: int):
+        """
+        Deletes given workspace, as part of the eviction.
+        :param workspace: The workspace folder.
+        :type workspace: str
+        :param fd: The file descriptor holding its lock.
+        :type fd: int
+        """
+        shutil.rmtree(workspace, ignore_errors=True)
+        os.close(fd)
+        with cls._lock:
+            cls._retained.discard(workspace)
+            cls._sizes.pop(workspace, None)
+            cls._evicted += 1
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        Retrieves the workspace metrics.
+        :return: A dictionary with the root folder, the number of workspaces, leases, releases and evictions, the number of evicted stored files, and the disk usage in bytes, stores included.
+        :rtype: Dict
+        """
+        workspaces = cls.workspaces()
+        usage = sum(
+            [cls.disk_usage(workspace["path"]) for workspace in workspaces]
+            + [cls.disk_usage(store) for store in cls.stores()]
+        )
+        with cls._lock:
+            return {
+                "root": cls.root(),
+                "workspaces": len(workspaces),
+                "leased": len(cls._leases),
+                "retained": len(cls._retained),
+                "released": cls._released,
+                "evicted": cls._evicted,
+                "evicted-files": cls._evicted_files,
+                "bytes": usage,
+            }
+
+
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
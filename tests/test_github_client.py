@@ -0,0 +1,216 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_github_client.py
+
+This file tests the GithubClient class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pythoneda.tools.artifact.new_domain import (
+    GithubClient,
+    GithubClientPool,
+    GithubRateLimiter,
+)
+import threading
+import unittest
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    """
+    Answers the requests of the fake GitHub API, over keep-alive connections.
+
+    Class name: FakeGithubHandler
+
+    Responsibilities:
+        - Tell the authenticated user, and create repositories.
+        - Drop connections on request, to simulate idle timeouts and network failures.
+
+    Collaborators:
+        - GithubClientTests
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """
+        Retrieves the authenticated user.
+        """
+        self.server.connections.add(self.client_address)
+        self.reply(200, {"login": "me"})
+        if self.server.close_after_get:
+            # closes the connection the client believes it can reuse
+            self.close_connection = True
+
+    def do_POST(self):
+        """
+        Creates a repository.
+        """
+        self.server.connections.add(self.client_address)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.paths.append(self.path)
+        if body["name"] in self.server.repositories:
+            return self.reply(
+                422,
+                {
+                    "message": "Repository creation failed.",
+                    "errors": [{"message": "name already exists on this account"}],
+                },
+            )
+        self.server.repositories.add(body["name"])
+        if self.server.drop_next_post:
+            # created, but the response never arrives
+            self.server.drop_next_post = False
+            self.close_connection = True
+            return
+        self.reply(201, {"name": body["name"]})
+
+    def reply(self, status: int, body: dict):
+        """
+        Sends a JSON response.
+        :param status: The HTTP status.
+        :type status: int
+        :param body: The response.
+        :type body: dict
+        """
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """
+        Keeps the test output clean.
+        """
+        pass
+
+
+class GithubClientTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the GitHub client against a local fake API.
+
+    Class name: GithubClientTests
+
+    Responsibilities:
+        - Check connections are reused, and reopened once the server closes them.
+        - Check repository creations are not replayed blindly.
+        - Check repositories of the authenticated user are created through /user/repos.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GithubClient
+        - pythoneda.tools.artifact.new_domain.GithubClientPool
+    """
+
+    def setUp(self):
+        """
+        Starts the fake API.
+        """
+        GithubRateLimiter.configure(minInterval=0)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGithubHandler)
+        self._server.daemon_threads = True
+        self._server.connections = set()
+        self._server.paths = []
+        self._server.repositories = set()
+        self._server.close_after_get = False
+        self._server.drop_next_post = False
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._url = f"http://127.0.0.1:{self._server.server_port}"
+        self._client = GithubClient("token", self._url)
+
+    def tearDown(self):
+        """
+        Stops the fake API.
+        """
+        self._client.close()
+        GithubClientPool.close_all()
+        self._server.shutdown()
+        self._server.server_close()
+
+    async def test_connections_are_kept_alive(self):
+        """
+        Consecutive requests share a single connection.
+        """
+        for _ in range(3):
+            status, _, body = await self._client.request("GET", "/user")
+            self.assertEqual((status, body), (200, {"login": "me"}))
+        stats = self._client.stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["connections-opened"], 1)
+        self.assertEqual(stats["connections-reused"], 2)
+        self.assertEqual(len(self._server.connections), 1)
+        self.assertGreater(stats["max-latency"], 0)
+
+    async def test_closed_connections_are_reopened(self):
+        """
+        An idempotent request over a connection the server closed is retried on a new one.
+        """
+        self._server.close_after_get = True
+        await self._client.request("GET", "/user")
+        status, _, _ = await self._client.request("GET", "/user")
+        self.assertEqual(status, 200)
+        self.assertEqual(self._client.stats()["connections-opened"], 2)
+
+    async def test_dropped_creations_are_not_reported_as_failures(self):
+        """
+        If the response to a creation is lost, the retry finds the repository created.
+        """
+        self._server.drop_next_post = True
+        result = await self._client.create_repository("org", "domain")
+        self.assertNotIn("__error__", result)
+        self.assertEqual(self._server.paths, ["/orgs/org/repos", "/orgs/org/repos"])
+
+    async def test_existing_repositories_are_reported(self):
+        """
+        Without a lost response, "already exists" is an error.
+        """
+        self.assertNotIn("__error__", await self._client.create_repository("org", "a"))
+        self.assertIn("422", (await self._client.create_repository("org", "a"))["__error__"])
+
+    async def test_user_repositories_are_created_for_the_user(self):
+        """
+        The repositories of the authenticated user are not created under /orgs.
+        """
+        await self._client.create_repository("me", "domain")
+        self.assertEqual(self._server.paths, ["/user/repos"])
+
+    async def test_pool_aggregates_the_statistics(self):
+        """
+        The pool shares a client per token and sums their statistics.
+        """
+        GithubClientPool.configure(self._url)
+        client = GithubClientPool.client_for("token")
+        self.assertIs(GithubClientPool.client_for("token"), client)
+        await client.request("GET", "/user")
+        await client.request("GET", "/user")
+        stats = GithubClientPool.stats()
+        self.assertEqual(stats["clients"], 1)
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["connections-reused"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
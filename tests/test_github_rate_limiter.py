@@ -0,0 +1,288 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_github_rate_limiter.py
+
+This file tests the GithubRateLimiter class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pythoneda.tools.artifact.new_domain import GithubClient, GithubRateLimiter
+import threading
+import time
+import unittest
+
+
+class FakeRateLimitedHandler(BaseHTTPRequestHandler):
+    """
+    Answers the requests of the fake GitHub API with scripted responses.
+
+    Class name: FakeRateLimitedHandler
+
+    Responsibilities:
+        - Reply with the next scripted status, headers and body, or 200 when none is left.
+        - Record when each request arrives.
+
+    Collaborators:
+        - GithubRateLimiterTests
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """
+        Replies with the next scripted response.
+        """
+        self.server.arrivals.append(time.monotonic())
+        if self.server.script:
+            status, headers, body = self.server.script.pop(0)
+        else:
+            status, headers, body = 200, {}, {"login": "me"}
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """
+        Keeps the test output clean.
+        """
+        pass
+
+
+class GithubRateLimiterTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the pacing and retrying of rate-limited GitHub operations.
+
+    Class name: GithubRateLimiterTests
+
+    Responsibilities:
+        - Check requests wait for the quota reset, and for Retry-After.
+        - Check retries are bounded, and forbidden requests are not retried.
+        - Check the backoff is jittered and capped.
+        - Check operations other than requests are retried on rate-limit errors only.
+        - Check the waits are reported.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.GithubRateLimiter
+        - pythoneda.tools.artifact.new_domain.GithubClient
+    """
+
+    def setUp(self):
+        """
+        Starts the fake API, and shortens the delays.
+        """
+        GithubRateLimiter.configure(
+            maxRetries=2, baseDelay=0.02, maxDelay=0.5, minInterval=0
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRateLimitedHandler)
+        self._server.daemon_threads = True
+        self._server.script = []
+        self._server.arrivals = []
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        # each test paces its own token
+        self._token = self.id()
+        self._client = GithubClient(
+            self._token, f"http://127.0.0.1:{self._server.server_port}"
+        )
+        self._before = GithubRateLimiter.stats()
+
+    def tearDown(self):
+        """
+        Stops the fake API, and restores the delays.
+        """
+        self._client.close()
+        self._server.shutdown()
+        self._server.server_close()
+        GithubRateLimiter.configure(maxRetries=5, baseDelay=1.0, maxDelay=120.0)
+
+    def delta(self) -> dict:
+        """
+        Retrieves how the scheduling metrics changed during the test.
+        :return: The difference of each metric.
+        :rtype: dict
+        """
+        after = GithubRateLimiter.stats()
+        return {key: after[key] - self._before[key] for key in after}
+
+    def gaps(self) -> list:
+        """
+        Retrieves the time between consecutive requests.
+        :return: The gaps, in seconds.
+        :rtype: list
+        """
+        arrivals = self._server.arrivals
+        return [later - earlier for earlier, later in zip(arrivals, arrivals[1:])]
+
+    async def test_retry_after_is_honoured(self):
+        """
+        A 429 is retried once the Retry-After time has passed.
+        """
+        self._server.script = [(429, {"Retry-After": "0.2"}, {"message": "slow down"})]
+        status, _, body = await self._client.request("GET", "/user")
+        self.assertEqual((status, body), (200, {"login": "me"}))
+        [gap] = self.gaps()
+        self.assertGreaterEqual(gap, 0.2)
+        self.assertLess(gap, 0.5)
+        delta = self.delta()
+        self.assertEqual(delta["rate-limited"], 1)
+        self.assertEqual(delta["retries"], 1)
+        self.assertEqual(delta["waits"], 1)
+        self.assertGreaterEqual(delta["waited"], 0.2)
+        self.assertGreaterEqual(GithubRateLimiter.stats()["max-wait"], 0.2)
+
+    async def test_exhausted_quota_is_retried_after_the_reset(self):
+        """
+        A 403 with no remaining quota is retried once the quota resets.
+        """
+        reset = str(time.time() + 0.3)
+        self._server.script = [
+            (
+                403,
+                {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset},
+                {"message": "API rate limit exceeded"},
+            )
+        ]
+        status, _, _ = await self._client.request("GET", "/user")
+        self.assertEqual(status, 200)
+        [gap] = self.gaps()
+        self.assertGreaterEqual(gap, 0.25)
+        self.assertEqual(self.delta()["retries"], 1)
+
+    async def test_requests_wait_for_the_quota_to_reset(self):
+        """
+        Once a response says no quota is left, the next request waits for the
+        reset instead of being sent and rejected.
+        """
+        reset = str(time.time() + 0.3)
+        self._server.script = [
+            (200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}, {})
+        ]
+        await self._client.request("GET", "/user")
+        status, _, _ = await self._client.request("GET", "/user")
+        self.assertEqual(status, 200)
+        [gap] = self.gaps()
+        self.assertGreaterEqual(gap, 0.25)
+        delta = self.delta()
+        self.assertEqual(delta["rate-limited"], 0)
+        self.assertEqual(delta["waits"], 1)
+        self.assertGreaterEqual(delta["waited"], 0.25)
+
+    async def test_forbidden_requests_are_not_retried(self):
+        """
+        A 403 unrelated to rate limits is returned as is.
+        """
+        self._server.script = [(403, {}, {"message": "Must have admin rights"})]
+        status, _, _ = await self._client.request("GET", "/user")
+        self.assertEqual(status, 403)
+        self.assertEqual(len(self._server.arrivals), 1)
+        self.assertEqual(self.delta()["rate-limited"], 0)
+
+    async def test_retries_are_bounded(self):
+        """
+        After the maximum number of retries, the rate-limited response is returned.
+        """
+        self._server.script = [(429, {"Retry-After": "0"}, {})] * 5
+        status, _, _ = await self._client.request("GET", "/user")
+        self.assertEqual(status, 429)
+        self.assertEqual(len(self._server.arrivals), 3)
+        delta = self.delta()
+        self.assertEqual(delta["rate-limited"], 3)
+        self.assertEqual(delta["retries"], 2)
+        self.assertEqual(delta["exhausted"], 1)
+
+    def test_backoff_is_jittered_and_capped(self):
+        """
+        Without headers the backoff is a random fraction of the exponential
+        delay; with Retry-After, a little more than it; never above the cap.
+        """
+        delays = [GithubRateLimiter.backoff(2) for _ in range(100)]
+        self.assertTrue(all(0 <= delay <= 0.08 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+        delays = [
+            GithubRateLimiter.backoff(0, {"Retry-After": "0.1"}) for _ in range(100)
+        ]
+        self.assertTrue(all(0.1 <= delay <= 0.12 for delay in delays))
+        self.assertEqual(GithubRateLimiter.backoff(10), 0.5)
+        self.assertEqual(GithubRateLimiter.backoff(0, {"retry-after": "60"}), 0.5)
+
+    async def test_operations_are_retried_on_rate_limit_errors(self):
+        """
+        An operation failing with a rate-limit message is retried.
+        """
+        errors = [
+            "remote: API rate limit exceeded",
+            "The requested URL returned error: 429",
+        ]
+        calls = []
+
+        async def push():
+            calls.append(time.monotonic())
+            if errors:
+                raise RuntimeError(errors.pop(0))
+            return "pushed"
+
+        self.assertEqual(await GithubRateLimiter.run(self._token, push), "pushed")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.delta()["retries"], 2)
+
+    async def test_operations_are_not_retried_on_other_errors(self):
+        """
+        An operation failing for other reasons fails at once, even if its
+        message contains 429 somewhere else.
+        """
+        calls = []
+
+        async def push():
+            calls.append(time.monotonic())
+            raise RuntimeError("failed to push some refs to 4290abc")
+
+        with self.assertRaises(RuntimeError):
+            await GithubRateLimiter.run(self._token, push)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.delta()["rate-limited"], 0)
+
+    async def test_operations_give_up_after_the_retries(self):
+        """
+        An operation rate-limited every time fails after the maximum number of retries.
+        """
+        calls = []
+
+        async def push():
+            calls.append(time.monotonic())
+            raise RuntimeError("Too Many Requests")
+
+        with self.assertRaises(RuntimeError):
+            await GithubRateLimiter.run(self._token, push)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.delta()["exhausted"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,119 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_import_time.py
+
+This file tests the import time of the event packages.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENTS = "pythoneda.tools.artifact.new_domain.events"
+DBUS = f"{EVENTS}.infrastructure.dbus"
+
+
+class ImportTimeTests(unittest.TestCase):
+    """
+    Tests the event packages load their modules lazily.
+
+    Class name: ImportTimeTests
+
+    Responsibilities:
+        - Check importing the events doesn't pull in D-Bus.
+        - Check the import stays within a time budget.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.events
+        - pythoneda.tools.artifact.new_domain.events.infrastructure.dbus
+    """
+
+    # Generous, so slow machines don't fail; eager imports exceed it anyway
+    budget = 1.5
+
+    def fresh_import(self, module: str) -> dict:
+        """
+        Imports given module in a fresh interpreter.
+        :param module: The module.
+        :type module: str
+        :return: The seconds the import took, and the modules it loaded.
+        :rtype: dict
+        """
+        script = (
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "elapsed = time.perf_counter() - start\n"
+            "print(json.dumps({'seconds': elapsed, 'modules': sorted(sys.modules)}))\n"
+        )
+        process = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=REPO,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(process.returncode, 0, process.stderr)
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def assertNoDbus(self, modules: list):
+        """
+        Checks neither dbus_next nor the Dbus* events were imported.
+        :param modules: The imported modules.
+        :type modules: list
+        """
+        self.assertNotIn("dbus_next", modules)
+        self.assertEqual(
+            [module for module in modules if module.startswith(f"{DBUS}.")], []
+        )
+
+    def test_importing_the_events_does_not_import_dbus(self):
+        """
+        The events package loads neither dbus_next nor the D-Bus events.
+        """
+        result = self.fresh_import(EVENTS)
+        self.assertNoDbus(result["modules"])
+        self.assertNotIn(DBUS, result["modules"])
+
+    def test_importing_the_dbus_package_does_not_import_its_events(self):
+        """
+        The D-Bus package loads its Dbus* modules only on access.
+        """
+        result = self.fresh_import(DBUS)
+        self.assertIn(DBUS, result["modules"])
+        self.assertNoDbus(result["modules"])
+
+    def test_importing_the_events_stays_within_budget(self):
+        """
+        The events package imports in less than the budget.
+        """
+        result = self.fresh_import(EVENTS)
+        self.assertLess(result["seconds"], self.__class__.budget)
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,208 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_initial_commit.py
+
+This file tests the InitialCommit class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+from pythoneda.tools.artifact.new_domain import InitialCommit, StagingArea
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+
+class InitialCommitTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the initial commits and tags written straight into the object database.
+
+    Class name: InitialCommitTests
+
+    Responsibilities:
+        - Check the commit and the tag are valid objects git agrees with.
+        - Check the repositories with conversion attributes are left to git.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.InitialCommit
+        - pythoneda.tools.artifact.new_domain.StagingArea
+    """
+
+    files = {
+        "README.md": "# Domain\n",
+        "pkg.txt": "sorts before the pkg folder\n",
+        "pkg/__init__.py": "",
+        "pkg/sub/module.py": "VALUE = 1\n",
+        "bin/run.sh": "#!/bin/sh\necho run\n",
+    }
+
+    def setUp(self):
+        """
+        Creates an empty repository, isolated from the user's git configuration.
+        """
+        self._folder = tempfile.TemporaryDirectory()
+        self._repo = self._folder.name
+        self._environment = mock.patch.dict(
+            os.environ,
+            {
+                "GIT_CONFIG_GLOBAL": os.devnull,
+                "GIT_CONFIG_NOSYSTEM": "1",
+                "XDG_CONFIG_HOME": self._repo,
+                "GIT_AUTHOR_NAME": "Author",
+                "GIT_AUTHOR_EMAIL": "author@example.com",
+                "GIT_COMMITTER_NAME": "Committer",
+                "GIT_COMMITTER_EMAIL": "committer@example.com",
+            },
+        )
+        self._environment.start()
+        InitialCommit.configure(enabled=True)
+        self.git("init", "--quiet")
+        self._before = InitialCommit.stats()
+
+    def tearDown(self):
+        """
+        Deletes the repository.
+        """
+        StagingArea.discard(self._repo)
+        self._environment.stop()
+        self._folder.cleanup()
+
+    def git(self, *args: str) -> subprocess.CompletedProcess:
+        """
+        Runs git in the repository.
+        :param args: The arguments.
+        :type args: str
+        :return: The finished process.
+        :rtype: subprocess.CompletedProcess
+        """
+        return subprocess.run(
+            ["git", *args], cwd=self._repo, capture_output=True, text=True
+        )
+
+    def stage(self, files: dict) -> StagingArea:
+        """
+        Writes and stages given files. Shell scripts are made executable.
+        :param files: The contents of each file.
+        :type files: dict
+        :return: The staging area.
+        :rtype: pythoneda.tools.artifact.new_domain.StagingArea
+        """
+        result = StagingArea.for_repository(self._repo)
+        for name, contents in files.items():
+            path = os.path.join(self._repo, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(contents)
+            if name.endswith(".sh"):
+                os.chmod(path, 0o755)
+            result.stage(name)
+        return result
+
+    def delta(self) -> dict:
+        """
+        Retrieves how the metrics changed during the test.
+        :return: The difference of each metric.
+        :rtype: dict
+        """
+        after = InitialCommit.stats()
+        return {key: after[key] - self._before[key] for key in after}
+
+    async def test_the_commit_and_tag_are_what_git_expects(self):
+        """
+        The written commit and tag pass git fsck --strict, leave a clean
+        working tree, and keep the executable bit.
+        """
+        staging_area = self.stage(self.files)
+        self.assertTrue(await InitialCommit.commit(staging_area, "Initial commit"))
+        self.assertTrue(await InitialCommit.tag(self._repo, "0.0.1", "Version 0.0.1"))
+        fsck = self.git("fsck", "--strict", "--no-dangling")
+        self.assertEqual(fsck.returncode, 0, fsck.stdout + fsck.stderr)
+        self.assertEqual(self.git("status", "--porcelain").stdout, "")
+        self.assertEqual(self.git("cat-file", "-t", "0.0.1").stdout.strip(), "tag")
+        self.assertEqual(
+            self.git("rev-parse", "0.0.1^{commit}").stdout,
+            self.git("rev-parse", "HEAD").stdout,
+        )
+        self.assertEqual(self.git("log", "--format=%s").stdout, "Initial commit\n")
+        self.assertEqual(
+            self.git("log", "-1", "--format=%an <%ae>").stdout.strip(),
+            "Author <author@example.com>",
+        )
+        modes = {
+            line.split("\t")[1]: line.split()[0]
+            for line in self.git("ls-tree", "-r", "HEAD").stdout.splitlines()
+        }
+        self.assertEqual(sorted(modes), sorted(self.files))
+        self.assertEqual(modes["bin/run.sh"], "100755")
+        self.assertEqual(modes["pkg/sub/module.py"], "100644")
+        delta = self.delta()
+        self.assertEqual(delta["commits"], 1)
+        self.assertEqual(delta["tags"], 1)
+        self.assertEqual(delta["fallbacks"], 0)
+
+    async def test_conversion_attributes_are_left_to_git(self):
+        """
+        A .gitattributes setting eol or filter makes the commit fall back to git.
+        """
+        for attributes in ["* text eol=lf\n", "*.bin filter=lfs -text\n"]:
+            with self.subTest(attributes=attributes):
+                staging_area = self.stage(
+                    {**self.files, ".gitattributes": attributes}
+                )
+                settings = await InitialCommit.settings(self._repo)
+                reason = InitialCommit.unsupported(
+                    self._repo, settings, staging_area.paths
+                )
+                self.assertIsNotNone(reason)
+                self.assertIn(".gitattributes", reason)
+                self.assertFalse(
+                    await InitialCommit.commit(staging_area, "Initial commit")
+                )
+                self.assertFalse(
+                    await InitialCommit.tag(self._repo, "0.0.1", "Version 0.0.1")
+                )
+                # nothing was written, and the files are still pending
+                self.assertIsNotNone(
+                    InitialCommit.unborn_branch(os.path.join(self._repo, ".git"))
+                )
+                self.assertIn(".gitattributes", StagingArea.pending(self._repo))
+        self.assertEqual(self.delta()["fallbacks"], 2)
+        self.assertEqual(self.delta()["commits"], 0)
+
+    async def test_repositories_with_commits_are_left_to_git(self):
+        """
+        Only the first commit of a repository is written directly.
+        """
+        self.stage({"README.md": "# Domain\n"})
+        self.git("add", "README.md")
+        self.assertEqual(self.git("commit", "--quiet", "-m", "First").returncode, 0)
+        StagingArea.discard(self._repo)
+        staging_area = self.stage({"pkg/__init__.py": ""})
+        self.assertFalse(await InitialCommit.commit(staging_area, "Second"))
+        self.assertEqual(self.delta()["commits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
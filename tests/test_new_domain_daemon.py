@@ -0,0 +1,208 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_new_domain_daemon.py
+
+This file tests the NewDomainDaemon class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from pythoneda.tools.artifact.new_domain import NewDomainDaemon
+import unittest
+
+
+class FakeRequest:
+    """
+    Stands in for NewDomainRequested, with the attributes the pipelines read.
+
+    Class name: FakeRequest
+
+    Responsibilities:
+        - Carry the org, name, id and context of a request.
+
+    Collaborators:
+        - None
+    """
+
+    def __init__(self, index: int):
+        """
+        Creates a new FakeRequest instance.
+        :param index: The position of the request.
+        :type index: int
+        """
+        self.org = "acme"
+        self.name = f"domain-{index}"
+        self.id = f"run-{index}"
+        self.context = {}
+
+
+class NewDomainDaemonTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the queueing of new-domain pipelines.
+
+    Class name: NewDomainDaemonTests
+
+    Responsibilities:
+        - Check no more pipelines than workers run at once.
+        - Check the "reject" and "wait" backpressure modes.
+        - Check failed pipelines are counted as such.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.NewDomainDaemon
+    """
+
+    def setUp(self):
+        """
+        Prepares a stub handler that blocks until released.
+        """
+        self._gate = asyncio.Event()
+        self._running = 0
+        self._max_running = 0
+        self._handled = []
+
+    async def handler(self, event: FakeRequest):
+        """
+        Stands in for a whole pipeline.
+        :param event: The request.
+        :type event: FakeRequest
+        """
+        self._running += 1
+        self._max_running = max(self._max_running, self._running)
+        try:
+            await self._gate.wait()
+            if event.name == "fail":
+                raise RuntimeError("boom")
+            event.context["new-domain-created"] = True
+            self._handled.append(event.name)
+        finally:
+            self._running -= 1
+
+    async def until(self, condition):
+        """
+        Waits for given condition to hold.
+        :param condition: The condition.
+        :type condition: Callable[[], bool]
+        """
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.005)
+        self.fail("the condition never held")
+
+    async def test_no_more_pipelines_than_workers_run_at_once(self):
+        """
+        Five requests on two workers run two at a time, and all succeed.
+        """
+        daemon = NewDomainDaemon(self.handler, workers=2, queueSize=8)
+        daemon.start()
+        for index in range(5):
+            self.assertTrue(await daemon.submit(FakeRequest(index)))
+        await self.until(lambda: daemon.stats()["in-flight"] == 2)
+        self.assertEqual(daemon.stats()["queued"], 3)
+        self._gate.set()
+        await daemon.stop()
+        stats = daemon.stats()
+        self.assertEqual(self._max_running, 2)
+        self.assertEqual(stats["accepted"], 5)
+        self.assertEqual(stats["succeeded"], 5)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["queued"], 0)
+        self.assertEqual(sorted(self._handled), [f"domain-{i}" for i in range(5)])
+
+    async def test_reject_refuses_requests_when_the_queue_is_full(self):
+        """
+        With one worker busy and the queue full, the next request is rejected.
+        """
+        daemon = NewDomainDaemon(
+            self.handler, workers=1, queueSize=1, backpressure="reject"
+        )
+        daemon.start()
+        self.assertTrue(await daemon.submit(FakeRequest(0)))
+        await self.until(lambda: daemon.stats()["in-flight"] == 1)
+        self.assertTrue(await daemon.submit(FakeRequest(1)))
+        self.assertFalse(await daemon.submit(FakeRequest(2)))
+        self._gate.set()
+        await daemon.stop()
+        stats = daemon.stats()
+        self.assertEqual(stats["accepted"], 2)
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["succeeded"], 2)
+        self.assertEqual(sorted(self._handled), ["domain-0", "domain-1"])
+
+    async def test_wait_blocks_the_producer_until_there_is_room(self):
+        """
+        With one worker busy and the queue full, the next request waits, and
+        is accepted once the queue drains.
+        """
+        daemon = NewDomainDaemon(self.handler, workers=1, queueSize=1)
+        daemon.start()
+        await daemon.submit(FakeRequest(0))
+        await self.until(lambda: daemon.stats()["in-flight"] == 1)
+        await daemon.submit(FakeRequest(1))
+        producer = asyncio.create_task(daemon.submit(FakeRequest(2)))
+        await asyncio.sleep(0.05)
+        self.assertFalse(producer.done())
+        self._gate.set()
+        self.assertTrue(await asyncio.wait_for(producer, 5))
+        await daemon.stop()
+        stats = daemon.stats()
+        self.assertEqual(stats["accepted"], 3)
+        self.assertEqual(stats["rejected"], 0)
+        self.assertEqual(stats["succeeded"], 3)
+        self.assertGreater(stats["waited"], 0.04)
+
+    async def test_failed_pipelines_are_counted(self):
+        """
+        A handler raising, or never creating the domain, counts as a failure.
+        """
+        daemon = NewDomainDaemon(self.handler, workers=2)
+        daemon.start()
+        failing = FakeRequest(0)
+        failing.name = "fail"
+        await daemon.submit(failing)
+        await daemon.submit(FakeRequest(1))
+        self._gate.set()
+        await daemon.stop()
+        stats = daemon.stats()
+        self.assertEqual(stats["succeeded"], 1)
+        self.assertEqual(stats["failed"], 1)
+
+    async def test_submitting_requires_a_running_daemon(self):
+        """
+        Requests can't be submitted before the daemon starts.
+        """
+        daemon = NewDomainDaemon(self.handler)
+        with self.assertRaises(RuntimeError):
+            await daemon.submit(FakeRequest(0))
+
+    def test_unknown_backpressure_modes_are_refused(self):
+        """
+        Only "wait" and "reject" are accepted.
+        """
+        with self.assertRaises(ValueError):
+            NewDomainDaemon(self.handler, backpressure="drop")
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,109 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_new_domain_manifest.py
+
+This file tests the NewDomainManifest class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from pythoneda.tools.artifact.new_domain.infrastructure.cli.new_domain_manifest import (
+    NewDomainManifest,
+)
+import unittest
+
+
+class NewDomainManifestTests(unittest.TestCase):
+    """
+    Tests the parsing of manifests.
+
+    Class name: NewDomainManifestTests
+
+    Responsibilities:
+        - Check invalid manifests are rejected with a ValueError.
+        - Check errors never disclose the values of an entry.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.infrastructure.cli.NewDomainManifest
+    """
+
+    def test_entries_get_the_defaults(self):
+        """
+        The defaults of the manifest fill in what the entries don't provide.
+        """
+        entries = NewDomainManifest.parse(
+            '{"defaults": {"github_token": "t"}, "domains": [{"org": "o", "name": "n"}]}',
+            ".json",
+            None,
+            ["org", "name", "github-token"],
+        )
+        self.assertEqual(entries, [{"github-token": "t", "org": "o", "name": "n"}])
+
+    def test_empty_yaml_manifest_is_rejected(self):
+        """
+        An empty YAML manifest is not a list of domains.
+        """
+        with self.assertRaises(ValueError):
+            NewDomainManifest.parse("", ".yaml")
+
+    def test_scalar_manifest_is_rejected(self):
+        """
+        A manifest that is neither a list nor a mapping is rejected.
+        """
+        with self.assertRaises(ValueError):
+            NewDomainManifest.parse("42", ".json")
+
+    def test_malformed_yaml_manifest_is_rejected_without_its_contents(self):
+        """
+        Malformed YAML is reported as a ValueError telling only where the problem is.
+        """
+        with self.assertRaises(ValueError) as raised:
+            NewDomainManifest.parse("- org: o\n  github-token: [ghp_SECRET\n", ".yaml")
+        self.assertNotIn("ghp_SECRET", str(raised.exception))
+        self.assertIn("line", str(raised.exception))
+
+    def test_missing_keys_are_reported_without_the_values(self):
+        """
+        An incomplete entry is identified by its position, and its token is never shown.
+        """
+        with self.assertRaises(ValueError) as raised:
+            NewDomainManifest.parse('[{"org": "o", "github-token": "ghp_SECRET"}]', ".json")
+        message = str(raised.exception)
+        self.assertNotIn("ghp_SECRET", message)
+        self.assertIn("#0", message)
+        self.assertIn("name", message)
+
+    def test_invalid_entries_are_reported_without_their_contents(self):
+        """
+        An entry that is not a mapping is identified by its position only.
+        """
+        with self.assertRaises(ValueError) as raised:
+            NewDomainManifest.parse(
+                '[{"org": "o", "name": "n"}, "ghp_SECRET"]', ".json", None, ["org"]
+            )
+        self.assertNotIn("ghp_SECRET", str(raised.exception))
+        self.assertIn("#1", str(raised.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
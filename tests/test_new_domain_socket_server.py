@@ -0,0 +1,233 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_new_domain_socket_server.py
+
+This file tests the NewDomainSocketServer class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+import errno
+import json
+import os
+from pythoneda.tools.artifact.new_domain import NewDomainDaemon
+from pythoneda.tools.artifact.new_domain.infrastructure.server import (
+    NewDomainSocketServer,
+)
+import socket
+import stat
+import tempfile
+from typing import Dict
+import unittest
+
+
+class FakeRequest:
+    """
+    Stands in for NewDomainRequested, with the attributes the pipelines read.
+
+    Class name: FakeRequest
+
+    Responsibilities:
+        - Carry the org, name, id and context of a request.
+
+    Collaborators:
+        - None
+    """
+
+    def __init__(self, options: Dict):
+        """
+        Creates a new FakeRequest instance.
+        :param options: The options of the request.
+        :type options: Dict
+        """
+        self.org = options["org"]
+        self.name = options["name"]
+        self.id = f"{self.org}/{self.name}"
+        self.context = {}
+
+
+class NewDomainSocketServerTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the socket protocol of the new-domain daemon.
+
+    Class name: NewDomainSocketServerTests
+
+    Responsibilities:
+        - Check requests are submitted and replied to, and the stats command.
+        - Check invalid requests are refused without echoing their values.
+        - Check the socket is private, and a live one is never taken over.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.infrastructure.server.NewDomainSocketServer
+        - pythoneda.tools.artifact.new_domain.NewDomainDaemon
+    """
+
+    async def asyncSetUp(self):
+        """
+        Starts a daemon with a stub handler, and its server on a temporary socket.
+        """
+        self._folder = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._folder.name, "new-domain.sock")
+        self._handled = []
+        self._daemon = NewDomainDaemon(self.handler, workers=1, queueSize=4)
+        self._server = NewDomainSocketServer(
+            self._daemon,
+            FakeRequest,
+            self._path,
+            {"description": "A domain", "gpg-key-id": "ABCD"},
+        )
+        await self._server.start()
+        self._daemon.start()
+
+    async def asyncTearDown(self):
+        """
+        Stops the server and the daemon.
+        """
+        await self._server.stop()
+        await self._daemon.stop()
+        self._folder.cleanup()
+
+    async def handler(self, event: FakeRequest):
+        """
+        Stands in for a whole pipeline.
+        :param event: The request.
+        :type event: FakeRequest
+        """
+        event.context["new-domain-created"] = True
+        self._handled.append(event.id)
+
+    async def send(self, *lines: bytes) -> list:
+        """
+        Sends given requests through a single connection.
+        :param lines: The requests.
+        :type lines: bytes
+        :return: The replies.
+        :rtype: list
+        """
+        reader, writer = await asyncio.open_unix_connection(self._path)
+        try:
+            result = []
+            for line in lines:
+                writer.write(line + b"\n")
+                await writer.drain()
+                result.append(json.loads(await reader.readline()))
+            return result
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    @staticmethod
+    def request(**options) -> bytes:
+        """
+        Builds a request for given options.
+        :param options: The options, with underscores instead of dashes.
+        :type options: Dict
+        :return: The request.
+        :rtype: bytes
+        """
+        return json.dumps(
+            {key.replace("_", "-"): value for key, value in options.items()}
+        ).encode("utf-8")
+
+    async def test_requests_are_submitted_to_the_daemon(self):
+        """
+        A complete request is accepted and its pipeline runs.
+        """
+        [reply] = await self.send(
+            self.request(
+                org="acme", name="orders", package="acme.orders", github_token="t0k"
+            )
+        )
+        self.assertTrue(reply["accepted"])
+        self.assertEqual(reply["run-id"], "acme/orders")
+        self.assertEqual(reply["stats"]["accepted"], 1)
+        await self._daemon.stop()
+        self.assertEqual(self._handled, ["acme/orders"])
+
+    async def test_the_stats_command_replies_with_the_daemon_metrics(self):
+        """
+        The stats command returns the metrics without submitting anything.
+        """
+        [reply] = await self.send(b'{"command": "stats"}')
+        self.assertEqual(reply["stats"]["accepted"], 0)
+        self.assertEqual(reply["stats"]["workers"], 1)
+
+    async def test_invalid_requests_are_refused_without_echoing_them(self):
+        """
+        Neither malformed nor incomplete requests reveal their contents,
+        and the connection keeps serving afterwards.
+        """
+        secret = "ghp_secret-token"
+        malformed, incomplete, stats = await self.send(
+            f'{{"github-token": "{secret}"'.encode("utf-8"),
+            self.request(org="acme", github_token=secret),
+            b'{"command": "stats"}',
+        )
+        self.assertFalse(malformed["accepted"])
+        self.assertNotIn(secret, json.dumps(malformed))
+        self.assertFalse(incomplete["accepted"])
+        self.assertIn("name", incomplete["error"])
+        self.assertNotIn(secret, json.dumps(incomplete))
+        self.assertEqual(stats["stats"]["accepted"], 0)
+
+    async def test_the_socket_is_reachable_only_by_its_owner(self):
+        """
+        The socket has no permissions for the group or others.
+        """
+        self.assertEqual(stat.S_IMODE(os.stat(self._path).st_mode) & 0o077, 0)
+
+    async def test_a_live_socket_is_never_taken_over(self):
+        """
+        A second server refuses to start while the first one listens.
+        """
+        other = NewDomainSocketServer(self._daemon, FakeRequest, self._path)
+        with self.assertRaises(OSError) as context:
+            await other.start()
+        self.assertEqual(context.exception.errno, errno.EADDRINUSE)
+        [reply] = await self.send(b'{"command": "stats"}')
+        self.assertIn("stats", reply)
+
+    async def test_a_stale_socket_is_replaced(self):
+        """
+        A socket nobody listens on is removed, and the server binds anew.
+        """
+        path = os.path.join(self._folder.name, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()
+        other = NewDomainSocketServer(self._daemon, FakeRequest, path)
+        await other.start()
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{"command": "stats"}\n')
+            self.assertIn("stats", json.loads(await reader.readline()))
+            writer.close()
+            await writer.wait_closed()
+        finally:
+            await other.stop()
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
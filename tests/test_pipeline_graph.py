@@ -0,0 +1,181 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_pipeline_graph.py
+
+This file tests the PipelineGraph class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import asyncio
+from pythoneda.tools.artifact.new_domain.events import (
+    DefinitionRepositoryFlakeLockRequested,
+    DomainRepositoryCloned,
+    DomainRepositoryCommitRequested,
+    DomainRepositoryGitattributesRequested,
+    DomainRepositoryGitignoreRequested,
+    DomainRepositoryInitFilesRequested,
+    DomainRepositoryReadmeRequested,
+    PipelineGraph,
+    UpdateSha256InDefinitionRepositoryNixFlakeRequested,
+)
+import time
+import unittest
+
+
+def cloned() -> DomainRepositoryCloned:
+    """
+    Builds the event completing the clone step of a new domain pipeline.
+    :return: Such event.
+    :rtype: pythoneda.tools.artifact.new_domain.events.DomainRepositoryCloned
+    """
+    return DomainRepositoryCloned(
+        "org", "name", "A domain", "pythoneda.org.name", "token", "key", {}
+    )
+
+
+class PipelineGraphTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the fan-out and the joins of the pipeline graphs.
+
+    Class name: PipelineGraphTests
+
+    Responsibilities:
+        - Check the steps triggered at once run concurrently.
+        - Check a step waits for all its dependencies.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.events.PipelineGraph
+    """
+
+    def tearDown(self):
+        """
+        Removes the dispatcher.
+        """
+        PipelineGraph.configure(None)
+
+    async def test_fan_out_steps_overlap(self):
+        """
+        The four scaffolding steps of the domain repository run at the same time.
+        """
+        intervals = {}
+
+        async def dispatch(event):
+            start = time.monotonic()
+            await asyncio.sleep(0.05)
+            intervals[event.__class__] = (start, time.monotonic())
+
+        PipelineGraph.configure(dispatch)
+        remaining = await PipelineGraph.domain().advance(cloned(), "clone")
+        self.assertEqual(remaining, [])
+        self.assertEqual(
+            set(intervals.keys()),
+            {
+                DomainRepositoryReadmeRequested,
+                DomainRepositoryGitattributesRequested,
+                DomainRepositoryGitignoreRequested,
+                DomainRepositoryInitFilesRequested,
+            },
+        )
+        last_start = max([start for start, _ in intervals.values()])
+        first_end = min([end for _, end in intervals.values()])
+        self.assertLess(last_start, first_end)
+
+    async def test_failed_branch_fails_after_the_others_finish(self):
+        """
+        A failing branch doesn't leave the other branches running.
+        """
+        finished = []
+
+        async def dispatch(event):
+            if isinstance(event, DomainRepositoryReadmeRequested):
+                raise RuntimeError("readme failed")
+            await asyncio.sleep(0.01)
+            finished.append(event.__class__)
+
+        PipelineGraph.configure(dispatch)
+        with self.assertRaises(RuntimeError):
+            await PipelineGraph.domain().advance(cloned(), "clone")
+        self.assertEqual(len(finished), 3)
+
+    async def test_without_dispatcher_the_events_are_returned(self):
+        """
+        Without a dispatcher, the triggered events are left to the caller.
+        """
+        remaining = await PipelineGraph.domain().advance(cloned(), "clone")
+        self.assertEqual(len(remaining), 4)
+
+    def test_join_waits_for_every_dependency(self):
+        """
+        The commit is triggered only once the four scaffolding steps are done.
+        """
+        graph = PipelineGraph.domain()
+        event = cloned()
+        self.assertEqual(len(graph.complete(event, "clone")), 4)
+        for step in ["readme", "gitattributes", "gitignore"]:
+            self.assertEqual(graph.complete(event, step), [])
+        triggered = graph.complete(event, "init-files")
+        self.assertEqual(len(triggered), 1)
+        self.assertIsInstance(triggered[0], DomainRepositoryCommitRequested)
+        # a step is triggered only once
+        self.assertEqual(graph.complete(event, "init-files"), [])
+
+    def test_frontier_holds_the_unfinished_steps(self):
+        """
+        The steps triggered but never completed are rebuilt to resume the pipeline.
+        """
+        graph = PipelineGraph.domain()
+        event = cloned()
+        graph.complete(event, "clone")
+        graph.complete(event, "readme")
+        graph.complete(event, "gitignore")
+        self.assertEqual(
+            {request.__class__ for request in PipelineGraph.frontier(event)},
+            {
+                DomainRepositoryGitattributesRequested,
+                DomainRepositoryInitFilesRequested,
+            },
+        )
+
+    def test_only_the_sha256_waits_for_the_domain_push(self):
+        """
+        The flake.lock of the definition repository doesn't wait for the domain push.
+        """
+        graph = PipelineGraph.definition()
+        event = cloned()
+        graph.complete(event, "clone")
+        triggered = graph.complete(event, "nix-flake")
+        self.assertEqual(
+            [request.__class__ for request in triggered],
+            [DefinitionRepositoryFlakeLockRequested],
+        )
+        self.assertEqual(graph.complete(event, "flake-lock"), [])
+        triggered = graph.complete(event, "domain-pushed")
+        self.assertEqual(
+            [request.__class__ for request in triggered],
+            [UpdateSha256InDefinitionRepositoryNixFlakeRequested],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
@@ -0,0 +1,97 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_staging_area.py
+
+This file tests the StagingArea class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import os
+from pythoneda.tools.artifact.new_domain import GitCommand, StagingArea
+import subprocess
+import tempfile
+import unittest
+
+
+class StagingAreaTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests the staging of generated files.
+
+    Class name: StagingAreaTests
+
+    Responsibilities:
+        - Check the pending paths are added to the index with a single git process.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.StagingArea
+    """
+
+    def setUp(self):
+        """
+        Creates an empty repository.
+        """
+        self._folder = tempfile.TemporaryDirectory()
+        self._repo = self._folder.name
+        subprocess.run(["git", "init", "--quiet", self._repo], check=True)
+
+    def tearDown(self):
+        """
+        Deletes the repository.
+        """
+        StagingArea.discard(self._repo)
+        self._folder.cleanup()
+
+    async def test_several_paths_are_added_with_a_single_git_add(self):
+        """
+        Staging three files spawns one git process, saving two.
+        """
+        for name in ["README.md", ".gitignore", "pkg/__init__.py"]:
+            path = os.path.join(self._repo, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(f"# {name}\n")
+        staging_area = StagingArea.for_repository(self._repo)
+        staging_area.stage("README.md")
+        staging_area.stage(os.path.join(self._repo, ".gitignore"))
+        staging_area.stage("pkg/__init__.py")
+        # staged twice, added once
+        staging_area.stage("README.md")
+        spawns = GitCommand.spawns()
+        before = StagingArea.stats()
+        self.assertEqual(await staging_area.flush(), 3)
+        after = StagingArea.stats()
+        self.assertEqual(GitCommand.spawns() - spawns, 1)
+        self.assertEqual(after["flushes"] - before["flushes"], 1)
+        self.assertEqual(after["spawns-saved"] - before["spawns-saved"], 2)
+        staged = subprocess.run(
+            ["git", "ls-files"], cwd=self._repo, capture_output=True, text=True
+        ).stdout.split()
+        self.assertEqual(sorted(staged), [".gitignore", "README.md", "pkg/__init__.py"])
+        # nothing left to add
+        self.assertEqual(await staging_area.flush(), 0)
+        self.assertEqual(GitCommand.spawns() - spawns, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End:
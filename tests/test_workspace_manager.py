@@ -0,0 +1,175 @@
+# vim: set fileencoding=utf-8
+"""
+tests/test_workspace_manager.py
+
+This file tests the WorkspaceManager class.
+
+Copyright (C) 2024-today rydnr's pythoneda-tools-artifact/new-domain
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import fcntl
+import os
+from pythoneda.tools.artifact.new_domain import WorkspaceManager
+import tempfile
+import time
+import unittest
+
+
+class WorkspaceManagerTests(unittest.TestCase):
+    """
+    Tests the leases and the eviction of workspaces.
+
+    Class name: WorkspaceManagerTests
+
+    Responsibilities:
+        - Check leased and kept workspaces survive or get deleted as expected.
+        - Check stale workspaces and the oldest ones over the size limit get evicted.
+        - Check workspaces in use are never evicted.
+
+    Collaborators:
+        - pythoneda.tools.artifact.new_domain.WorkspaceManager
+    """
+
+    def setUp(self):
+        """
+        Uses a temporary root, without background evictions.
+        """
+        self._root = tempfile.TemporaryDirectory()
+        WorkspaceManager.configure(
+            root=self._root.name,
+            maxBytes=2**60,
+            maxAge=3600,
+            gracePeriod=0,
+            evictionInterval=float("inf"),
+        )
+
+    def tearDown(self):
+        """
+        Releases the workspaces, and restores the defaults.
+        """
+        WorkspaceManager.release_all()
+        WorkspaceManager.configure(
+            maxBytes=2**60, maxAge=24 * 60 * 60, gracePeriod=10 * 60, evictionInterval=60
+        )
+        self._root.cleanup()
+
+    def abandoned(self, age: float, size: int = 0) -> str:
+        """
+        Creates a workspace nobody uses, as if a previous process left it behind.
+        :param age: Its age, in seconds.
+        :type age: float
+        :param size: The size of its contents, in bytes.
+        :type size: int
+        :return: The workspace.
+        :rtype: str
+        """
+        result = tempfile.mkdtemp(prefix="new-domain-", dir=self._root.name)
+        with open(os.path.join(result, "file"), "wb") as f:
+            f.write(b"x" * size)
+        created = time.time() - age
+        os.utime(result, (created, created))
+        return result
+
+    def test_release_deletes_the_workspace(self):
+        """
+        Released workspaces are deleted.
+        """
+        workspace = WorkspaceManager.lease()
+        self.assertTrue(os.path.isdir(workspace))
+        WorkspaceManager.release(workspace)
+        self.assertFalse(os.path.isdir(workspace))
+        self.assertEqual(WorkspaceManager.stats()["leased"], 0)
+
+    def test_kept_workspaces_survive_until_evicted(self):
+        """
+        Kept workspaces are not deleted on exit, but can be evicted.
+        """
+        workspace = WorkspaceManager.lease()
+        WorkspaceManager.keep(workspace)
+        WorkspaceManager.release_all()
+        self.assertTrue(os.path.isdir(workspace))
+        WorkspaceManager.configure(maxAge=0)
+        self.assertEqual(WorkspaceManager.evict(), 1)
+        self.assertFalse(os.path.isdir(workspace))
+
+    def test_stale_workspaces_are_evicted(self):
+        """
+        Workspaces older than the maximum age are evicted, unless leased.
+        """
+        stale = self.abandoned(7200)
+        recent = self.abandoned(60)
+        leased = WorkspaceManager.lease()
+        os.utime(leased, (time.time() - 7200, time.time() - 7200))
+        evicted = WorkspaceManager.stats()["evicted"]
+        self.assertEqual(WorkspaceManager.evict(), 1)
+        self.assertFalse(os.path.isdir(stale))
+        self.assertTrue(os.path.isdir(recent))
+        self.assertTrue(os.path.isdir(leased))
+        self.assertEqual(WorkspaceManager.stats()["evicted"] - evicted, 1)
+
+    def test_oldest_workspaces_are_evicted_over_the_size_limit(self):
+        """
+        The oldest workspaces are evicted until the disk usage fits, sparing the young ones.
+        """
+        oldest = self.abandoned(300, 1000)
+        older = self.abandoned(200, 1000)
+        young = self.abandoned(1, 1000)
+        WorkspaceManager.configure(maxBytes=1000, gracePeriod=100)
+        self.assertEqual(WorkspaceManager.evict(), 2)
+        self.assertFalse(os.path.isdir(oldest))
+        self.assertFalse(os.path.isdir(older))
+        self.assertTrue(os.path.isdir(young))
+        self.assertEqual(WorkspaceManager.stats()["bytes"], 1000)
+
+    def test_workspaces_locked_by_other_processes_are_never_evicted(self):
+        """
+        A workspace whose .lease file is locked is in use somewhere else.
+        """
+        workspace = self.abandoned(7200, 1000)
+        # a lock on another open file description conflicts like another process
+        fd = os.open(os.path.join(workspace, ".lease"), os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            WorkspaceManager.configure(maxAge=0, maxBytes=1)
+            self.assertEqual(WorkspaceManager.evict(), 0)
+            self.assertTrue(os.path.isdir(workspace))
+            with self.assertRaises(ValueError):
+                WorkspaceManager.adopt(workspace)
+        finally:
+            os.close(fd)
+        self.assertEqual(WorkspaceManager.evict(), 1)
+        self.assertFalse(os.path.isdir(workspace))
+
+    def test_adopted_workspaces_are_leased(self):
+        """
+        Adopting a workspace left behind protects it from eviction.
+        """
+        workspace = self.abandoned(7200)
+        WorkspaceManager.adopt(workspace)
+        WorkspaceManager.configure(maxAge=0)
+        self.assertEqual(WorkspaceManager.evict(), 0)
+        self.assertEqual(WorkspaceManager.workspace_of(os.path.join(workspace, "file")), workspace)
+
+
+if __name__ == "__main__":
+    unittest.main()
+# vim: syntax=python ts=4 sw=4 sts=4 tw=79 sr et
+# Local Variables:
+# mode: python
+# python-indent-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# fill-column: 79
+# End: